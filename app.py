@@ -1,6 +1,9 @@
 from flask import Flask, render_template, request, jsonify, session
 from src.core.ai_matcher import AIMatcher
-from config import init_upload_folder, allowed_file, secure_filename
+from src.core.reextraction import ReextractionJob
+from src.database.candidate_record import CandidateRecord
+from src.utils.upload_stream import SpooledUpload
+from config import init_upload_folder, allowed_file, secure_filename, MATCH_BATCH_MAX_JOBS, MATCH_BATCH_MAX_TOP_K
 import os
 import json
 
@@ -10,6 +13,7 @@ app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 
 matcher = AIMatcher()
+reextraction = ReextractionJob(matcher)
 
 @app.route('/')
 def index():
@@ -23,27 +27,30 @@ def upload_cv():
         
         file = request.files['cv_file']
         candidate_name = request.form.get('name', 'Unknown Candidate')
+        upsert = request.form.get('upsert') in ('1', 'true', 'on')
         
         if file.filename == '':
             return "No file selected", 400
         
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-            
             try:
-                result = matcher.process_and_store_cv(file_path, candidate_name)
+                # Streamed and hashed in one read; only large files reach the disk
+                upload = SpooledUpload.receive(file.stream, secure_filename(file.filename), app.config['UPLOAD_FOLDER'])
+                result = matcher.process_and_store_upload(upload, candidate_name, upsert=upsert)
                 
                 if 'error' in result:
                     return f"Error: {result['error']}", 500
                 
+                replaced = f"<p><strong>Replaced:</strong> {len(result['replaced'])} earlier CV(s)</p>" if result['replaced'] else ""
+                
                 return f"""
                 <div style="text-align: center; padding: 50px;">
                     <h2 style="color: green;">✅ CV Uploaded Successfully!</h2>
                     <p><strong>Candidate:</strong> {candidate_name}</p>
                     <p><strong>Skills Found:</strong> {', '.join(result['skills']) if result['skills'] else 'Skills detected from CV'}</p>
                     <p><strong>Text Processed:</strong> {result['text_length']} characters</p>
+                    <p><strong>LLM Tokens Used:</strong> {result['token_usage']['total_tokens']}</p>
+                    {replaced}
                     <a href="/upload" style="color: #667eea; margin-right: 20px;">Upload Another CV</a>
                     <a href="/" style="color: #667eea;">Back to Home</a>
                 </div>
@@ -55,6 +62,13 @@ def upload_cv():
     
     return render_template('upload.html')
 
+def optional_number(value, cast=float):
+    """Form field -> number, or None when blank or not a number"""
+    try:
+        return cast(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
 @app.route('/search', methods=['GET', 'POST'])
 def search_cvs():
     if request.method == 'POST':
@@ -64,7 +78,13 @@ def search_cvs():
             return "Please enter job description", 400
         
         try:
-            results = matcher.find_matching_cvs(job_description)
+            results = matcher.find_matching_cvs(
+                job_description,
+                min_experience=optional_number(request.form.get('min_experience')),
+                max_experience=optional_number(request.form.get('max_experience')),
+                min_graduation_year=optional_number(request.form.get('min_graduation_year'), int),
+                max_graduation_year=optional_number(request.form.get('max_graduation_year'), int)
+            )
             
             # Store only lightweight search summary in session to avoid cookie size issues
             # Extract flat lists from nested ChromaDB result shape
@@ -78,7 +98,7 @@ def search_cvs():
                 'timestamp': os.times().user  # lightweight timestamp
             }
             
-            print(f"🔍 Search completed. Found {len(results['metadatas'][0]) if results and results.get('metadatas') and results['metadatas'][0] else 0} candidates")
+            print(f"🔍 Search completed. Found {len(results['candidates'][0])} candidates")
             return render_template('results.html', results=results, query=job_description)
         except Exception as e:
             return f"Error searching CVs: {str(e)}", 500
@@ -108,35 +128,16 @@ def candidate_profile():
         if candidate_index < 0 or candidate_index >= len(ids):
             return f"Invalid candidate index: {candidate_index}. Only {len(ids)} candidates available.", 400
         
-        # Fetch the CV metadata from the DB by ID to avoid storing large payloads in session
+        # Fetch the CV by ID to avoid storing large payloads in session; repeat views come from the profile cache
         cv_id = ids[candidate_index]
-        record = matcher.db.get_cv_by_id(cv_id)
-        if not record or not record.get('metadata'):
+        profile = matcher.db.get_profile(cv_id)
+        if profile is None:
             return "Candidate metadata not available. The CV may have been removed.", 400
         
-        metadata = record['metadata']
-        print(f"✅ Loading candidate: {metadata.get('candidate_name', 'Unknown')}")
-        
-        # Create candidate details from metadata - ALL NEW FIELDS
-        candidate_details = {
-            'name': metadata.get('candidate_name', 'Unknown Candidate'),
-            'email': metadata.get('email', 'Email in CV'),
-            'phone': metadata.get('phone', 'Phone in CV'),
-            'address': metadata.get('address', 'Address in CV'),
-            'location': metadata.get('location', 'Location in CV'),
-            'current_role': metadata.get('current_role', 'Professional Role'),
-            'experience': metadata.get('experience', 'Experience in CV'),
-            'current_company': metadata.get('current_company', 'Company in CV'),
-            'education': metadata.get('education', 'Education details in CV'),
-            'summary': metadata.get('summary', 'Professional with technical expertise'),
-            'programming_languages': metadata.get('programming_languages', ''),
-            'frameworks': metadata.get('frameworks', ''),
-            'databases': metadata.get('databases', ''),
-            'cloud_platforms': metadata.get('cloud_platforms', '')
-        }
-        
-        skills = metadata.get('skills', '').split(', ') if metadata.get('skills') else []
-        raw_text = metadata.get('raw_text', 'CV content preview not available')
+        candidate_details = profile['candidate_details']
+        skills = profile['skills']
+        raw_text = profile['raw_text']
+        print(f"✅ Loading candidate: {candidate_details['name']}")
         
         # Calculate ACCURATE match score for THIS SPECIFIC candidate
         match_score = 85  # Default fallback
@@ -169,24 +170,164 @@ def api_analyze_cv():
         return jsonify({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        
         try:
-            result = matcher.process_and_store_cv(file_path, "API Candidate")
+            upload = SpooledUpload.receive(file.stream, secure_filename(file.filename), app.config['UPLOAD_FOLDER'])
+            result = matcher.process_and_store_upload(upload, "API Candidate",
+                                                      upsert=request.form.get('upsert') in ('1', 'true', 'on'))
             return jsonify(result)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     return jsonify({'error': 'Invalid file type'}), 400
 
+@app.route('/api/match_batch', methods=['POST'])
+def api_match_batch():
+    """Match many job descriptions in one request.
+
+    Body: {"job_descriptions": [...], "top_k": 5} plus the optional
+    min/max_experience and min/max_graduation_year filters of /search.
+    At most MATCH_BATCH_MAX_JOBS descriptions; top_k is capped at MATCH_BATCH_MAX_TOP_K.
+    """
+    payload = request.get_json(silent=True) or {}
+    job_descriptions = payload.get('job_descriptions')
+    if not isinstance(job_descriptions, list) or not job_descriptions \
+            or not all(isinstance(jd, str) and jd.strip() for jd in job_descriptions):
+        return jsonify({'error': 'job_descriptions must be a non-empty list of strings'}), 400
+    if len(job_descriptions) > MATCH_BATCH_MAX_JOBS:
+        return jsonify({'error': f'At most {MATCH_BATCH_MAX_JOBS} job_descriptions per request'}), 400
+    top_k = payload.get('top_k', 5)
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+        return jsonify({'error': 'top_k must be a positive integer'}), 400
+    
+    try:
+        results = matcher.find_matching_cvs_batch(
+            [jd.strip() for jd in job_descriptions],
+            top_k=min(top_k, MATCH_BATCH_MAX_TOP_K),
+            min_experience=optional_number(payload.get('min_experience')),
+            max_experience=optional_number(payload.get('max_experience')),
+            min_graduation_year=optional_number(payload.get('min_graduation_year'), int),
+            max_graduation_year=optional_number(payload.get('max_graduation_year'), int)
+        )
+        return jsonify({'results': [
+            {
+                'job_index': i,
+                'matches': [
+                    dict(candidate.to_dict(), score=score)
+                    for candidate, score in zip(result['candidates'][0], result['distances'][0])
+                ],
+                'timings': result['timings']
+            }
+            for i, result in enumerate(results)
+        ]})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/saved_searches', methods=['GET', 'POST'])
+def api_saved_searches():
+    """List saved searches, or save one: {"name", "job_description", "threshold"}"""
+    if request.method == 'GET':
+        return jsonify({'saved_searches': matcher.saved_searches.list()})
+    
+    payload = request.get_json(silent=True) or {}
+    job_description = str(payload.get('job_description', '')).strip()
+    if not job_description:
+        return jsonify({'error': 'job_description is required'}), 400
+    threshold = optional_number(payload.get('threshold'))
+    try:
+        search = matcher.saved_searches.create(payload.get('name'), job_description,
+                                               threshold if threshold is not None else 75)
+        return jsonify(search), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/saved_searches/<search_id>', methods=['DELETE'])
+def api_delete_saved_search(search_id):
+    if not matcher.saved_searches.delete(search_id):
+        return jsonify({'error': 'Saved search not found'}), 404
+    return jsonify({'success': True})
+
+@app.route('/api/saved_searches/<search_id>/inbox')
+def api_saved_search_inbox(search_id):
+    """New matches since the last check. ?all=1 returns the whole inbox, ?peek=1 leaves it unread."""
+    entries = matcher.saved_searches.inbox(search_id, unread_only=request.args.get('all') != '1',
+                                           mark_read=request.args.get('peek') != '1')
+    if entries is None:
+        return jsonify({'error': 'Saved search not found'}), 404
+    # CVs deleted since they matched are dropped
+    metadatas = matcher.db.get_metadatas([entry['cv_id'] for entry in entries])
+    entries = [entry for entry, metadata in zip(entries, metadatas) if metadata]
+    return jsonify({'search_id': search_id, 'matches': entries})
+
+@app.route('/api/analytics')
+def api_analytics():
+    """Skill supply: counts per skill, role, location and experience band. ?top=N trims skills, roles and locations."""
+    try:
+        snapshot = matcher.db.analytics.snapshot()
+        top = optional_number(request.args.get('top'), int)
+        if top:
+            snapshot = dict(snapshot,
+                            skills=dict(list(snapshot['skills'].items())[:top]),
+                            roles=dict(list(snapshot['roles'].items())[:top]),
+                            locations=dict(list(snapshot['locations'].items())[:top]))
+        return jsonify(snapshot)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/suggest')
+def api_suggest():
+    """Autocomplete of skills and job titles in the pool: ?q=<text being typed>[&limit=8][&type=skill|role]"""
+    try:
+        limit = min(optional_number(request.args.get('limit'), int) or 8, 20)
+        kind = request.args.get('type') or None
+        if kind not in (None, 'skill', 'role'):
+            return jsonify({'error': 'type must be skill or role'}), 400
+        matched, matches = matcher.db.analytics.suggest(request.args.get('q', ''), limit, kind)
+        return jsonify({
+            'matched': matched,
+            'suggestions': [{'text': name, 'type': kind, 'count': count} for name, kind, count in matches],
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/candidates/lookup')
+def api_candidate_lookup():
+    """Candidates by exact contact details: ?email=... or ?phone=... (normalised before matching)"""
+    email, phone = request.args.get('email'), request.args.get('phone')
+    if not email and not phone:
+        return jsonify({'error': 'email or phone is required'}), 400
+    try:
+        cv_ids = matcher.db.find_by_key('email', email) if email else matcher.db.find_by_key('phone', phone)
+        candidates = [CandidateRecord.from_metadata(cv_id, metadata).to_dict()
+                      for cv_id, metadata in zip(cv_ids, matcher.db.get_metadatas(cv_ids)) if metadata]
+        return jsonify({'candidates': candidates})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/reextraction', methods=['GET', 'POST'])
+def api_reextraction():
+    """Progress of the stale-CV re-extraction job; POST {"action": "start" | "stop" | "reset"} controls it"""
+    if request.method == 'GET':
+        return jsonify(reextraction.status())
+    
+    action = (request.get_json(silent=True) or {}).get('action')
+    if action == 'start':
+        if not reextraction.start_background():
+            return jsonify({'error': 'Re-extraction is already running'}), 409
+    elif action == 'stop':
+        reextraction.stop()
+    elif action == 'reset':
+        if not reextraction.reset():
+            return jsonify({'error': 'Stop the running re-extraction first'}), 409
+    else:
+        return jsonify({'error': 'action must be start, stop or reset'}), 400
+    return jsonify(reextraction.status())
+
 # Debug routes for database management
 @app.route('/debug/database')
 def debug_database():
     """Debug route to see database contents"""
     try:
-        all_cvs = matcher.db.get_all_cvs()
+        all_cvs = matcher.db.get_all_cvs(include=('metadatas',))
         cv_count = matcher.db.get_cv_count()
         
         debug_info = {
@@ -218,6 +359,32 @@ def cv_count():
     except Exception as e:
         return jsonify({'error': str(e)})
 
+@app.route('/debug/llm_budget')
+def llm_budget():
+    """LLM token budget usage and recent per-CV spend"""
+    try:
+        return jsonify(matcher.llm_scheduler.snapshot())
+    except Exception as e:
+        return jsonify({'error': str(e)})
+
+@app.route('/debug/profile_cache')
+def profile_cache():
+    """Profile cache size and hit rate in this process"""
+    try:
+        return jsonify(matcher.db.profiles.snapshot())
+    except Exception as e:
+        return jsonify({'error': str(e)})
+
+@app.route('/debug/llm_providers')
+def llm_providers():
+    """Circuit breaker state, latency and failover counts per provider (LLM_PROVIDER=router)"""
+    try:
+        if not hasattr(matcher.llm_client, 'snapshot'):
+            return jsonify({'error': 'LLM_PROVIDER is not router'})
+        return jsonify(matcher.llm_client.snapshot())
+    except Exception as e:
+        return jsonify({'error': str(e)})
+
 if __name__ == '__main__':
     init_upload_folder()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,85 @@
+"""Compare prompt tokens and extracted-field coverage: blind truncation vs section compaction.
+
+Runs offline: coverage is measured with the local fallback extractors, so
+no API key is needed. Usage:
+
+    python -m benchmarks.compaction_report [cv_folder] [--json out.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+
+from src.utils.file_parser import CVParser
+from src.utils.text_cleaner import TextCleaner
+from src.llm.openai_client import OpenAIClient
+from src.database.candidate_record import PLACEHOLDERS
+
+
+def count_fields(details, skills):
+    """Number of schema fields that came back with a real value"""
+    found = 0
+    for group in ('personal_info', 'professional_info', 'education'):
+        for value in details.get(group, {}).values():
+            if isinstance(value, str) and value.strip() not in PLACEHOLDERS:
+                found += 1
+    for values in details.get('technical_skills', {}).values():
+        found += len(values)
+    return found + len(skills)
+
+
+def measure(client, prompt_text):
+    with contextlib.redirect_stdout(io.StringIO()):
+        details = client.enhanced_fallback_analysis(prompt_text)
+        skills = client.advanced_fallback_skills(prompt_text)
+    return count_fields(details, skills)
+
+
+def compare(client, text):
+    counter = client.compactor.counter
+    truncated = (text[:3500], text[:4000])
+    compacted = (client.compactor.compact_for_skills(text), client.compactor.compact_for_details(text))
+    return {
+        'cv_tokens': counter.count(text),
+        'truncated_tokens': sum(counter.count(t) for t in truncated),
+        'compacted_tokens': sum(counter.count(t) for t in compacted),
+        'full_text_fields': measure(client, text),
+        'truncated_fields': measure(client, truncated[1]) + len(client.advanced_fallback_skills(truncated[0])),
+        'compacted_fields': measure(client, compacted[1]) + len(client.advanced_fallback_skills(compacted[0])),
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('folder', nargs='?', default='static/uploads')
+    arg_parser.add_argument('--json', help='write per-CV rows and totals to this file')
+    args = arg_parser.parse_args(argv)
+
+    parser = CVParser()
+    cleaner = TextCleaner()
+    client = OpenAIClient()
+
+    rows = []
+    for name in sorted(os.listdir(args.folder)):
+        path = os.path.join(args.folder, name)
+        if os.path.splitext(name)[1].lower() not in ('.pdf', '.docx', '.doc', '.txt'):
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            text = cleaner.clean_text(parser.parse_cv(path))
+            row = compare(client, text)
+        row['file'] = name
+        rows.append(row)
+        print(f"{name:40} tokens {row['truncated_tokens']:>6} -> {row['compacted_tokens']:>6}   "
+              f"fields {row['truncated_fields']:>3} -> {row['compacted_fields']:>3} (full text {row['full_text_fields']})")
+
+    totals = {key: sum(row[key] for row in rows) for key in rows[0] if key != 'file'} if rows else {}
+    print(f"TOTAL {json.dumps(totals)}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rows': rows, 'totals': totals}, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,377 @@
+"""End-to-end load test of the web app with a synthetic LLM and CV corpus.
+
+    python -m benchmarks.load_test [--server flask|gunicorn] [--workers 2] [--duration 30]
+                                   [--rate 20] [--concurrency 16]
+                                   [--mix upload=1,analyze=1,search=6,profile=2] [--json out.json]
+
+Starts the app on a free local port with LLM_PROVIDER=synthetic and a
+throw-away CV_DATABASE_DIR, generates PDF/DOCX/TXT CVs
+(benchmarks.synthetic_cvs), seeds the
+database, then drives /upload, /api/analyze_cv, /search and
+/candidate_profile traffic in the given proportions.
+
+`--rate` is the total request rate (open loop: arrivals are scheduled and
+latency is measured from the scheduled time, so queueing shows up in the
+tail); `--rate 0` runs closed loop, each of `--concurrency` users sending
+its next request as soon as the last one returns. The report has
+throughput, p50/p95/p99 latency and error rate per operation, plus the
+resident memory of the server and its workers, sampled from /proc.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.synthetic_cvs import JOBS, synthetic_corpus
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = "upload=1,analyze=1,search=6,profile=2"
+
+
+# ---------------------------------------------------------------- server
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, workers, env):
+    if kind == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '--threads', '4',
+                   '-b', f'127.0.0.1:{port}', '--timeout', '300', 'app:app']
+    else:
+        command = [sys.executable, '-c',
+                   f"import app; app.init_upload_folder(); app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_ready(base_url, process, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if requests.get(base_url + '/debug/cv_count', timeout=5).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("Server did not become ready")
+
+
+def process_tree(pid):
+    """pid plus all its descendants, from /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def rss_bytes(pid):
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class MemorySampler(threading.Thread):
+    """Samples RSS of the server process tree once per `interval` seconds"""
+
+    def __init__(self, pid, interval=1.0):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = {}
+        self.last = {}
+        self.peak_total = 0
+        self.stopped = threading.Event()
+
+    def sample(self):
+        total = 0
+        for pid in process_tree(self.pid):
+            rss = rss_bytes(pid)
+            if rss is None:
+                continue
+            self.last[pid] = rss
+            self.peak[pid] = max(rss, self.peak.get(pid, 0))
+            total += rss
+        self.peak_total = max(self.peak_total, total)
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.sample()
+            self.stopped.wait(self.interval)
+
+    def report(self):
+        mb = 1024 * 1024
+        return {
+            'peak_total_mb': round(self.peak_total / mb, 1),
+            'processes': {str(pid): {'peak_mb': round(self.peak[pid] / mb, 1), 'last_mb': round(self.last[pid] / mb, 1)}
+                          for pid in sorted(self.peak)},
+        }
+
+
+# ---------------------------------------------------------------- traffic
+
+class LoadClient:
+    """One operation per call; each thread keeps its own cookie session for /candidate_profile"""
+
+    def __init__(self, base_url, corpus, seed=11):
+        self.base_url = base_url
+        self.corpus = corpus
+        self.local = threading.local()
+        self.counter = itertools.count()
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+
+    def session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+            self.local.results = 0
+        return self.local.session
+
+    def pick(self, items):
+        with self.random_lock:
+            return self.random.choice(items)
+
+    def upload(self):
+        filename, data, name = self.corpus[next(self.counter) % len(self.corpus)]
+        return self.session().post(self.base_url + '/upload', data={'name': name},
+                                   files={'cv_file': (filename, data)}, timeout=300)
+
+    def analyze(self):
+        filename, data, _ = self.corpus[next(self.counter) % len(self.corpus)]
+        return self.session().post(self.base_url + '/api/analyze_cv', files={'file': (filename, data)}, timeout=300)
+
+    def search(self):
+        response = self.session().post(self.base_url + '/search', data={'job_description': self.pick(JOBS)}, timeout=120)
+        self.local.results = len(re.findall(r'class="view-profile"', response.text)) if response.ok else 0
+        return response
+
+    def profile(self):
+        session = self.session()
+        if not self.local.results:
+            # The profile page reads the last search from the session cookie
+            self.search()
+        index = self.pick(range(max(1, self.local.results)))
+        return session.get(self.base_url + '/candidate_profile', params={'index': index}, timeout=60)
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(','):
+        operation, _, weight = part.partition('=')
+        mix[operation.strip()] = float(weight or 1)
+    unknown = set(mix) - {'upload', 'analyze', 'search', 'profile'}
+    if unknown:
+        raise ValueError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+    return {operation: weight for operation, weight in mix.items() if weight > 0}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    # Nearest rank
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, operation, latency, ok, status):
+        with self.lock:
+            self.samples.setdefault(operation, []).append((latency, ok, status))
+
+    def report(self, elapsed):
+        operations = {}
+        for operation, samples in sorted(self.samples.items()):
+            latencies = sorted(latency for latency, _, _ in samples)
+            errors = sum(1 for _, ok, _ in samples if not ok)
+            statuses = {}
+            for _, _, status in samples:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            operations[operation] = {
+                'requests': len(samples),
+                'errors': errors,
+                'error_rate': round(errors / len(samples), 4),
+                'throughput_rps': round(len(samples) / elapsed, 2),
+                'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+                'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+                'mean_ms': round(sum(latencies) / len(latencies) * 1000, 1),
+                'statuses': statuses,
+            }
+        total = sum(op['requests'] for op in operations.values())
+        errors = sum(op['errors'] for op in operations.values())
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'requests': total,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+            'error_rate': round(errors / total, 4) if total else 0,
+            'operations': operations,
+        }
+
+
+def run_operation(client, recorder, operation, scheduled):
+    ok, status = False, 'exception'
+    try:
+        response = getattr(client, operation)()
+        status = response.status_code
+        ok = response.ok and not (operation == 'analyze' and 'error' in response.json())
+    except Exception as e:
+        status = type(e).__name__
+    recorder.record(operation, time.perf_counter() - scheduled, ok, status)
+
+
+def drive(client, mix, duration, rate, concurrency, seed=3):
+    recorder = Recorder()
+    rnd = random.Random(seed)
+    operations, weights = list(mix), list(mix.values())
+    started = time.perf_counter()
+    deadline = started + duration
+
+    if rate > 0:
+        # Open loop: Poisson arrivals at `rate`, however slow the server gets
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            scheduled = started
+            while scheduled < deadline:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(run_operation, client, recorder, rnd.choices(operations, weights)[0], scheduled)
+                scheduled += rnd.expovariate(rate)
+    else:
+        def user(user_seed):
+            user_random = random.Random(user_seed)
+            while time.perf_counter() < deadline:
+                run_operation(client, recorder, user_random.choices(operations, weights)[0], time.perf_counter())
+        threads = [threading.Thread(target=user, args=(seed + i,)) for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return recorder.report(time.perf_counter() - started)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--server', choices=('flask', 'gunicorn'), default='flask')
+    arg_parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    arg_parser.add_argument('--url', help='load an already running server instead of starting one')
+    arg_parser.add_argument('--duration', type=float, default=30, help='seconds of mixed traffic')
+    arg_parser.add_argument('--rate', type=float, default=20, help='requests/second in total; 0 = closed loop')
+    arg_parser.add_argument('--concurrency', type=int, default=16, help='client threads')
+    arg_parser.add_argument('--mix', default=DEFAULT_MIX, help=f'operation weights (default {DEFAULT_MIX})')
+    arg_parser.add_argument('--corpus', type=int, default=60, help='synthetic CV files to generate')
+    arg_parser.add_argument('--seed-uploads', type=int, default=30, help='CVs stored before the run starts')
+    arg_parser.add_argument('--llm-latency', default='lognormal:200:0.5', help='LLM_SYNTHETIC_LATENCY for the server')
+    arg_parser.add_argument('--json', help='write the report to this file')
+    args = arg_parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    corpus = synthetic_corpus(args.corpus)
+    database_dir = None
+    server = None
+    sampler = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            database_dir = tempfile.mkdtemp(prefix='load-test-db-')
+            env = dict(os.environ, LLM_PROVIDER='synthetic', LLM_SYNTHETIC_LATENCY=args.llm_latency,
+                       CV_DATABASE_DIR=database_dir, LLM_TOKENS_PER_MINUTE='0')
+            port = free_port()
+            base_url = f'http://127.0.0.1:{port}'
+            print(f"🚀 Starting {args.server} on {base_url} (database in {database_dir})")
+            server = start_server(args.server, port, args.workers, env)
+            wait_until_ready(base_url, server)
+            sampler = MemorySampler(server.pid)
+            sampler.start()
+
+        client = LoadClient(base_url, corpus)
+        print(f"🌱 Seeding {args.seed_uploads} CVs")
+        seeded = 0
+        for _ in range(args.seed_uploads):
+            try:
+                seeded += client.upload().ok
+            except requests.RequestException as e:
+                print(f"⚠️ Seed upload failed: {e}")
+        print(f"🔥 {args.duration:.0f}s of traffic, mix {mix}, {'closed loop' if args.rate <= 0 else f'{args.rate} req/s'}")
+        report = drive(client, mix, args.duration, args.rate, args.concurrency)
+    finally:
+        if sampler:
+            sampler.sample()
+            sampler.stopped.set()
+        if server:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        if database_dir:
+            shutil.rmtree(database_dir, ignore_errors=True)
+
+    report = {
+        'commit': git_commit(),
+        'config': {'server': 'external' if args.url else args.server, 'workers': args.workers, 'duration_s': args.duration,
+                   'rate': args.rate, 'concurrency': args.concurrency, 'mix': mix, 'corpus': args.corpus,
+                   'seeded': seeded, 'llm_latency': args.llm_latency},
+        **report,
+        'memory': sampler.report() if sampler else None,
+    }
+    for operation, stats in report['operations'].items():
+        print(f"📈 {operation:8s} {stats['requests']:6d} req  {stats['throughput_rps']:7.2f}/s  "
+              f"p50 {stats['p50_ms']:8.1f}  p95 {stats['p95_ms']:8.1f}  p99 {stats['p99_ms']:8.1f} ms  "
+              f"errors {stats['error_rate']:.1%}")
+    if report['memory']:
+        print(f"🧠 Peak server RSS {report['memory']['peak_total_mb']} MB")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""Micro-benchmarks of the ingestion and search hot paths, with scaling curves.
+
+    python -m benchmarks.micro [--sizes 100,1000,10000,100000] [--components parse,clean,...]
+                               [--json out.json] [--compare baseline.json] [--threshold 0.15]
+
+Components, each run at every corpus size N over the first N CVs from
+benchmarks.synthetic_cvs:
+
+    parse      CVParser.parse_cv over N files per format (pdf, docx, txt), also split by CV size
+    clean      TextCleaner.clean_text over N extracted texts
+    extract    OpenAIClient.advanced_fallback_skills and enhanced_fallback_analysis over N texts
+    store      ChromaDB.add_cv per call, with the collection already holding N CVs
+    search     ChromaDB.search_similar with N CVs stored: first query (index fit) and warm queries
+
+The Chroma components run against a temporary CV_DATABASE_DIR, filled
+with restore_cvs in batches. Every result records its per-operation time.
+parse/clean/extract cost per CV, not per corpus; --per-cv-cap times at
+most that many CVs per size (PDF parsing of 100,000 CVs takes hours).
+
+--compare checks this run's per-op times against a saved report. Any
+component/size more than --threshold slower is flagged, and the exit
+status is 1. `--compare baseline.json --current other.json` compares two
+saved reports without running anything.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_cvs import FORMATS, JOBS, MAKERS, SIZE_CYCLE, cv
+
+COMPONENTS = ('parse', 'clean', 'extract', 'store', 'search')
+DEFAULT_SIZES = '100,1000,10000,100000'
+STORE_BATCH = 500
+
+
+@contextlib.contextmanager
+def quiet():
+    """The components log per call with print(); keep that out of the timings"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def timed(function, items):
+    """(total seconds, per-item seconds) of function(item) over items"""
+    per_item = []
+    with quiet():
+        started = time.perf_counter()
+        for item in items:
+            item_started = time.perf_counter()
+            function(item)
+            per_item.append(time.perf_counter() - item_started)
+        total = time.perf_counter() - started
+    return total, per_item
+
+
+def summary(total, per_item):
+    ordered = sorted(per_item)
+    return {
+        'ops': len(per_item),
+        'total_s': round(total, 4),
+        'per_op_us': round(total / len(per_item) * 1e6, 2),
+        'p50_us': round(ordered[len(ordered) // 2] * 1e6, 2),
+        'p95_us': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e6, 2),
+    }
+
+
+def raw_texts(size):
+    return ['\n'.join(cv(i)[1]) for i in range(size)]
+
+
+def bench_parse(size, workdir):
+    from src.utils.file_parser import CVParser
+    parser = CVParser()
+    results = {}
+    for fmt in FORMATS:
+        directory = os.path.join(workdir, f"parse_{fmt}")
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for i in range(size):
+            path = os.path.join(directory, f"cv_{i:06d}.{fmt}")
+            if not os.path.exists(path):
+                with open(path, 'wb') as f:
+                    f.write(MAKERS[fmt](cv(i)[1]))
+            paths.append(path)
+        total, per_item = timed(parser.parse_cv, paths)
+        results[f"parse.{fmt}"] = summary(total, per_item)
+        # CV i has size class SIZE_CYCLE[i % 3]
+        for offset, size_class in enumerate(SIZE_CYCLE):
+            chunk = per_item[offset::len(SIZE_CYCLE)]
+            if chunk:
+                results[f"parse.{fmt}.{size_class}"] = summary(sum(chunk), chunk)
+    return results
+
+
+def bench_clean(size, workdir):
+    from src.utils.text_cleaner import TextCleaner
+    cleaner = TextCleaner()
+    return {'clean': summary(*timed(cleaner.clean_text, raw_texts(size)))}
+
+
+def bench_extract(size, workdir):
+    from src.llm.openai_client import OpenAIClient
+    from src.utils.text_cleaner import TextCleaner
+    with quiet():
+        client = OpenAIClient()
+    texts = [TextCleaner().clean_text(text) for text in raw_texts(size)]
+    return {
+        'extract.skills': summary(*timed(client.advanced_fallback_skills, texts)),
+        'extract.details': summary(*timed(client.enhanced_fallback_analysis, texts)),
+    }
+
+
+class ChromaCorpus:
+    """A temporary ChromaDB grown to each requested size in turn"""
+
+    def __init__(self):
+        from src.database.chroma_db import ChromaDB
+        with quiet():
+            self.db = ChromaDB()
+        self.loaded = 0
+
+    def metadata(self, i):
+        name, lines = cv(i)
+        return {'candidate_name': name, 'email': lines[1].split(': ', 1)[1], 'location': lines[3],
+                'skills': lines[-1], 'experience_years': float(lines[6].split(' with ')[1].split()[0]),
+                'raw_text': '\n'.join(lines[:20])}
+
+    def grow_to(self, size):
+        with quiet():
+            while self.loaded < size:
+                ids = [f"bench-{i:07d}" for i in range(self.loaded, min(size, self.loaded + STORE_BATCH))]
+                indexes = range(self.loaded, self.loaded + len(ids))
+                self.db.restore_cvs(ids, ['\n'.join(cv(i)[1]) for i in indexes], [self.metadata(i) for i in indexes])
+                self.loaded += len(ids)
+            self.db.rebuild_indexes()
+
+    def settle(self):
+        # A background refit from startup must not overlap the timed queries
+        while self.db.search_index.rebuilding:
+            time.sleep(0.05)
+
+
+def bench_store(size, workdir, corpus, ops=100):
+    corpus.grow_to(size)
+    added = []
+
+    def add(i):
+        added.append(corpus.db.add_cv('\n'.join(cv(i)[1]), corpus.metadata(i)))
+    result = summary(*timed(add, range(10_000_000, 10_000_000 + ops)))
+    # Keep the corpus at exactly `size` for the next component
+    with quiet():
+        for cv_id in added:
+            corpus.db.delete_cv(cv_id)
+    return {'store.add_cv': result}
+
+
+def bench_search(size, workdir, corpus, queries=25):
+    corpus.grow_to(size)
+    corpus.settle()
+    corpus.db.search_index.invalidate()
+    cold = timed(lambda query: corpus.db.search_similar(query, 5), JOBS[:1])
+    warm = timed(lambda query: corpus.db.search_similar(query, 5), [JOBS[i % len(JOBS)] for i in range(queries)])
+    return {'search.first_query': summary(*cold), 'search.warm': summary(*warm)}
+
+
+def run(sizes, components, per_cv_cap=0):
+    workdir = tempfile.mkdtemp(prefix='micro-bench-')
+    # config reads CV_DATABASE_DIR at import time, so set it before any src module is imported
+    os.environ['CV_DATABASE_DIR'] = os.path.join(workdir, 'cv_database')
+    results = {}
+    corpus = None
+    try:
+        for size in sizes:
+            print(f"📏 N = {size}")
+            for component in components:
+                if component in ('store', 'search'):
+                    corpus = corpus or ChromaCorpus()
+                    measured = globals()[f"bench_{component}"](size, workdir, corpus)
+                else:
+                    measured = globals()[f"bench_{component}"](min(size, per_cv_cap) if per_cv_cap else size, workdir)
+                for name, stats in measured.items():
+                    results.setdefault(name, {})[str(size)] = stats
+                    print(f"   {name:24s} {stats['per_op_us']:12.1f} µs/op  (p95 {stats['p95_us']:.1f})")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(baseline, current, threshold):
+    """[(name, size, baseline µs, current µs, ratio)] of regressions beyond the threshold"""
+    regressions = []
+    for name, by_size in sorted(current['results'].items()):
+        for size, stats in sorted(by_size.items(), key=lambda item: int(item[0])):
+            before = baseline['results'].get(name, {}).get(size)
+            if not before or not before['per_op_us']:
+                continue
+            ratio = stats['per_op_us'] / before['per_op_us']
+            flag = '❌' if ratio > 1 + threshold else ('✅' if ratio < 1 - threshold else '  ')
+            print(f"{flag} {name:24s} N={size:>6s} {before['per_op_us']:12.1f} → {stats['per_op_us']:12.1f} µs/op ({ratio:.2f}x)")
+            if ratio > 1 + threshold:
+                regressions.append((name, size, before['per_op_us'], stats['per_op_us'], round(ratio, 3)))
+    return regressions
+
+
+def environment():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                         stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'timestamp': time.time()}
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f'corpus sizes (default {DEFAULT_SIZES})')
+    arg_parser.add_argument('--components', default=','.join(COMPONENTS), help='subset of ' + ','.join(COMPONENTS))
+    arg_parser.add_argument('--per-cv-cap', type=int, default=0, help='at most this many CVs for parse/clean/extract')
+    arg_parser.add_argument('--json', help='write the report to this file')
+    arg_parser.add_argument('--compare', help='baseline report to check for regressions')
+    arg_parser.add_argument('--current', help='with --compare: a saved report instead of a fresh run')
+    arg_parser.add_argument('--threshold', type=float, default=0.15, help='allowed slowdown, as a fraction')
+    args = arg_parser.parse_args(argv)
+
+    if args.current:
+        with open(args.current, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    else:
+        components = [c.strip() for c in args.components.split(',') if c.strip()]
+        unknown = set(components) - set(COMPONENTS)
+        if unknown:
+            arg_parser.error(f"unknown components: {', '.join(sorted(unknown))}")
+        sizes = [int(size) for size in args.sizes.split(',')]
+        report = {'environment': environment(), 'sizes': sizes, 'per_cv_cap': args.per_cv_cap,
+                  'results': run(sizes, components, args.per_cv_cap)}
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            return 1
+        print(f"✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Memory of N candidates as stringified metadata dicts vs CandidateRecord objects.
+
+    python -m benchmarks.record_memory [--count 100000]
+"""
+import argparse
+import json
+import random
+import sys
+import tracemalloc
+
+from src.database.candidate_record import CandidateRecord
+
+SKILL_POOL = ['Python', 'Java', 'JavaScript', 'Database', 'Cloud', 'Mobile', 'AI/ML', 'Web', 'Tools',
+              'Data Analysis', 'Docker', 'Kubernetes', 'React', 'Django', 'AWS', 'Azure']
+ROLES = ['Software Engineer', 'Data Analyst', 'Backend Developer', 'Graphic Designer', 'Project Manager']
+CITIES = ['Lahore, Pakistan', 'London, UK', 'Berlin, Germany', 'Austin, USA', 'Location in CV']
+
+
+def synthetic_metadata(i, rng):
+    """Metadata as ChromaDB.add_cv stores it (every value a string)"""
+    skills = rng.sample(SKILL_POOL, rng.randint(3, 9))
+    return {
+        'candidate_name': f"Candidate {i}",
+        'skills': ', '.join(skills),
+        'email': f"candidate{i}@example.com" if rng.random() > 0.2 else 'Email in CV',
+        'phone': f"+1555{i:07d}",
+        'location': rng.choice(CITIES),
+        'current_role': rng.choice(ROLES),
+        'experience': f"{rng.randint(0, 25)} years" if rng.random() > 0.3 else 'Experience in CV',
+        'current_company': 'Company in CV',
+        'graduation_year': str(rng.randint(1990, 2024)),
+        'programming_languages': ', '.join(skills[:2]),
+        'frameworks': ', '.join(skills[2:4]),
+        'databases': '',
+        'cloud_platforms': ', '.join(skills[4:5]),
+        'blob_id': f"{i:064x}",
+    }
+
+
+def measure(build):
+    tracemalloc.start()
+    objects = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, current
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--count', type=int, default=100000)
+    args = arg_parser.parse_args(argv)
+
+    rng = random.Random(0)
+    # Serialised form stands in for what Chroma hands back; both sides are decoded from it
+    raw = [json.dumps(synthetic_metadata(i, rng)) for i in range(args.count)]
+
+    _, dict_bytes = measure(lambda: [json.loads(item) for item in raw])
+    _, record_bytes = measure(lambda: [CandidateRecord.from_metadata(str(i), json.loads(item))
+                                       for i, item in enumerate(raw)])
+    print(json.dumps({
+        'count': args.count,
+        'metadata_dict_bytes': dict_bytes,
+        'candidate_record_bytes': record_bytes,
+        'ratio': round(record_bytes / dict_bytes, 3) if dict_bytes else None,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Bytes read and peak Python memory per search: full-record reads vs lightweight metadata + blobs.
+
+    python -m benchmarks.search_footprint [--json out.json] [--chunk-rows 4096]
+
+"before" replays the read the search used to do: every document and
+every metadata dict with the heavy fields inline (re-hydrated from the
+blobs for migrated records). "after" is the current read: documents
+only, then lightweight metadata for the top 5 winners.
+
+"scoring" compares peak memory of one query scored in a single product
+with scoring in chunks of --chunk-rows (SEARCH_CHUNK_ROWS). "fit" compares
+fitting the index from one read of every document with fitting from pages.
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from src.database.chroma_db import ChromaDB, SIMILARITY_THRESHOLD
+from src.database.search_index import SearchIndex
+
+QUERY = "Senior Python developer with Flask, PostgreSQL and AWS"
+
+
+def payload_bytes(result):
+    total = 0
+    for key in ('documents', 'metadatas'):
+        for item in result.get(key) or []:
+            total += len(json.dumps(item, ensure_ascii=False).encode('utf-8'))
+    return total
+
+
+def measure(read, count_bytes=True):
+    tracemalloc.start()
+    started = time.perf_counter()
+    results = read()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    measured = {'peak_memory_bytes': peak, 'seconds': round(elapsed, 4)}
+    if count_bytes:
+        measured['bytes_read'] = sum(payload_bytes(result) for result in results)
+    return measured
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--json', help='write the report to this file')
+    arg_parser.add_argument('--chunk-rows', type=int, default=4096, help='rows per chunk for chunked scoring and paged fits')
+    args = arg_parser.parse_args(argv)
+
+    db = ChromaDB()
+    light = db.collection.get(include=['metadatas'])
+    hydrated = [dict(metadata, **db.load_blob_fields(metadata)) for metadata in light['metadatas']]
+
+    def before():
+        everything = db.collection.get(include=['documents', 'metadatas'])
+        everything['metadatas'] = [dict(metadata, **db.load_blob_fields(metadata))
+                                   for metadata in everything['metadatas']]
+        return [everything]
+
+    def after():
+        documents = db.collection.get(include=['documents'])
+        return [documents, {'metadatas': db.get_metadatas(documents['ids'][:5])}]
+
+    blob_ids = {metadata['blob_id'] for metadata in light['metadatas'] if metadata.get('blob_id')}
+    report = {
+        'cvs': len(light['ids']),
+        'metadata_bytes_inline': payload_bytes({'metadatas': hydrated}),
+        'metadata_bytes_light': payload_bytes(light),
+        'blob_bytes_on_disk': sum(db.blobs.size(blob_id) for blob_id in blob_ids),
+        'before': measure(before),
+        'after': measure(after),
+    }
+
+    index = db.search_index.get()
+    report['scoring'] = {
+        'single_product': measure(lambda: index.top_k([QUERY], 200, SIMILARITY_THRESHOLD, chunk_rows=0), False),
+        'chunked': measure(lambda: index.top_k([QUERY], 200, SIMILARITY_THRESHOLD, chunk_rows=args.chunk_rows), False),
+    }
+
+    def pages():
+        for page in db.iter_pages(batch_size=args.chunk_rows, include=('documents',)):
+            yield page['ids'], page['documents']
+    report['fit'] = {
+        'one_read': measure(lambda: SearchIndex.fit(*db._load_corpus()), False),
+        'paged': measure(lambda: SearchIndex.fit_pages(pages), False),
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
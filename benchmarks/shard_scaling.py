@@ -0,0 +1,72 @@
+"""Search latency against shard count on a synthetic corpus.
+
+    python -m benchmarks.shard_scaling [--cvs 200000] [--shards 1,2,4,8] [--json out.json]
+
+Fits one SearchIndex per shard count over the same generated documents
+and times top-k scoring of a fixed set of queries. On a large corpus
+latency should fall close to linearly with shards up to the number of
+cores (SEARCH_SHARD_WORKERS threads).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from src.database.search_index import SearchIndex
+
+VOCABULARY = ("python java javascript typescript flask django react angular node aws azure gcp docker kubernetes "
+              "terraform sql postgresql mysql mongodb redis kafka spark hadoop pandas numpy tensorflow pytorch "
+              "machine learning data science backend frontend devops engineer developer analyst manager lead "
+              "senior junior agile scrum microservices api rest graphql linux git ci cd testing security").split()
+
+QUERIES = [
+    "Senior Python developer with Flask, AWS and PostgreSQL",
+    "Data scientist with machine learning, pandas and TensorFlow",
+    "DevOps engineer: Kubernetes, Terraform, Docker, CI/CD on Azure",
+    "Frontend developer React TypeScript GraphQL",
+]
+
+
+def synthetic_corpus(count, seed=7):
+    rnd = random.Random(seed)
+    ids = [f"cv-{i:07d}" for i in range(count)]
+    documents = [' '.join(rnd.choices(VOCABULARY, k=rnd.randint(60, 160))) for _ in ids]
+    return ids, documents
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--cvs', type=int, default=200000)
+    arg_parser.add_argument('--shards', default='1,2,4,8', help='comma-separated shard counts')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--json', help='write the report to this file')
+    args = arg_parser.parse_args(argv)
+
+    ids, documents = synthetic_corpus(args.cvs)
+    report = {'cvs': args.cvs, 'cpus': os.cpu_count(), 'runs': []}
+    baseline = None
+    for shards in [int(n) for n in args.shards.split(',')]:
+        index = SearchIndex.fit(ids, documents, shards=shards)
+        index.top_k(QUERIES[:1], 10, 0.15)  # warm the thread pool
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for query in QUERIES:
+                index.top_k([query], 200, 0.15)
+            timings.append((time.perf_counter() - started) / len(QUERIES))
+        latency_ms = sorted(timings)[len(timings) // 2] * 1000
+        baseline = baseline or latency_ms
+        report['runs'].append({'shards': shards, 'median_query_ms': round(latency_ms, 2),
+                               'speedup': round(baseline / latency_ms, 2)})
+        print(f"🧩 {shards} shard(s): {latency_ms:.1f} ms/query ({baseline / latency_ms:.2f}x)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Deterministic synthetic CVs in PDF, DOCX and TXT for the benchmarks.
+
+CV `i` depends only on (seed, i, size), so a corpus of 1,000 is the first
+1,000 CVs of a corpus of 100,000 and runs are comparable across machines
+and commits. The PDF and DOCX writers are minimal hand-built files that
+pdfplumber/PyPDF2 and docx2txt read, so no extra packages are needed.
+"""
+import io
+import random
+import zipfile
+
+FIRST_NAMES = ["Ava", "Noah", "Mia", "Liam", "Zara", "Omar", "Sara", "Ali", "Grace", "Elijah"]
+LAST_NAMES = ["Khan", "Taylor", "Brown", "Jackson", "Torres", "Ahmed", "Duncan", "Johnson"]
+ROLES = ["Senior Software Engineer", "Data Analyst", "Backend Developer", "DevOps Engineer", "Frontend Developer"]
+SKILLS = ["Python", "Django", "Flask", "Java", "Spring", "JavaScript", "React", "Angular", "Node.js", "MySQL",
+          "PostgreSQL", "MongoDB", "Redis", "AWS", "Azure", "Docker", "Kubernetes", "Jenkins", "Git", "Linux",
+          "machine learning", "TensorFlow", "pandas", "REST API", "GraphQL", "Tableau"]
+CITIES = ["Lahore, Pakistan", "London, UK", "Berlin, Germany", "Austin, USA", "Dubai, UAE"]
+JOBS = [
+    "Senior Python developer with Flask, PostgreSQL and AWS",
+    "Data analyst with pandas, SQL and Tableau",
+    "DevOps engineer: Docker, Kubernetes, Jenkins, Linux",
+    "Frontend developer with React and JavaScript",
+    "Java Spring backend engineer with MySQL",
+]
+# (jobs, bullets per job) by CV size class
+SIZES = {'small': (1, 2), 'medium': (3, 4), 'large': (8, 7)}
+SIZE_CYCLE = ('small', 'medium', 'large')
+FORMATS = ('pdf', 'docx', 'txt')
+PDF_LINES_PER_PAGE = 55
+
+
+def cv_lines(rnd, size='medium'):
+    """(candidate name, lines) of one CV"""
+    jobs, bullets = SIZES[size]
+    name = f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}"
+    lines = [name, f"Email: {name.lower().replace(' ', '.')}@gmail.com",
+             f"Phone: +1 555 {rnd.randint(100, 999)} {rnd.randint(1000, 9999)}", rnd.choice(CITIES), "",
+             "SUMMARY", f"{rnd.choice(ROLES)} with {rnd.randint(1, 20)} years of experience.", "", "EXPERIENCE"]
+    for _ in range(jobs):
+        lines.append(f"{rnd.choice(ROLES)} at Company {rnd.randint(1, 99)} Ltd ({rnd.randint(2005, 2024)})")
+        for _ in range(bullets):
+            lines.append(f"Developed {' and '.join(rnd.sample(SKILLS, 3))} services for {rnd.randint(2, 90)} clients")
+    lines += ["", "EDUCATION", f"Bachelor of Science in Computer Science, University of Lahore, {rnd.randint(1995, 2023)}",
+              "", "SKILLS", ', '.join(rnd.sample(SKILLS, 10))]
+    return name, lines
+
+
+def cv(i, size=None, seed=7):
+    """CV number `i` as (name, lines); `size` defaults to cycling small/medium/large"""
+    size = size or SIZE_CYCLE[i % len(SIZE_CYCLE)]
+    return cv_lines(random.Random(seed * 1_000_003 + i), size)
+
+
+def make_txt(lines):
+    return '\n'.join(lines).encode('utf-8')
+
+
+def make_docx(lines):
+    """Smallest DOCX docx2txt can read: one paragraph per line"""
+    paragraphs = ''.join(
+        f"<w:p><w:r><w:t>{line.replace('&', '&amp;').replace('<', '&lt;')}</w:t></w:r></w:p>" for line in lines)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr('[Content_Types].xml',
+                      '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                      '<Default Extension="xml" ContentType="application/xml"/>'
+                      '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+        docx.writestr('word/document.xml',
+                      '<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                      f'<w:body>{paragraphs}</w:body></w:document>')
+    return buffer.getvalue()
+
+
+def make_pdf(lines):
+    """PDF with the lines as Helvetica text, PDF_LINES_PER_PAGE per page, built by hand"""
+    def escape(line):
+        return line.encode('latin-1', 'replace').decode('latin-1').replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    pages = [lines[start:start + PDF_LINES_PER_PAGE] for start in range(0, len(lines), PDF_LINES_PER_PAGE)] or [[]]
+    # Objects: 1 catalog, 2 page tree, 3 font, then a (page, contents) pair per page
+    page_numbers = [4 + 2 * i for i in range(len(pages))]
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{n} 0 R' for n in page_numbers)}] /Count {len(pages)} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for number, page in zip(page_numbers, pages):
+        content = "BT /F1 10 Tf 50 760 Td 13 TL " + ' '.join(f"({escape(line)}) Tj T*" for line in page) + " ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {number + 1} 0 R >>")
+        objects.append(f"<< /Length {len(content.encode('latin-1'))} >>\nstream\n{content}\nendstream")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    pdf += ''.join(f"{offset:010d} 00000 n \n" for offset in offsets).encode('latin-1')
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    return bytes(pdf)
+
+
+MAKERS = {'pdf': make_pdf, 'docx': make_docx, 'txt': make_txt}
+
+
+def cv_file(i, fmt=None, size=None, seed=7):
+    """(filename, bytes, candidate name) of CV `i`; `fmt` defaults to cycling PDF/DOCX/TXT"""
+    fmt = fmt or FORMATS[i % len(FORMATS)]
+    name, lines = cv(i, size, seed)
+    return f"cv_{i:06d}.{fmt}", MAKERS[fmt](lines), name
+
+
+def synthetic_corpus(count, seed=7):
+    """[(filename, bytes, candidate name)] for CVs 0..count-1"""
+    return [cv_file(i, seed=seed) for i in range(count)]
@@ -0,0 +1,104 @@
+"""Per-CV CPU time of the local text analysis, shared document vs. per-consumer.
+
+    python -m benchmarks.text_analysis [--cvs 300] [--json out.json]
+
+Runs the non-LLM ingestion work on synthetic CVs: cleaning, the regex
+fallback extractors, the education/summary/preview formatters, prompt
+compaction and saved-search vectorising. "separate" hands every consumer
+the cleaned string, so each one re-splits, re-lowercases and re-scans it
+(the behaviour before AnalyzedDocument); "shared" analyses each CV once
+and passes the document around, as AIMatcher now does.
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+
+from src.core.ai_matcher import AIMatcher
+from src.core.saved_searches import SavedSearchStore
+from src.llm.openai_client import OpenAIClient
+from src.utils.text_analysis import analyze_text
+from src.utils.text_cleaner import TextCleaner
+
+SKILLS = ("Python Django Flask pandas Java Spring Boot JavaScript TypeScript React Angular Node.js MySQL "
+          "PostgreSQL MongoDB Redis AWS Azure Google Cloud Docker Kubernetes Jenkins Git Linux Jira "
+          "machine learning TensorFlow C++ C# Go Swift Kotlin REST API GraphQL Tableau Excel").split(' ')
+ROLES = ["Senior Software Engineer", "Data Analyst", "Backend Developer", "DevOps Engineer", "Project Manager"]
+VERBS = ["Developed", "Led", "Built", "Implemented", "Managed", "Designed", "Migrated"]
+
+
+def synthetic_cv(rnd):
+    lines = [f"Candidate {rnd.randint(1, 9999)}", f"Email: person{rnd.randint(1, 9999)}@gmail.com",
+             f"Phone: +1 555 {rnd.randint(100, 999)} {rnd.randint(1000, 9999)}", "Lahore, Pakistan",
+             "", "PROFESSIONAL SUMMARY", f"{rnd.choice(ROLES)} with {rnd.randint(1, 20)} years of experience.",
+             "", "WORK EXPERIENCE"]
+    for _ in range(rnd.randint(3, 6)):
+        lines.append(f"{rnd.choice(ROLES)} at Company {rnd.randint(1, 99)} Technologies Ltd")
+        for _ in range(rnd.randint(3, 8)):
+            lines.append(f"• {rnd.choice(VERBS)} {' '.join(rnd.choices(SKILLS, k=6))} services for clients & partners")
+    lines += ["", "EDUCATION", f"Bachelor of Science in Computer Science, University {rnd.randint(1, 50)}, {rnd.randint(1995, 2023)}",
+              "", "TECHNICAL SKILLS", ', '.join(rnd.sample(SKILLS, 15))]
+    return '\n'.join(lines)
+
+
+def run(cvs, shared, client, matcher, store):
+    """CPU seconds spent on `cvs`"""
+    started = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for raw in cvs:
+            if shared:
+                document = analyze_text(raw)
+                tokens = document.tokens
+            else:
+                document = TextCleaner().clean_text(raw)
+                tokens = None
+            client.advanced_fallback_skills(document)
+            details = client.enhanced_fallback_analysis(document)
+            client._skills_prompt(document)
+            client._details_prompt(document)
+            matcher.format_education_text(details['education'], document)
+            matcher.format_summary_text('', document)
+            matcher.format_cv_preview(document)
+            if shared:
+                store.token_vectorizer.transform([tokens])
+            else:
+                store.vectorizer.transform([document])
+    return time.process_time() - started
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--cvs', type=int, default=300)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--json', help='write the report to this file')
+    args = arg_parser.parse_args(argv)
+
+    rnd = random.Random(11)
+    cvs = [synthetic_cv(rnd) for _ in range(args.cvs)]
+    client = OpenAIClient()
+    # Only the formatters are used; skip opening the database
+    matcher = AIMatcher.__new__(AIMatcher)
+
+    report = {'cvs': args.cvs, 'runs': {}}
+    with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+        store = SavedSearchStore(root)
+    for mode in ('separate', 'shared'):
+        timings = sorted(run(cvs, mode == 'shared', client, matcher, store) for _ in range(args.repeat))
+        per_cv_ms = timings[len(timings) // 2] / len(cvs) * 1000
+        report['runs'][mode] = {'cpu_ms_per_cv': round(per_cv_ms, 3)}
+        print(f"🧪 {mode}: {per_cv_ms:.3f} ms CPU per CV")
+    report['speedup'] = round(report['runs']['separate']['cpu_ms_per_cv'] / report['runs']['shared']['cpu_ms_per_cv'], 2)
+    print(f"⚡ Shared analysis is {report['speedup']:.2f}x faster per CV")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
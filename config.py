@@ -7,9 +7,71 @@ load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-# LLM provider: 'openai' (default) or 'claude'
+# LLM provider: 'openai' (default), 'claude', 'router' (failover across LLM_ROUTER_PROVIDERS),
+# or for offline runs 'stub', 'synthetic', 'record' (live provider + recording) and 'replay' (recordings only)
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
+# Per-request timeout of the live providers, in seconds
+LLM_REQUEST_TIMEOUT_S = float(os.getenv("LLM_REQUEST_TIMEOUT_S", "30"))
+# Provider router: providers in order of preference, and the circuit breaker each one gets.
+# A call is bad if it fails or takes over LLM_BREAKER_SLOW_MS; the breaker opens when the bad share
+# of the last LLM_BREAKER_WINDOW calls (at least LLM_BREAKER_MIN_CALLS) reaches LLM_BREAKER_FAILURE_RATE,
+# and lets one probe through after LLM_BREAKER_COOLDOWN_S
+LLM_ROUTER_PROVIDERS = [p.strip().lower() for p in os.getenv("LLM_ROUTER_PROVIDERS", "openai,claude").split(',') if p.strip()]
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_SLOW_MS = float(os.getenv("LLM_BREAKER_SLOW_MS", "15000"))
+LLM_BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+# Hedging: once a request has run longer than this percentile of its provider's recent latencies,
+# the same request goes to the next provider too and the first answer wins; 0 disables hedging
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "500"))
+LLM_RECORD_PROVIDER = os.getenv("LLM_RECORD_PROVIDER", "openai").lower()
+LLM_RECORDINGS_PATH = os.getenv("LLM_RECORDINGS_PATH", "llm_recordings.jsonl")
+# 'none' replays instantly, 'recorded' sleeps for each response's recorded latency
+LLM_REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "none")
+# fixed:<ms> | uniform:<lo>:<hi> | normal:<mean>:<sd> | lognormal:<median>:<sigma>
+LLM_SYNTHETIC_LATENCY = os.getenv("LLM_SYNTHETIC_LATENCY", "lognormal:800:0.5")
+LLM_SYNTHETIC_SEED = int(os.getenv("LLM_SYNTHETIC_SEED", "42"))
+# LLM rate budgets shared by all clients; 0 disables the limit
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "90000"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "3500"))
+# Batch ingestion: CVs in the LLM stage at once, and processes used for file parsing
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+CV_PARSE_WORKERS = int(os.getenv("CV_PARSE_WORKERS", str(os.cpu_count() or 2)))
+# Offline batch extraction: CVs packed per request, retries for failed items
+LLM_BATCH_CVS_PER_REQUEST = int(os.getenv("LLM_BATCH_CVS_PER_REQUEST", "5"))
+LLM_BATCH_MAX_RETRIES = int(os.getenv("LLM_BATCH_MAX_RETRIES", "2"))
+# Share of packed items the stub provider drops, to exercise retries
+LLM_STUB_FAIL_RATE = float(os.getenv("LLM_STUB_FAIL_RATE", "0"))
+# Token budgets for the CV text embedded in each extraction prompt
+LLM_SKILLS_PROMPT_TOKENS = int(os.getenv("LLM_SKILLS_PROMPT_TOKENS", "900"))
+LLM_DETAILS_PROMPT_TOKENS = int(os.getenv("LLM_DETAILS_PROMPT_TOKENS", "1000"))
+# Two-stage search: TF-IDF shortlist size, and per-stage latency budgets in milliseconds
+SEARCH_SHORTLIST_SIZE = int(os.getenv("SEARCH_SHORTLIST_SIZE", "200"))
+SEARCH_RETRIEVE_BUDGET_MS = float(os.getenv("SEARCH_RETRIEVE_BUDGET_MS", "500"))
+SEARCH_RERANK_BUDGET_MS = float(os.getenv("SEARCH_RERANK_BUDGET_MS", "150"))
+# /api/match_batch: most job descriptions per request (batches of 50-200 requisitions are expected), and the cap on top_k
+MATCH_BATCH_MAX_JOBS = int(os.getenv("MATCH_BATCH_MAX_JOBS", "200"))
+MATCH_BATCH_MAX_TOP_K = int(os.getenv("MATCH_BATCH_MAX_TOP_K", "50"))
+# Search index shards (rows partitioned by hash of CV id) and threads that score them
+SEARCH_SHARDS = int(os.getenv("SEARCH_SHARDS", "1"))
+SEARCH_SHARD_WORKERS = int(os.getenv("SEARCH_SHARD_WORKERS", str(os.cpu_count() or 2)))
+# Re-extraction of stale CVs: records per checkpointed batch, and LLM attempts per record before it is skipped
+REEXTRACT_BATCH_SIZE = int(os.getenv("REEXTRACT_BATCH_SIZE", "50"))
+REEXTRACT_MAX_ATTEMPTS = int(os.getenv("REEXTRACT_MAX_ATTEMPTS", "3"))
+# Bounded-memory search: index rows scored per chunk (split across the queries of a batch) and
+# documents read per page when fitting; 0 scores each shard in one product and fits from one read
+SEARCH_CHUNK_ROWS = int(os.getenv("SEARCH_CHUNK_ROWS", "0"))
+# Decoded candidate profiles kept in memory per process (0 disables), and seconds before an entry is reloaded
+# (0 never); the TTL bounds how stale a profile can be in a worker that did not see the write
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "512"))
+PROFILE_CACHE_TTL_S = float(os.getenv("PROFILE_CACHE_TTL_S", "300"))
 UPLOAD_FOLDER = "static/uploads"
+# Uploads up to this size are parsed from memory; larger ones spill to UPLOAD_FOLDER/<sha256>.<ext>
+UPLOAD_SPOOL_MAX_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(4 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(64 * 1024)))
+CV_DATABASE_DIR = os.getenv("CV_DATABASE_DIR", "./cv_database")
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'doc', 'txt'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024
 
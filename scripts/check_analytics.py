@@ -0,0 +1,27 @@
+"""Recount the corpus analytics from every stored CV and report any drift.
+
+    python -m scripts.check_analytics
+
+The rebuilt counts replace the stored ones. Exits with status 1 when the
+incremental counts had drifted, so it can run as a scheduled check.
+"""
+import sys
+
+from src.database.chroma_db import ChromaDB
+
+
+def main():
+    # The constructor would otherwise recount drifted totals itself, and the drift would go unreported
+    drift = ChromaDB(recount_analytics=False).rebuild_analytics()
+    for group, changes in drift.items():
+        if group == 'total':
+            print(f"⚠️ total: {changes[0]} -> {changes[1]}")
+            continue
+        for key, (before, after) in sorted(changes.items()):
+            print(f"⚠️ {group}.{key}: {before} -> {after}")
+    print("✅ Analytics consistent" if not drift else f"⚠️ Corrected drift in {', '.join(drift)}")
+    return 1 if drift else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
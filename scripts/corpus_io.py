@@ -0,0 +1,129 @@
+"""Export the CV corpus to Parquet, or restore it from an export.
+
+    python -m scripts.corpus_io export corpus.parquet [--with-documents] [--batch-size 500]
+    python -m scripts.corpus_io import corpus.parquet [--batch-size 500]
+
+Both directions stream one batch at a time (one Parquet row group per
+page of the collection), so memory stays bounded by --batch-size whatever
+the corpus size. Metadata keys become typed columns and bulky blob fields
+are inlined, so the file is directly usable from pandas/DuckDB. Restoring
+needs an export made with --with-documents; IDs are kept, and existing
+records with the same ID are overwritten. Needs `pyarrow` (in requirements.txt).
+"""
+import argparse
+import json
+import sys
+import time
+
+from src.database.chroma_db import ChromaDB
+
+# Known metadata keys and their Parquet types; anything else goes to `extra` as JSON
+METADATA_COLUMNS = {
+    'candidate_name': 'string', 'email': 'string', 'phone': 'string', 'location': 'string',
+    'current_role': 'string', 'experience': 'string', 'experience_years': 'float64',
+    'graduation_year': 'int64', 'current_company': 'string', 'skills': 'string',
+    'programming_languages': 'string', 'frameworks': 'string', 'databases': 'string',
+    'cloud_platforms': 'string', 'address': 'string', 'education': 'string', 'summary': 'string',
+    'raw_text': 'string',
+}
+# Recomputed on import
+SKIPPED_KEYS = {'blob_id'}
+
+
+def load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        print("❌ pyarrow is required: pip install pyarrow")
+        sys.exit(1)
+
+
+def export_schema(pa, with_documents):
+    fields = [pa.field('id', pa.string())]
+    if with_documents:
+        fields.append(pa.field('document', pa.string()))
+    fields += [pa.field(key, getattr(pa, kind)()) for key, kind in METADATA_COLUMNS.items()]
+    fields.append(pa.field('extra', pa.string()))
+    return pa.schema(fields)
+
+
+def _typed(value, kind):
+    if value is None:
+        return None
+    try:
+        if kind == 'float64':
+            return float(value)
+        if kind == 'int64':
+            return int(float(value))
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+def export_corpus(db, path, with_documents=False, batch_size=500):
+    pa = load_pyarrow()
+    schema = export_schema(pa, with_documents)
+    include = ('documents', 'metadatas') if with_documents else ('metadatas',)
+    exported = 0
+    with pa.parquet.ParquetWriter(path, schema, compression='zstd') as writer:
+        for page in db.iter_pages(batch_size, include):
+            columns = {name: [] for name in schema.names}
+            for i, cv_id in enumerate(page['ids']):
+                metadata = dict(page['metadatas'][i] or {})
+                metadata.update(db.load_blob_fields(metadata))
+                columns['id'].append(cv_id)
+                if with_documents:
+                    columns['document'].append(page['documents'][i])
+                for key, kind in METADATA_COLUMNS.items():
+                    columns[key].append(_typed(metadata.pop(key, None), kind))
+                extra = {key: value for key, value in metadata.items() if key not in SKIPPED_KEYS}
+                columns['extra'].append(json.dumps(extra, ensure_ascii=False) if extra else None)
+            writer.write_table(pa.table(columns, schema=schema))
+            exported += len(page['ids'])
+            print(f"📤 Exported {exported} CVs")
+    return exported
+
+
+def import_corpus(db, path, batch_size=500):
+    pa = load_pyarrow()
+    parquet_file = pa.parquet.ParquetFile(path)
+    if 'document' not in parquet_file.schema_arrow.names:
+        print("❌ This export has no documents; re-export with --with-documents to restore from it")
+        return 0
+    imported = 0
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        rows = batch.to_pylist()
+        metadatas = []
+        for row in rows:
+            metadata = {key: row.get(key) for key in METADATA_COLUMNS if row.get(key) is not None}
+            if row.get('extra'):
+                metadata.update(json.loads(row['extra']))
+            metadatas.append(metadata)
+        imported += db.restore_cvs([row['id'] for row in rows], [row['document'] for row in rows], metadatas)
+        print(f"📥 Imported {imported} CVs")
+    db.rebuild_indexes()
+    return imported
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('command', choices=('export', 'import'))
+    arg_parser.add_argument('path')
+    arg_parser.add_argument('--with-documents', action='store_true', help='include the CV text (needed to restore)')
+    arg_parser.add_argument('--batch-size', type=int, default=500, help='records per page / row group')
+    args = arg_parser.parse_args(argv)
+
+    db = ChromaDB()
+    started = time.perf_counter()
+    if args.command == 'export':
+        count = export_corpus(db, args.path, args.with_documents, args.batch_size)
+    else:
+        count = import_corpus(db, args.path, args.batch_size)
+    print(f"✅ {args.command.capitalize()}ed {count} CVs in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Bulk-ingest every CV in a folder through the concurrent pipeline.
+
+    python -m scripts.ingest_folder path/to/cvs [--concurrency 8]
+    python -m scripts.ingest_folder path/to/cvs --offline [--cvs-per-request 5]
+    python -m scripts.ingest_folder path/to/cvs --write-batch requests.jsonl
+    python -m scripts.ingest_folder path/to/cvs --read-batch output.jsonl --manifest requests.jsonl.manifest.json
+
+`--offline` packs several CVs per LLM request (cheaper, slower). The
+batch-file options do the same through the provider's batch API.
+
+Candidate names default to the file name; the LLM extracts the real one.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from config import ALLOWED_EXTENSIONS, LLM_MAX_CONCURRENCY, LLM_BATCH_CVS_PER_REQUEST
+from src.core.ai_matcher import AIMatcher
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('folder')
+    arg_parser.add_argument('--concurrency', type=int, default=LLM_MAX_CONCURRENCY,
+                            help='CVs in the LLM stage at once')
+    arg_parser.add_argument('--offline', action='store_true', help='pack several CVs into each LLM request')
+    arg_parser.add_argument('--cvs-per-request', type=int, default=LLM_BATCH_CVS_PER_REQUEST)
+    arg_parser.add_argument('--write-batch', metavar='PATH', help='write a provider batch file instead of calling the LLM')
+    arg_parser.add_argument('--read-batch', metavar='PATH', help='store CVs from a provider batch output file')
+    arg_parser.add_argument('--manifest', help='manifest written alongside --write-batch')
+    args = arg_parser.parse_args(argv)
+
+    cv_files = []
+    for name in sorted(os.listdir(args.folder)):
+        if name.rsplit('.', 1)[-1].lower() in ALLOWED_EXTENSIONS:
+            cv_files.append((os.path.join(args.folder, name), os.path.splitext(name)[0]))
+
+    matcher = AIMatcher()
+    if args.write_batch:
+        matcher.write_batch_requests(cv_files, args.write_batch, args.cvs_per_request)
+        return 0
+
+    started = time.perf_counter()
+    if args.read_batch:
+        if not args.manifest:
+            arg_parser.error('--read-batch needs --manifest')
+        with open(args.manifest, 'r', encoding='utf-8') as f:
+            cv_files = [tuple(item) for item in json.load(f)['cv_files']]
+        results = matcher.store_batch_results(args.read_batch, args.manifest)
+    elif args.offline:
+        results = matcher.process_and_store_cvs_offline(cv_files, args.cvs_per_request)
+    else:
+        results = matcher.process_and_store_cvs(cv_files, concurrency=args.concurrency)
+    elapsed = time.perf_counter() - started
+
+    failed = [path for (path, _), result in zip(cv_files, results) if 'error' in result]
+    tokens = sum(result.get('token_usage', {}).get('total_tokens', 0) for result in results)
+    print(f"✅ Ingested {len(results) - len(failed)}/{len(results)} CVs in {elapsed:.1f}s "
+          f"({len(results) / elapsed if elapsed else 0:.2f} CVs/s, {tokens} LLM tokens)")
+    for path in failed:
+        print(f"   ❌ {path}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""Move bulky fields (preview, summary, education, address) of existing CVs into the blob store.
+
+    python -m scripts.migrate_blobs
+
+Safe to re-run; records already migrated are skipped.
+"""
+import sys
+
+from src.database.chroma_db import ChromaDB
+
+
+def main():
+    ChromaDB().migrate_blob_fields()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Re-extract CVs stored under an older extraction version (prompt or model changed).
+
+    python -m scripts.reextract [--batch-size 50] [--concurrency 4]
+    python -m scripts.reextract --status
+    python -m scripts.reextract --restart
+
+Progress is checkpointed after every batch. Ctrl-C stops after the current
+batch, and re-running resumes from the checkpoint. A second Ctrl-C exits at
+once; only the unfinished batch is redone next time. --restart discards the
+checkpoint, which also forgets records that failed too often; records
+already at the current version are still skipped.
+"""
+import argparse
+import json
+import sys
+
+from config import LLM_MAX_CONCURRENCY, REEXTRACT_BATCH_SIZE
+from src.core.ai_matcher import AIMatcher
+from src.core.reextraction import ReextractionJob
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--batch-size', type=int, default=REEXTRACT_BATCH_SIZE, help='CVs per checkpointed batch')
+    arg_parser.add_argument('--concurrency', type=int, default=LLM_MAX_CONCURRENCY, help='CVs in the LLM stage at once')
+    arg_parser.add_argument('--status', action='store_true', help='print the checkpoint and exit')
+    arg_parser.add_argument('--restart', action='store_true', help='discard the checkpoint and start over')
+    args = arg_parser.parse_args(argv)
+
+    job = ReextractionJob(AIMatcher(), batch_size=args.batch_size, concurrency=args.concurrency)
+    if args.status:
+        print(json.dumps(job.status(), indent=2))
+        return 0
+    if args.restart and not job.reset():
+        print("⚠️ Re-extraction is running in another process; stop it before --restart")
+        return 1
+
+    if not job.start_background():
+        print("⚠️ Re-extraction is already running in another process")
+        return 1
+    try:
+        while job.is_running():
+            job.thread.join(0.5)
+    except KeyboardInterrupt:
+        print("⏸️ Stopping after the current batch (Ctrl-C again to exit now)")
+        job.stop()
+        job.thread.join()
+    state = job.status()
+    print(json.dumps(state, indent=2))
+    return 0 if state['status'] in ('done', 'stopped') else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
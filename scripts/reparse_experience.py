@@ -0,0 +1,19 @@
+"""Re-derive the stored experience_years of existing CVs from their experience text.
+
+    python -m scripts.reparse_experience
+
+Needed once for records stored while a bare number or "N months" was read as years.
+Safe to re-run; records already correct are skipped.
+"""
+import sys
+
+from src.database.chroma_db import ChromaDB
+
+
+def main():
+    ChromaDB().reparse_experience_years()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,17 +1,31 @@
-from src.database.chroma_db import ChromaDB
+from src.database.chroma_db import ChromaDB, score_to_percent
+from src.database.candidate_record import CandidateRecord, parse_experience_years, parse_year
 from src.utils.file_parser import CVParser
 from src.utils.text_cleaner import TextCleaner
-from src.llm.openai_client import OpenAIClient
-from config import LLM_PROVIDER
-
-# Conditionally import Claude client only if requested
-if LLM_PROVIDER == 'claude':
-    try:
-        from src.llm.claude_client import ClaudeClient
-    except Exception:
-        ClaudeClient = None
+from src.utils.text_analysis import analyze_text, as_analyzed
+from src.core.reranker import Reranker
+from src.core.saved_searches import SavedSearchStore
+from src.llm.factory import create_llm_client
+from src.llm.token_budget import get_scheduler, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from src.llm.batch_extractor import BatchExtractor
+from config import LLM_PROVIDER, LLM_MAX_CONCURRENCY, CV_PARSE_WORKERS, LLM_BATCH_CVS_PER_REQUEST
+from config import SEARCH_SHORTLIST_SIZE, SEARCH_RETRIEVE_BUDGET_MS, SEARCH_RERANK_BUDGET_MS, CV_DATABASE_DIR
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import os
 import re
 import json
+import time
+
+
+def parse_cv_text(file_path):
+    """Parse and clean one CV file; runs in a worker process. None if extraction failed."""
+    raw_text = CVParser().parse_cv(file_path)
+    print(f"📝 Extracted {len(raw_text)} characters")
+    if "error" in raw_text.lower():
+        return None
+    return TextCleaner().clean_text(raw_text)
+
 
 class AIMatcher:
     def __init__(self):
@@ -19,90 +33,260 @@ class AIMatcher:
         self.parser = CVParser()
         self.cleaner = TextCleaner()
         # Choose LLM client based on config; default to OpenAIClient
-        if LLM_PROVIDER == 'claude' and 'ClaudeClient' in globals() and ClaudeClient:
-            try:
-                self.llm_client = ClaudeClient()
-                print("✅ AI Matcher initialized - Using Claude client for LLM calls")
-            except Exception as e:
-                print(f"⚠️ Failed to initialize Claude client, falling back to OpenAIClient: {e}")
-                self.llm_client = OpenAIClient()
-        else:
-            self.llm_client = OpenAIClient()
+        self.llm_client = create_llm_client(LLM_PROVIDER)
+        self.llm_scheduler = get_scheduler()
+        # Stamped on every stored CV; records with another version are stale (see ReextractionJob)
+        self.extraction_version = self.llm_client.extraction_version()
+        self.saved_searches = SavedSearchStore(os.path.join(CV_DATABASE_DIR, "saved_searches"))
         print("✅ AI Matcher initialized - Enhanced extraction enabled")
     
-    def process_and_store_cv(self, file_path, candidate_name):
+    def process_and_store_cv(self, file_path, candidate_name, priority=PRIORITY_INTERACTIVE, upsert=False):
+        """Parse, analyse and store one CV.
+
+        `priority` orders this CV's LLM requests in the shared token budget;
+        interactive uploads use PRIORITY_INTERACTIVE, backfills PRIORITY_BULK.
+        With `upsert`, earlier CVs of the same person (same email, or same
+        phone when no email was found) are replaced by this one.
+        """
         print(f"📄 Processing CV: {candidate_name}")
         
         try:
             raw_text = self.parser.parse_cv(file_path)
-            print(f"📝 Extracted {len(raw_text)} characters")
-            
-            if "error" in raw_text.lower():
-                return {"error": raw_text}
-            
-            cleaned_text = self.cleaner.clean_text(raw_text)
-            
+            return self.analyse_and_store(raw_text, os.path.basename(file_path), candidate_name, priority, upsert)
+        except Exception as e:
+            print(f"❌ CV processing failed: {e}")
+            return {"error": str(e)}
+    
+    def process_and_store_upload(self, upload, candidate_name, priority=PRIORITY_INTERACTIVE, upsert=False):
+        """Like process_and_store_cv, for a SpooledUpload parsed straight from its buffer"""
+        print(f"📄 Processing CV: {candidate_name} ({upload.size} bytes, sha256 {upload.sha256[:12]})")
+        
+        try:
+            with upload.open() as stream:
+                raw_text = self.parser.parse_stream(stream, upload.filename)
+            return self.analyse_and_store(raw_text, upload.filename, candidate_name, priority, upsert)
+        except Exception as e:
+            print(f"❌ CV processing failed: {e}")
+            return {"error": str(e)}
+    
+    def analyse_and_store(self, raw_text, source_name, candidate_name, priority=PRIORITY_INTERACTIVE, upsert=False):
+        """LLM analysis and storage of extracted CV text; `source_name` labels the token usage"""
+        print(f"📝 Extracted {len(raw_text)} characters")
+        
+        if "error" in raw_text.lower():
+            return {"error": raw_text}
+        
+        # Clean and analyse once; extraction, formatting and saved searches share the result
+        document = analyze_text(raw_text)
+        
+        with self.llm_scheduler.track(source_name, priority) as token_usage:
             print("🤖 Asking OpenAI to detect skills...")
-            skills = self.llm_client.extract_skills(cleaned_text)
+            skills = self.llm_client.extract_skills(document)
             
             print("🤖 Comprehensive AI analysis starting...")
-            comprehensive_details = self.llm_client.extract_comprehensive_details(cleaned_text)
-            
-            personal_info = comprehensive_details.get('personal_info', {})
-            professional_info = comprehensive_details.get('professional_info', {})
-            education_info = comprehensive_details.get('education', {})
-            technical_skills = comprehensive_details.get('technical_skills', {})
-            
-            actual_name = personal_info.get('full_name', candidate_name)
-            
-            clean_skills = [skill for skill in skills if skill and skill.lower() not in ['extracted', 'ai analyzing', 'no skills']]
-            
-            # FORMAT EDUCATION - Convert to bullet points
-            education_text = self.format_education_text(education_info, cleaned_text)
-            
-            # FORMAT SUMMARY - Convert to bullet points
-            summary_text = self.format_summary_text(professional_info.get('summary', ''), cleaned_text)
-            
-            # FORMAT CV PREVIEW - Clean and structure
-            formatted_preview = self.format_cv_preview(cleaned_text)
-            
-            metadata = {
-                'candidate_name': str(actual_name),
-                'skills': ', '.join(clean_skills) if clean_skills else "Technical Skills",
-                'email': personal_info.get('email', 'Email in CV'),
-                'phone': personal_info.get('phone', 'Phone in CV'),
-                'address': personal_info.get('address', 'Address in CV'),
-                'location': personal_info.get('location', 'Location in CV'),
-                'current_role': professional_info.get('current_role', 'Professional Role'),
-                'experience': professional_info.get('total_experience', 'Experience in CV'),
-                'current_company': professional_info.get('current_company', 'Company in CV'),
-                'education': education_text,
-                'summary': summary_text,
-                'programming_languages': ', '.join(technical_skills.get('programming_languages', [])),
-                'frameworks': ', '.join(technical_skills.get('frameworks', [])),
-                'databases': ', '.join(technical_skills.get('databases', [])),
-                'cloud_platforms': ', '.join(technical_skills.get('cloud_platforms', [])),
-                'raw_text': formatted_preview
-            }
-            
-            print(f"📊 AI Analysis Complete:")
-            print(f"   👤 Name: {actual_name}")
-            print(f"   📧 Email: {metadata['email']}")
-            print(f"   📞 Phone: {metadata['phone']}")
-            print(f"   🔧 Skills: {len(clean_skills)} skills")
-            
-            cv_id = self.db.add_cv(cleaned_text, metadata)
-            
-            return {
-                'cv_id': cv_id, 
-                'skills': clean_skills,
-                'comprehensive_details': comprehensive_details,
-                'text_length': len(cleaned_text)
-            }
-            
+            comprehensive_details = self.llm_client.extract_comprehensive_details(document)
+        
+        return self.store_analysis(candidate_name, document, skills, comprehensive_details, token_usage, upsert)
+    
+    def store_analysis(self, candidate_name, cleaned_text, skills, comprehensive_details, token_usage, upsert=False):
+        """Build metadata from the LLM output and store the CV.
+
+        `cleaned_text` is the cleaned CV text or its AnalyzedDocument.
+        With `upsert`, stored CVs of the same person are deleted once this
+        one is stored; their IDs are returned under 'replaced'.
+        """
+        document = as_analyzed(cleaned_text)
+        cleaned_text = document.text
+        clean_skills = self.clean_skills(skills)
+        metadata = self.build_metadata(candidate_name, document, skills, comprehensive_details)
+        
+        print(f"📊 AI Analysis Complete:")
+        print(f"   👤 Name: {metadata['candidate_name']}")
+        print(f"   📧 Email: {metadata['email']}")
+        print(f"   📞 Phone: {metadata['phone']}")
+        print(f"   🔧 Skills: {len(clean_skills)} skills")
+        print(f"   🪙 LLM spend: {token_usage['total_tokens']} tokens in {token_usage['requests']} requests")
+        
+        replaced = self.db.find_duplicates(metadata) if upsert else []
+        cv_id = self.db.add_cv(cleaned_text, metadata)
+        # Stored before the old records go, so a failure never leaves the candidate with no CV
+        for old_id in replaced:
+            self.db.delete_cv(old_id)
+        if replaced:
+            print(f"♻️ Replaced {len(replaced)} earlier CV(s) of {metadata['candidate_name']}")
+        
+        # Score only this CV against the saved searches; a failure here must not fail the upload
+        try:
+            self.saved_searches.match_new_cv(cv_id, document, metadata['candidate_name'])
         except Exception as e:
-            print(f"❌ CV processing failed: {e}")
-            return {"error": str(e)}
+            print(f"❌ Saved-search matching failed: {e}")
+        
+        return {
+            'cv_id': cv_id, 
+            'skills': clean_skills,
+            'comprehensive_details': comprehensive_details,
+            'text_length': len(cleaned_text),
+            'token_usage': dict(token_usage),
+            'replaced': replaced
+        }
+    
+    def clean_skills(self, skills):
+        return [skill for skill in skills if skill and skill.lower() not in ['extracted', 'ai analyzing', 'no skills']]
+    
+    def build_metadata(self, candidate_name, document, skills, comprehensive_details):
+        """Stored metadata for one CV from its AnalyzedDocument and the LLM output"""
+        personal_info = comprehensive_details.get('personal_info', {})
+        professional_info = comprehensive_details.get('professional_info', {})
+        education_info = comprehensive_details.get('education', {})
+        technical_skills = comprehensive_details.get('technical_skills', {})
+        
+        actual_name = personal_info.get('full_name', candidate_name)
+        
+        clean_skills = self.clean_skills(skills)
+        
+        # FORMAT EDUCATION - Convert to bullet points
+        education_text = self.format_education_text(education_info, document)
+        
+        # FORMAT SUMMARY - Convert to bullet points
+        summary_text = self.format_summary_text(professional_info.get('summary', ''), document)
+        
+        # FORMAT CV PREVIEW - Clean and structure
+        formatted_preview = self.format_cv_preview(document)
+        
+        metadata = {
+            'candidate_name': str(actual_name),
+            'skills': ', '.join(clean_skills) if clean_skills else "Technical Skills",
+            'email': personal_info.get('email', 'Email in CV'),
+            'phone': personal_info.get('phone', 'Phone in CV'),
+            'address': personal_info.get('address', 'Address in CV'),
+            'location': personal_info.get('location', 'Location in CV'),
+            'current_role': professional_info.get('current_role', 'Professional Role'),
+            'experience': professional_info.get('total_experience', 'Experience in CV'),
+            # Numeric copies for range filters; None (unparseable) is left out of the record
+            'experience_years': parse_experience_years(professional_info.get('total_experience')),
+            'graduation_year': parse_year(education_info.get('graduation_year')),
+            'current_company': professional_info.get('current_company', 'Company in CV'),
+            'education': education_text,
+            'summary': summary_text,
+            'programming_languages': ', '.join(technical_skills.get('programming_languages', [])),
+            'frameworks': ', '.join(technical_skills.get('frameworks', [])),
+            'databases': ', '.join(technical_skills.get('databases', [])),
+            'cloud_platforms': ', '.join(technical_skills.get('cloud_platforms', [])),
+            'raw_text': formatted_preview,
+            'extraction_version': self.extraction_version
+        }
+        return metadata
+    
+    async def reextract_async(self, cv_id, cleaned_text, metadata, priority=PRIORITY_BULK):
+        """(new metadata, token usage) for a stored CV from a fresh LLM extraction of its text.
+
+        LLM or parsing failures raise instead of falling back to the regex
+        extractors, so a record only gets the current extraction version
+        when the LLM actually produced its fields.
+        """
+        document = as_analyzed(cleaned_text)
+        with self.llm_scheduler.track(cv_id, priority) as token_usage:
+            skills, comprehensive_details = await asyncio.gather(
+                self.llm_client.extract_skills_async(document, strict=True),
+                self.llm_client.extract_comprehensive_details_async(document, strict=True)
+            )
+        candidate_name = (metadata or {}).get('candidate_name', 'Unknown')
+        return self.build_metadata(candidate_name, document, skills, comprehensive_details), dict(token_usage)
+    
+    async def process_and_store_cvs_async(self, cv_files, concurrency=LLM_MAX_CONCURRENCY,
+                                          priority=PRIORITY_BULK, parse_workers=CV_PARSE_WORKERS):
+        """Ingest many CVs concurrently.
+
+        `cv_files` is a list of (file_path, candidate_name). Parsing runs in a
+        process pool; at most `concurrency` CVs are in the LLM stage at once,
+        each with its skills and details requests in flight together.
+        Results come back in input order, errors as {"error": ...} entries.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+            async def ingest(file_path, candidate_name):
+                print(f"📄 Processing CV: {candidate_name}")
+                try:
+                    cleaned_text = await loop.run_in_executor(pool, parse_cv_text, file_path)
+                    if cleaned_text is None:
+                        return {"error": f"Could not extract text from {os.path.basename(file_path)}"}
+                    document = as_analyzed(cleaned_text)
+                    
+                    async with semaphore:
+                        with self.llm_scheduler.track(os.path.basename(file_path), priority) as token_usage:
+                            skills, comprehensive_details = await asyncio.gather(
+                                self.llm_client.extract_skills_async(document),
+                                self.llm_client.extract_comprehensive_details_async(document)
+                            )
+                    
+                    return await asyncio.to_thread(self.store_analysis, candidate_name, document,
+                                                   skills, comprehensive_details, token_usage)
+                except Exception as e:
+                    print(f"❌ CV processing failed: {e}")
+                    return {"error": str(e)}
+            
+            return await asyncio.gather(*(ingest(path, name) for path, name in cv_files))
+    
+    def process_and_store_cvs(self, cv_files, concurrency=LLM_MAX_CONCURRENCY, priority=PRIORITY_BULK):
+        """Blocking wrapper around process_and_store_cvs_async for scripts and workers"""
+        return asyncio.run(self.process_and_store_cvs_async(cv_files, concurrency, priority))
+    
+    def parse_cv_files(self, cv_files):
+        """Parse and clean (file_path, candidate_name) pairs in a process pool"""
+        with ProcessPoolExecutor(max_workers=CV_PARSE_WORKERS) as pool:
+            return list(pool.map(parse_cv_text, [path for path, _ in cv_files]))
+    
+    def _store_extracted(self, cv_files, texts, extracted):
+        results = []
+        for i, ((file_path, candidate_name), cleaned_text) in enumerate(zip(cv_files, texts)):
+            item = extracted.get(str(i))
+            if cleaned_text is None or item is None:
+                results.append({"error": f"Could not process {os.path.basename(file_path)}"})
+                continue
+            try:
+                results.append(self.store_analysis(candidate_name, cleaned_text, item['skills'],
+                                                   item['comprehensive_details'], item['token_usage']))
+            except Exception as e:
+                print(f"❌ CV processing failed: {e}")
+                results.append({"error": str(e)})
+        return results
+    
+    def process_and_store_cvs_offline(self, cv_files, cvs_per_request=LLM_BATCH_CVS_PER_REQUEST):
+        """Nightly-backfill path: several compacted CVs per LLM request, see BatchExtractor"""
+        texts = self.parse_cv_files(cv_files)
+        cvs = [(str(i), text) for i, text in enumerate(texts) if text is not None]
+        extracted = BatchExtractor(self.llm_client, cvs_per_request).extract(cvs)
+        return self._store_extracted(cv_files, texts, extracted)
+    
+    def write_batch_requests(self, cv_files, path, cvs_per_request=LLM_BATCH_CVS_PER_REQUEST):
+        """Write a provider batch file plus `<path>.manifest.json` for store_batch_results"""
+        texts = self.parse_cv_files(cv_files)
+        cvs = [(str(i), text) for i, text in enumerate(texts) if text is not None]
+        packs = BatchExtractor(self.llm_client, cvs_per_request).write_batch_file(cvs, path)
+        with open(f"{path}.manifest.json", 'w', encoding='utf-8') as f:
+            json.dump({'packs': packs, 'cv_files': cv_files, 'cvs_per_request': cvs_per_request}, f)
+        return packs
+    
+    def store_batch_results(self, results_path, manifest_path):
+        """Store CVs from a provider batch output file, re-extracting only the failed ones"""
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        cv_files = [tuple(item) for item in manifest['cv_files']]
+        texts = self.parse_cv_files(cv_files)
+        
+        extractor = BatchExtractor(self.llm_client, manifest['cvs_per_request'])
+        demuxed, failed = extractor.read_batch_results(results_path, manifest['packs'])
+        extracted = {
+            key: {'skills': skills, 'comprehensive_details': details,
+                  'token_usage': {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}}
+            for key, (skills, details) in demuxed.items()
+        }
+        if failed:
+            print(f"🔁 {len(failed)} CVs missing or invalid in batch output; retrying them")
+            extracted.update(extractor.extract([(key, texts[int(key)]) for key in failed]))
+        return self._store_extracted(cv_files, texts, extracted)
     
     def format_education_text(self, education_info, raw_text):
         """Format education information as bullet points"""
@@ -125,9 +309,8 @@ class AIMatcher:
         
         if not education_points:
             education_keywords = ['bachelor', 'master', 'phd', 'degree', 'university', 'college', 'bs', 'ms', 'btech', 'mtech']
-            lines = raw_text.split('\n')
-            for line in lines:
-                line_lower = line.lower()
+            document = as_analyzed(raw_text)
+            for line, line_lower in zip(document.lines, document.lower_lines):
                 if any(keyword in line_lower for keyword in education_keywords) and len(line.strip()) > 10:
                     education_points.append(f"• {line.strip()}")
                     if len(education_points) >= 2:
@@ -141,12 +324,11 @@ class AIMatcher:
     def format_summary_text(self, summary, raw_text):
         """Format summary as bullet points"""
         if not summary or "technical expertise" in summary.lower():
-            lines = raw_text.split('\n')
+            document = as_analyzed(raw_text)
             key_points = []
             
             achievement_keywords = ['developed', 'created', 'managed', 'led', 'implemented', 'achieved', 'built']
-            for line in lines[:20]:
-                line_lower = line.lower()
+            for line, line_lower in zip(document.lines[:20], document.lower_lines[:20]):
                 if any(keyword in line_lower for keyword in achievement_keywords) and len(line.strip()) > 20:
                     key_points.append(f"• {line.strip()}")
                     if len(key_points) >= 3:
@@ -168,28 +350,11 @@ class AIMatcher:
     
     def format_cv_preview(self, text):
         """Format CV preview with better structure"""
-        lines = text.split('\n')
-        formatted_lines = []
-        
+        document = as_analyzed(text)
         sections = []
-        current_section = []
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            if (len(line) < 50 and 
-                (line.isupper() or 
-                 any(keyword in line.lower() for keyword in ['experience', 'education', 'skills', 'projects', 'summary']))):
-                if current_section:
-                    sections.append(current_section)
-                current_section = [f"\n{line.upper()}"]
-            else:
-                current_section.append(f"• {line}")
-        
-        if current_section:
-            sections.append(current_section)
+        for section in document.line_sections:
+            heading = [f"\n{section['heading'].upper()}"] if section['heading'] else []
+            sections.append(heading + [f"• {line}" for line in section['lines']])
         
         preview_lines = []
         char_count = 0
@@ -199,18 +364,96 @@ class AIMatcher:
                     preview_lines.append(line)
                     char_count += len(line)
         
-        return "\n".join(preview_lines) if preview_lines else text[:800]
+        return "\n".join(preview_lines) if preview_lines else document.text[:800]
     
-    def find_matching_cvs(self, job_description, top_k=5):
+    def find_matching_cvs(self, job_description, top_k=5, min_experience=None, max_experience=None,
+                          min_graduation_year=None, max_graduation_year=None):
+        """Search and return {'ids': [[...]], 'distances': [[...]], 'candidates': [[CandidateRecord]], 'timings': {...}}
+
+        The optional bounds are inclusive and resolved through the range
+        indexes before any text is scored. TF-IDF then shortlists
+        SEARCH_SHORTLIST_SIZE CVs and the Reranker orders them; time the
+        retrieval spends over its budget is taken from the rerank budget.
+        """
+        empty = {'ids': [[]], 'distances': [[]], 'candidates': [[]], 'timings': {}}
+        candidate_ids = self.db.filter_ids(min_experience, max_experience, min_graduation_year, max_graduation_year)
+        if candidate_ids is not None:
+            print(f"🎚️ Range filters matched {len(candidate_ids)} CVs")
+            if not candidate_ids:
+                return empty
         print(f"🔍 Searching for: {job_description}")
-        results = self.db.search_similar(job_description, top_k)
+        try:
+            started = time.perf_counter()
+            retrieved = self.db.retrieve(job_description, max(top_k, SEARCH_SHORTLIST_SIZE), candidate_ids)
+            retrieve_ms = (time.perf_counter() - started) * 1000
+            if not retrieved['ids']:
+                print("❌ No matching CVs found")
+                return empty
+            metadatas = self.db.get_metadatas(retrieved['ids'])
+            result = self._rerank(job_description, retrieved, dict(zip(retrieved['ids'], metadatas)), top_k, retrieve_ms)
+        except Exception as e:
+            print(f"❌ Search failed: {e}")
+            return empty
         
         # Log search results for debugging
-        if results and results['metadatas'] and results['metadatas'][0]:
-            print(f"✅ Found {len(results['metadatas'][0])} matching CVs")
-            for i, metadata in enumerate(results['metadatas'][0]):
-                print(f"   {i+1}. {metadata.get('candidate_name', 'Unknown')} - {results['distances'][0][i]}%")
-        else:
-            print("❌ No matching CVs found")
+        timings = result['timings']
+        print(f"✅ Found {len(result['candidates'][0])} matching CVs (shortlist {timings['shortlist']}, "
+              f"retrieve {timings['retrieve_ms']}ms, rerank {timings['rerank_ms']}ms)")
+        for i, candidate in enumerate(result['candidates'][0]):
+            print(f"   {i+1}. {candidate.candidate_name or 'Unknown'} - {result['distances'][0][i]}%")
             
-        return results
\ No newline at end of file
+        return result
+
+    def _rerank(self, job_description, retrieved, metadata_by_id, top_k, retrieve_ms):
+        """Second stage for one query, in find_matching_cvs' result shape"""
+        overrun_ms = max(0.0, retrieve_ms - SEARCH_RETRIEVE_BUDGET_MS)
+        if overrun_ms:
+            print(f"⏱️ Retrieval took {retrieve_ms:.0f}ms, over its {SEARCH_RETRIEVE_BUDGET_MS:g}ms budget")
+        reranker = Reranker(max(0.0, SEARCH_RERANK_BUDGET_MS - overrun_ms))
+        metadatas = [metadata_by_id.get(cv_id, {}) for cv_id in retrieved['ids']]
+        order, scores, timings = reranker.rerank(job_description, retrieved, metadatas, top_k)
+        timings.update({'retrieve_ms': round(retrieve_ms, 1), 'shortlist': len(retrieved['ids'])})
+        
+        ids = [retrieved['ids'][i] for i in order]
+        distances = [score_to_percent(score) for score in scores]
+        candidates = [CandidateRecord.from_metadata(ids[n], metadatas[i]) for n, i in enumerate(order)]
+        return {'ids': [ids], 'distances': [distances], 'candidates': [candidates], 'timings': timings}
+
+    def find_matching_cvs_batch(self, job_descriptions, top_k=5, min_experience=None, max_experience=None,
+                                min_graduation_year=None, max_graduation_year=None):
+        """Match many job descriptions in one pass; one find_matching_cvs-shaped result per job, in order.
+
+        All queries are vectorised together and scored with a single sparse
+        matrix product against the cached index. Shortlist metadata is
+        fetched once for the union of shortlists, then each job is reranked.
+        The range filters apply to every job.
+        """
+        empty = {'ids': [[]], 'distances': [[]], 'candidates': [[]], 'timings': {}}
+        if not job_descriptions:
+            return []
+        candidate_ids = self.db.filter_ids(min_experience, max_experience, min_graduation_year, max_graduation_year)
+        if candidate_ids is not None and not candidate_ids:
+            return [dict(empty) for _ in job_descriptions]
+        print(f"🔍 Batch matching {len(job_descriptions)} job descriptions")
+        try:
+            started = time.perf_counter()
+            shortlists = self.db.retrieve_batch(job_descriptions, max(top_k, SEARCH_SHORTLIST_SIZE), candidate_ids)
+            # The retrieval cost is shared, so each job is charged its share against the budget
+            retrieve_ms = (time.perf_counter() - started) * 1000 / len(job_descriptions)
+            union = sorted({cv_id for retrieved in shortlists for cv_id in retrieved['ids']})
+            metadata_by_id = dict(zip(union, self.db.get_metadatas(union)))
+        except Exception as e:
+            print(f"❌ Batch search failed: {e}")
+            return [dict(empty) for _ in job_descriptions]
+        
+        results = []
+        for job_description, retrieved in zip(job_descriptions, shortlists):
+            if not retrieved['ids']:
+                results.append(dict(empty))
+                continue
+            results.append(self._rerank(job_description, retrieved, metadata_by_id, top_k, retrieve_ms))
+        
+        matched = sum(1 for result in results if result['ids'][0])
+        print(f"✅ Batch matched {matched}/{len(job_descriptions)} jobs against {len(union)} distinct CVs "
+              f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return results
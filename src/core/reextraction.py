@@ -0,0 +1,291 @@
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+from config import CV_DATABASE_DIR, LLM_MAX_CONCURRENCY, REEXTRACT_BATCH_SIZE, REEXTRACT_MAX_ATTEMPTS
+from src.llm.token_budget import PRIORITY_BULK
+from src.utils.file_lock import file_lock
+
+
+class ReextractionJob:
+    """Re-runs LLM extraction for CVs stored under an older extraction version.
+
+    Walks the stored metadata page by page and only re-extracts records whose
+    `extraction_version` differs from the matcher's. Each page of
+    `batch_size` records is one batch, with at most `concurrency` CVs in the
+    LLM stage at bulk priority in the shared token budget. A batch's new
+    metadata is written in place, then the checkpoint is saved.
+
+    A stopped or crashed run resumes from the last checkpoint. Records that
+    already have the target version are skipped, so finished work is never
+    redone. A record whose extraction fails keeps its old metadata and is
+    retried on the next pass, up to `max_attempts` times. The job ends once
+    a full pass finds nothing left to do.
+
+    The checkpoint is `<CV_DATABASE_DIR>/reextraction.json`. A run holds an
+    exclusive file lock on it throughout, so with several worker processes
+    only one runs the job; starting it anywhere else is refused. `status()`
+    re-reads the checkpoint so every process reports the running job's
+    progress, and `stop()` leaves a `<checkpoint>.stop` marker that the
+    running process honours after its current batch.
+    """
+
+    def __init__(self, matcher, path=None, batch_size=REEXTRACT_BATCH_SIZE, concurrency=LLM_MAX_CONCURRENCY,
+                 max_attempts=REEXTRACT_MAX_ATTEMPTS):
+        self.matcher = matcher
+        self.db = matcher.db
+        self.path = path or os.path.join(CV_DATABASE_DIR, "reextraction.json")
+        self.stop_path = f"{self.path}.stop"
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        # Identity of the checkpoint version `state` was read from or written to
+        self._stamp = None
+        self.state = self._load()
+        if self.state.get('checkpoint_at') is not None:
+            print(f"📍 Re-extraction checkpoint: pass {self.state['pass']}, offset {self.state['offset']}, "
+                  f"{self.state['updated']} updated ({self.state['status']})")
+
+    def _fresh_state(self):
+        return {
+            'target_version': self.matcher.extraction_version,
+            'status': 'idle',
+            'pass': 1,
+            'offset': 0,
+            'scanned': 0,
+            'updated': 0,
+            'failed': {},
+            'tokens': 0,
+            'error': None,
+            'started_at': None,
+            'checkpoint_at': None,
+            'finished_at': None,
+        }
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                stamp = self._file_stamp()
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                self._stamp = stamp
+                return state
+            except Exception as e:
+                print(f"❌ Failed to load re-extraction checkpoint {self.path}: {e}")
+        return self._fresh_state()
+
+    def _refresh(self):
+        """Pick up checkpoints written by the process running the job; caller holds the lock"""
+        if not self.is_running() and self._file_stamp() != self._stamp:
+            self.state = self._load()
+
+    def _claim(self):
+        """The held run lock, or None when a run is in progress in this or another process"""
+        stack = contextlib.ExitStack()
+        try:
+            stack.enter_context(file_lock(self.path, blocking=False))
+        except BlockingIOError:
+            return None
+        return stack
+
+    def _stop_requested(self):
+        return self.stop_event.is_set() or os.path.exists(self.stop_path)
+
+    def _save(self):
+        # Write then rename so an interrupted run never leaves a truncated checkpoint
+        with self.lock:
+            self.state['checkpoint_at'] = time.time()
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.path)
+            self._stamp = self._file_stamp()
+
+    def status(self):
+        with self.lock:
+            self._refresh()
+            state = dict(self.state)
+        failed = state.pop('failed')
+        state['failing'] = sum(1 for attempts in failed.values() if attempts < self.max_attempts)
+        state['skipped'] = len(failed) - state['failing']
+        state['total_cvs'] = self.db.get_cv_count()
+        state['current_version'] = self.matcher.extraction_version
+        state['running'] = self.is_running() or (state['status'] == 'running' and self._running_elsewhere())
+        return state
+
+    def _running_elsewhere(self):
+        # A crashed run leaves status 'running' in the checkpoint but releases the lock
+        claim = self._claim()
+        if claim is None:
+            return True
+        claim.close()
+        return False
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def is_stale(self, cv_id, metadata):
+        if (metadata or {}).get('extraction_version') == self.state['target_version']:
+            return False
+        return self.state['failed'].get(cv_id, 0) < self.max_attempts
+
+    def run(self):
+        """Run until done or stop(); resumes a checkpointed run for the same target version.
+
+        Returns the status, or None without running when another process holds the job.
+        """
+        claim = self._claim()
+        if claim is None:
+            print("⚠️ Re-extraction is already running in another process")
+            return None
+        with claim:
+            return self._run()
+
+    def _run(self):
+        self.stop_event.clear()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.stop_path)
+        with self.lock:
+            self.state = self._load()
+            if self.state['status'] == 'done' or self.state['target_version'] != self.matcher.extraction_version:
+                self.state = self._fresh_state()
+            self.state['status'] = 'running'
+            self.state['error'] = None
+            self.state['started_at'] = self.state['started_at'] or time.time()
+        self._save()
+        print(f"🔁 Re-extracting stale CVs to {self.state['target_version']} "
+              f"(pass {self.state['pass']}, offset {self.state['offset']})")
+        try:
+            while not self._stop_requested():
+                attempted = self._run_pass()
+                if self._stop_requested():
+                    break
+                if not attempted:
+                    with self.lock:
+                        self.state['status'] = 'done'
+                        self.state['finished_at'] = time.time()
+                    break
+                # Catch records that failed, moved or arrived during this pass
+                with self.lock:
+                    self.state['pass'] += 1
+                    self.state['offset'] = 0
+                self._save()
+        except Exception as e:
+            print(f"❌ Re-extraction failed: {e}")
+            with self.lock:
+                self.state['status'] = 'failed'
+                self.state['error'] = str(e)
+        finally:
+            with self.lock:
+                if self.state['status'] == 'running':
+                    self.state['status'] = 'stopped'
+            self._save()
+        print(f"✅ Re-extraction {self.state['status']}: {self.state['updated']} CVs updated, "
+              f"{self.state['tokens']} tokens")
+        return self.status()
+
+    def _run_pass(self):
+        """One scan from the checkpoint offset to the end; returns how many stale records it attempted"""
+        attempted = 0
+        for page in self.db.iter_pages(batch_size=self.batch_size, include=('metadatas',), start=self.state['offset']):
+            stale = [(cv_id, metadata) for cv_id, metadata in zip(page['ids'], page['metadatas'])
+                     if self.is_stale(cv_id, metadata)]
+            if stale:
+                self._run_batch(stale)
+                attempted += len(stale)
+            with self.lock:
+                self.state['offset'] += len(page['ids'])
+                self.state['scanned'] += len(page['ids'])
+            self._save()
+            if self._stop_requested():
+                break
+        return attempted
+
+    def _run_batch(self, stale):
+        ids = [cv_id for cv_id, _ in stale]
+        texts = self.db.get_documents(ids)
+        results = asyncio.run(self._extract_batch(stale, texts))
+
+        updated_ids, updated_metadatas, tokens = [], [], 0
+        with self.lock:
+            for cv_id, result in zip(ids, results):
+                if isinstance(result, Exception):
+                    self.state['failed'][cv_id] = self.state['failed'].get(cv_id, 0) + 1
+                    print(f"⚠️ Re-extraction of {cv_id} failed (attempt {self.state['failed'][cv_id]}): {result}")
+                    continue
+                metadata, token_usage = result
+                updated_ids.append(cv_id)
+                updated_metadatas.append(metadata)
+                tokens += token_usage.get('total_tokens', 0)
+
+        updated = self.db.update_metadatas(updated_ids, updated_metadatas) if updated_ids else 0
+        with self.lock:
+            for cv_id in updated_ids:
+                self.state['failed'].pop(cv_id, None)
+            self.state['updated'] += updated
+            self.state['tokens'] += tokens
+        print(f"🔁 Re-extracted {updated}/{len(ids)} CVs (total {self.state['updated']})")
+
+    async def _extract_batch(self, stale, texts):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def extract(cv_id, metadata, text):
+            if not text:
+                return ValueError("No stored text")
+            async with semaphore:
+                return await self.matcher.reextract_async(cv_id, text, metadata, PRIORITY_BULK)
+
+        return await asyncio.gather(*(extract(cv_id, metadata, text) for (cv_id, metadata), text in zip(stale, texts)),
+                                    return_exceptions=True)
+
+    def reset(self):
+        """Forget the checkpoint, failure counts included; records already at the target version are still skipped"""
+        if self.is_running():
+            return False
+        claim = self._claim()
+        if claim is None:
+            return False
+        with claim:
+            with self.lock:
+                self.state = self._fresh_state()
+            self._save()
+        return True
+
+    def start_background(self):
+        """Run in a daemon thread; False if a run is already in progress here or in another process"""
+        if self.is_running():
+            return False
+        # Claimed before returning so two concurrent start requests cannot both succeed
+        claim = self._claim()
+        if claim is None:
+            return False
+
+        def run_claimed():
+            with claim:
+                self._run()
+
+        self.thread = threading.Thread(target=run_claimed, name="reextraction", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """Stop after the current batch, in whichever process runs the job; its results are written and checkpointed first"""
+        self.stop_event.set()
+        if self.is_running() or self._running_elsewhere():
+            with open(self.stop_path, 'w'):
+                pass
@@ -0,0 +1,130 @@
+import re
+import time
+import numpy as np
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+from src.database.candidate_record import CandidateRecord, SKILLS
+
+_REQUIRED_YEARS_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*\+?\s*(?:-\s*\d+\s*)?(?:years?|yrs?)', re.IGNORECASE)
+_WORD_PATTERN = re.compile(r'[a-z][a-z0-9+#.]*')
+
+
+def required_years(job_description):
+    """Smallest 'N years' requirement in the job description, or None"""
+    years = [float(match) for match in _REQUIRED_YEARS_PATTERN.findall(job_description)]
+    years = [value for value in years if value < 40]
+    return min(years) if years else None
+
+
+def key_phrases(job_description):
+    """Adjacent non-stop-word pairs, e.g. 'machine learning', 'web development'"""
+    words = _WORD_PATTERN.findall(job_description.lower())
+    phrases = []
+    for first, second in zip(words, words[1:]):
+        if first in ENGLISH_STOP_WORDS or second in ENGLISH_STOP_WORDS:
+            continue
+        phrase = f"{first} {second}"
+        if phrase not in phrases:
+            phrases.append(phrase)
+    return phrases
+
+
+class Reranker:
+    """Second search stage: rescores the TF-IDF shortlist with richer features.
+
+    Features are computed as arrays over the whole shortlist:
+    skill overlap between the job description and the structured skill
+    fields, experience fit against the 'N years' the job asks for, and
+    the share of the job's key phrases found verbatim in the CV. They are
+    computed in that order; once `budget_ms` is spent the remaining ones
+    are skipped and the weights renormalised, so a slow rerank degrades
+    instead of blowing the request's latency.
+    """
+
+    WEIGHTS = {'text': 0.4, 'skills': 0.3, 'experience': 0.15, 'phrases': 0.15}
+
+    def __init__(self, budget_ms):
+        self.budget_ms = budget_ms
+
+    def skill_overlap(self, job_description, records):
+        """Share of the skills mentioned in the job that each candidate lists"""
+        # Local vocabulary: the skills present anywhere in the shortlist
+        local_ids = {}
+        rows, cols = [], []
+        for row, record in enumerate(records):
+            skill_ids = set(record.skill_ids)
+            for ids in (record.language_ids, record.framework_ids, record.database_ids, record.cloud_ids):
+                skill_ids.update(ids)
+            for skill_id in skill_ids:
+                rows.append(row)
+                cols.append(local_ids.setdefault(skill_id, len(local_ids)))
+        if not local_ids:
+            return np.zeros(len(records))
+
+        text = f" {job_description.lower()} "
+        wanted = np.zeros(len(local_ids))
+        for skill_id, col in local_ids.items():
+            name = SKILLS.names[skill_id].lower()
+            if re.search(r'(?<![a-z0-9])' + re.escape(name) + r'(?![a-z0-9])', text):
+                wanted[col] = 1.0
+        if not wanted.any():
+            return np.zeros(len(records))
+
+        has_skill = np.zeros((len(records), len(local_ids)))
+        has_skill[rows, cols] = 1.0
+        return has_skill @ wanted / wanted.sum()
+
+    def experience_fit(self, job_description, records):
+        """1 when the candidate meets the required years, proportionally less below it; None if the job sets none"""
+        required = required_years(job_description)
+        if not required:
+            return None
+        years = np.array([np.nan if r.experience_years is None else r.experience_years for r in records])
+        fit = np.clip(years / required, 0.0, 1.0)
+        # Unknown experience is neither rewarded nor ruled out
+        return np.where(np.isnan(years), 0.5, fit)
+
+    def phrase_matches(self, job_description, documents):
+        """Share of the job's key phrases that occur in each CV's text; None without phrases"""
+        phrases = key_phrases(job_description)
+        if not phrases:
+            return None
+        lowered = [' '.join(_WORD_PATTERN.findall(document.lower())) for document in documents]
+        hits = np.array([[phrase in document for phrase in phrases] for document in lowered], dtype=float)
+        return hits.mean(axis=1)
+
+    def rerank(self, job_description, retrieved, metadatas, top_k):
+        """Order the shortlist by the combined score.
+
+        `retrieved` is ChromaDB.retrieve() output and `metadatas` the
+        shortlist's metadata in the same order. Returns (indices, scores,
+        timings) with scores in 0-1, best first, at most `top_k` long.
+        """
+        started = time.perf_counter()
+        deadline = started + self.budget_ms / 1000
+        records = [CandidateRecord.from_metadata(cv_id, metadata) for cv_id, metadata in zip(retrieved['ids'], metadatas)]
+
+        features = {'text': np.asarray(retrieved['similarities'], dtype=float)}
+        steps = (
+            ('skills', lambda: self.skill_overlap(job_description, records)),
+            ('experience', lambda: self.experience_fit(job_description, records)),
+            ('phrases', lambda: self.phrase_matches(job_description, retrieved['documents'])),
+        )
+        skipped = []
+        for name, compute in steps:
+            if time.perf_counter() > deadline:
+                skipped.append(name)
+                continue
+            values = compute()
+            if values is not None:
+                features[name] = values
+
+        total_weight = sum(self.WEIGHTS[name] for name in features)
+        combined = sum(self.WEIGHTS[name] * values for name, values in features.items()) / total_weight
+
+        top_k = min(top_k, len(combined))
+        order = np.argsort(-combined, kind='stable')[:top_k]
+        timings = {'rerank_ms': round((time.perf_counter() - started) * 1000, 1), 'features': list(features)}
+        if skipped:
+            print(f"⏱️ Rerank budget of {self.budget_ms:g}ms exhausted; skipped {', '.join(skipped)}")
+            timings['skipped'] = skipped
+        return order, combined[order], timings
@@ -0,0 +1,194 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from src.database.chroma_db import score_to_percent
+from src.utils.file_lock import file_lock
+from src.utils.text_analysis import as_analyzed
+
+
+def _pretokenized(tokens):
+    return tokens
+
+
+class SavedSearchStore:
+    """Saved job searches with a per-search inbox of newly matching CVs.
+
+    Query vectors live in a stateless hashed term space, so they stay valid
+    however the corpus (and the search TF-IDF index) changes. Each stored
+    CV is vectorised once and scored against every saved search with one
+    sparse product, so keeping inboxes current costs O(new CVs).
+
+    Layout under `root`: `searches.json` (definitions, vectors, read
+    cursors) and `inbox/<search_id>.jsonl` (append-only hits).
+    `searches.json` is shared by every worker process: each change locks
+    it, reloads it if another process changed it, and saves, and reads
+    reload it when it has changed.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.inbox_dir = os.path.join(root, "inbox")
+        if not os.path.exists(self.inbox_dir):
+            os.makedirs(self.inbox_dir)
+        self.path = os.path.join(root, "searches.json")
+        self.lock = threading.Lock()
+        self.vectorizer = HashingVectorizer(n_features=2 ** 18, stop_words='english', alternate_sign=False, norm='l2')
+        # Same hashed space, fed the AnalyzedDocument's tokens instead of re-tokenising the CV
+        self.token_vectorizer = HashingVectorizer(n_features=2 ** 18, analyzer=_pretokenized,
+                                                  alternate_sign=False, norm='l2')
+        self.searches = {}
+        # Identity of the file version `searches` holds; another process's save changes it
+        self._stamp = None
+        self._rebuild_matrix()
+        with self.lock:
+            self._refresh()
+        print(f"🔖 Loaded {len(self.searches)} saved searches")
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self):
+        """Reload the searches if the file changed since this process last read or wrote it; caller holds the lock"""
+        if self._file_stamp() == self._stamp:
+            return
+        searches, stamp = {}, None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stat = os.fstat(f.fileno())
+                searches = json.load(f)
+            stamp = stat.st_ino, stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            pass
+        self.searches = searches
+        self._stamp = stamp
+        self._rebuild_matrix()
+
+    def _rebuild_matrix(self):
+        self.order = list(self.searches)
+        rows = [self._vector_from_json(self.searches[search_id]['vector']) for search_id in self.order]
+        self.matrix = sparse.vstack(rows).tocsr() if rows else None
+
+    def _vector_from_json(self, vector):
+        return sparse.csr_matrix((vector['values'], vector['indices'], [0, len(vector['indices'])]),
+                                 shape=(1, self.vectorizer.n_features))
+
+    def _save(self):
+        # Write then rename so a crash never leaves a truncated file
+        fd, tmp_path = tempfile.mkstemp(dir=self.root)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.searches, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._stamp = self._file_stamp()
+
+    def _inbox_path(self, search_id):
+        return os.path.join(self.inbox_dir, f"{search_id}.jsonl")
+
+    def create(self, name, job_description, threshold=75):
+        """Save a search; `threshold` is the minimum match score in percent"""
+        vector = self.vectorizer.transform([job_description])
+        search = {
+            'id': str(uuid.uuid4()),
+            'name': name or job_description[:60],
+            'job_description': job_description,
+            'threshold': threshold,
+            'created_at': time.time(),
+            'vector': {'indices': vector.indices.tolist(), 'values': vector.data.tolist()},
+            'unread': 0,
+            'read_offset': 0,
+        }
+        with self.lock, file_lock(self.path):
+            self._refresh()
+            self.searches[search['id']] = search
+            self._save()
+            self._rebuild_matrix()
+        print(f"🔖 Saved search '{search['name']}'")
+        return self.describe(search)
+
+    def delete(self, search_id):
+        with self.lock, file_lock(self.path):
+            self._refresh()
+            if self.searches.pop(search_id, None) is None:
+                return False
+            self._save()
+            self._rebuild_matrix()
+        try:
+            os.remove(self._inbox_path(search_id))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def describe(self, search):
+        """Public view of a saved search, without its vector"""
+        return {
+            'id': search['id'],
+            'name': search['name'],
+            'job_description': search['job_description'],
+            'threshold': search['threshold'],
+            'created_at': search['created_at'],
+            'unread': search['unread'],
+        }
+
+    def list(self):
+        with self.lock:
+            self._refresh()
+            return [self.describe(search) for search in self.searches.values()]
+
+    def match_new_cv(self, cv_id, text, candidate_name):
+        """Score one newly stored CV (text or AnalyzedDocument) against every saved search; append hits to their inboxes"""
+        with self.lock, file_lock(self.path):
+            self._refresh()
+            if self.matrix is None:
+                return []
+            vector = self.token_vectorizer.transform([as_analyzed(text).tokens])
+            scores = (self.matrix @ vector.T).toarray().ravel()
+            hits = []
+            for search_id, similarity in zip(self.order, scores):
+                search = self.searches[search_id]
+                score = score_to_percent(similarity)
+                if similarity <= 0 or score < search['threshold']:
+                    continue
+                entry = {'cv_id': cv_id, 'candidate_name': candidate_name, 'score': score,
+                         'similarity': round(float(similarity), 4), 'matched_at': time.time()}
+                with open(self._inbox_path(search_id), 'ab') as f:
+                    f.write((json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8'))
+                search['unread'] += 1
+                hits.append(search_id)
+            if hits:
+                self._save()
+        if hits:
+            print(f"📬 {candidate_name} matched {len(hits)} saved searches")
+        return hits
+
+    def inbox(self, search_id, unread_only=True, mark_read=True):
+        """Inbox entries, oldest first.
+
+        Unread entries are read by seeking to the stored byte offset, so a
+        check costs O(new hits) however long the inbox has grown.
+        """
+        with self.lock, file_lock(self.path):
+            self._refresh()
+            search = self.searches.get(search_id)
+            if search is None:
+                return None
+            entries = []
+            end = search['read_offset']
+            if os.path.exists(self._inbox_path(search_id)):
+                with open(self._inbox_path(search_id), 'rb') as f:
+                    f.seek(search['read_offset'] if unread_only else 0)
+                    for line in f:
+                        entries.append(json.loads(line.decode('utf-8')))
+                    end = f.tell()
+            if mark_read and (search['read_offset'] != end or search['unread']):
+                search['read_offset'] = end
+                search['unread'] = 0
+                self._save()
+        return entries
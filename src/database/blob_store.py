@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zlib
+
+# zstd compresses CV text better and faster, but is optional
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZLIB_CODEC = b'Z'
+ZSTD_CODEC = b'S'
+
+
+class BlobStore:
+    """Content-addressed, compressed storage for bulky CV fields.
+
+    Payloads are JSON dicts; the blob id is the SHA-256 of the encoded
+    payload, so identical payloads are stored once. Each file starts with
+    a one-byte codec marker (zstd when `zstandard` is installed, otherwise
+    zlib) and lives under `<root>/<id[:2]>/<id>`.
+    """
+
+    def __init__(self, root, level=6):
+        self.root = root
+        self.level = level
+        if not os.path.exists(root):
+            os.makedirs(root)
+
+    def _path(self, blob_id):
+        return os.path.join(self.root, blob_id[:2], blob_id)
+
+    def _compress(self, raw):
+        if zstandard is not None:
+            return ZSTD_CODEC + zstandard.ZstdCompressor(level=self.level).compress(raw)
+        return ZLIB_CODEC + zlib.compress(raw, self.level)
+
+    def _decompress(self, data):
+        codec, body = data[:1], data[1:]
+        if codec == ZSTD_CODEC:
+            if zstandard is None:
+                raise RuntimeError("Blob is zstd-compressed but zstandard is not installed")
+            return zstandard.ZstdDecompressor().decompress(body)
+        return zlib.decompress(body)
+
+    def put(self, payload):
+        raw = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        blob_id = hashlib.sha256(raw).hexdigest()
+        path = self._path(blob_id)
+        if not os.path.exists(path):
+            directory = os.path.dirname(path)
+            if not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            # Write then rename so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._compress(raw))
+            os.replace(tmp_path, path)
+        return blob_id
+
+    def get(self, blob_id):
+        with open(self._path(blob_id), 'rb') as f:
+            return json.loads(self._decompress(f.read()).decode('utf-8'))
+
+    def size(self, blob_id):
+        return os.path.getsize(self._path(blob_id))
+
+    def delete(self, blob_id):
+        try:
+            os.remove(self._path(blob_id))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root)
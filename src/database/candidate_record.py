@@ -0,0 +1,235 @@
+import re
+import sys
+import threading
+from array import array
+
+# Strings the extractors use when a field was not found
+PLACEHOLDERS = {
+    '', 'Candidate', 'Unknown Candidate', 'Email in CV', 'Phone in CV', 'Address in CV', 'Location in CV',
+    'Professional Role', 'Experience in CV', 'Company in CV', 'Education in CV', 'University in CV',
+    'Qualifications in CV', 'Technical Skills',
+}
+
+# Shown by the profile page when a field is missing
+DISPLAY_DEFAULTS = {
+    'name': 'Unknown Candidate',
+    'email': 'Email in CV',
+    'phone': 'Phone in CV',
+    'location': 'Location in CV',
+    'current_role': 'Professional Role',
+    'experience': 'Experience in CV',
+    'current_company': 'Company in CV',
+}
+
+# A number needs a unit: '5 years', '3+ yrs', '2 years 6 months' or '18 months'
+_EXPERIENCE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*\+?\s*(?:(?:years?|yrs?)\b(?:\W+(?:and\s+)?(\d+)\s*(?:months?|mos?)\b)?|(months?|mos?)\b)', re.IGNORECASE)
+_YEAR_PATTERN = re.compile(r'\b(19[5-9]\d|20\d{2})\b')
+_EMAIL_PATTERN = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+_NON_DIGITS = re.compile(r'\D')
+# Phone numbers are compared on their last digits so country codes and trunk zeros don't matter
+PHONE_KEY_DIGITS = 9
+
+
+def clean_value(value):
+    """Stored string or None when missing/placeholder"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value in PLACEHOLDERS:
+        return None
+    return value
+
+
+def parse_experience_years(value):
+    """Years as float from a number or text such as '5 years', '3+ yrs', '18 months'; anything else -> None"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if value >= 0 else None
+    value = clean_value(value)
+    if not value:
+        return None
+    match = _EXPERIENCE_PATTERN.search(value)
+    if not match:
+        return None
+    amount, extra_months, months_unit = match.groups()
+    years = float(amount) / 12 if months_unit else float(amount) + int(extra_months or 0) / 12
+    years = round(years, 2)
+    return years if years < 70 else None
+
+
+def parse_year(value):
+    """First plausible calendar year in the value, as int, or None"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value if 1950 <= value <= 2099 else None
+    value = clean_value(value)
+    if not value:
+        return None
+    match = _YEAR_PATTERN.search(value)
+    return int(match.group(1)) if match else None
+
+
+def normalise_email(value):
+    """Lower-cased email address for lookups, or None when missing or not an address"""
+    value = clean_value(value)
+    if not value:
+        return None
+    value = value.lower()
+    return value if _EMAIL_PATTERN.fullmatch(value) else None
+
+
+def normalise_phone(value):
+    """Last PHONE_KEY_DIGITS digits, so '+44 20 7946 0958' and '020 7946 0958' match; None if too short"""
+    value = clean_value(value)
+    if not value:
+        return None
+    digits = _NON_DIGITS.sub('', value)
+    return digits[-PHONE_KEY_DIGITS:] if len(digits) >= 7 else None
+
+
+class SkillVocabulary:
+    """Interns skill names to small integer ids, case-insensitively"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = {}
+        self.names = []
+
+    def intern(self, name):
+        key = name.strip().lower()
+        skill_id = self.ids.get(key)
+        if skill_id is None:
+            with self.lock:
+                skill_id = self.ids.get(key)
+                if skill_id is None:
+                    skill_id = len(self.names)
+                    self.names.append(sys.intern(name.strip()))
+                    self.ids[key] = skill_id
+        return skill_id
+
+    def lookup(self, name):
+        return self.ids.get(name.strip().lower())
+
+    def encode(self, csv_value):
+        """Comma-separated skills -> array of unique ids in first-seen order"""
+        ids = array('I')
+        seen = set()
+        for name in str(csv_value or '').split(','):
+            if clean_value(name) is None:
+                continue
+            skill_id = self.intern(name)
+            if skill_id not in seen:
+                seen.add(skill_id)
+                ids.append(skill_id)
+        return ids
+
+    def decode(self, ids):
+        return [self.names[skill_id] for skill_id in ids]
+
+
+SKILLS = SkillVocabulary()
+
+
+def _intern(value):
+    value = clean_value(value)
+    return sys.intern(value) if value is not None else None
+
+
+class CandidateRecord:
+    """Compact, typed view of a stored CV's metadata.
+
+    Missing values are None rather than placeholder strings, skills are
+    arrays of interned ids, and experience/graduation year are numbers.
+    Attribute names follow the metadata keys so templates can use a
+    record wherever they used the metadata dict.
+    """
+
+    __slots__ = ('cv_id', 'candidate_name', 'email', 'phone', 'location', 'current_role', 'current_company',
+                 'experience_years', 'graduation_year', 'skill_ids', 'language_ids', 'framework_ids',
+                 'database_ids', 'cloud_ids', 'blob_id')
+
+    def __init__(self, cv_id, candidate_name=None, email=None, phone=None, location=None, current_role=None,
+                 current_company=None, experience_years=None, graduation_year=None, skill_ids=None,
+                 language_ids=None, framework_ids=None, database_ids=None, cloud_ids=None, blob_id=None):
+        self.cv_id = cv_id
+        self.candidate_name = candidate_name
+        self.email = email
+        self.phone = phone
+        self.location = location
+        self.current_role = current_role
+        self.current_company = current_company
+        self.experience_years = experience_years
+        self.graduation_year = graduation_year
+        self.skill_ids = skill_ids if skill_ids is not None else array('I')
+        self.language_ids = language_ids if language_ids is not None else array('I')
+        self.framework_ids = framework_ids if framework_ids is not None else array('I')
+        self.database_ids = database_ids if database_ids is not None else array('I')
+        self.cloud_ids = cloud_ids if cloud_ids is not None else array('I')
+        self.blob_id = blob_id
+
+    @classmethod
+    def from_metadata(cls, cv_id, metadata):
+        metadata = metadata or {}
+        return cls(
+            cv_id,
+            candidate_name=clean_value(metadata.get('candidate_name')),
+            email=clean_value(metadata.get('email')),
+            phone=clean_value(metadata.get('phone')),
+            location=_intern(metadata.get('location')),
+            current_role=_intern(metadata.get('current_role')),
+            current_company=_intern(metadata.get('current_company')),
+            experience_years=parse_experience_years(metadata.get('experience_years', metadata.get('experience'))),
+            graduation_year=parse_year(metadata.get('graduation_year')),
+            skill_ids=SKILLS.encode(metadata.get('skills')),
+            language_ids=SKILLS.encode(metadata.get('programming_languages')),
+            framework_ids=SKILLS.encode(metadata.get('frameworks')),
+            database_ids=SKILLS.encode(metadata.get('databases')),
+            cloud_ids=SKILLS.encode(metadata.get('cloud_platforms')),
+            blob_id=metadata.get('blob_id') or None,
+        )
+
+    @property
+    def skills(self):
+        return SKILLS.decode(self.skill_ids)
+
+    @property
+    def experience(self):
+        if self.experience_years is None:
+            return None
+        return f"{self.experience_years:g} years"
+
+    def to_profile_details(self, blob_fields):
+        """The candidate_details dict candidate_profile.html renders"""
+        details = {
+            'name': self.candidate_name,
+            'email': self.email,
+            'phone': self.phone,
+            'location': self.location,
+            'current_role': self.current_role,
+            'experience': self.experience,
+            'current_company': self.current_company,
+        }
+        details = {key: value if value is not None else DISPLAY_DEFAULTS[key] for key, value in details.items()}
+        details.update({
+            'address': blob_fields.get('address', 'Address in CV'),
+            'education': blob_fields.get('education', 'Education details in CV'),
+            'summary': blob_fields.get('summary', 'Professional with technical expertise'),
+            'programming_languages': ', '.join(SKILLS.decode(self.language_ids)),
+            'frameworks': ', '.join(SKILLS.decode(self.framework_ids)),
+            'databases': ', '.join(SKILLS.decode(self.database_ids)),
+            'cloud_platforms': ', '.join(SKILLS.decode(self.cloud_ids)),
+        })
+        return details
+
+    def to_dict(self):
+        """JSON-friendly form for API responses"""
+        return {
+            'cv_id': self.cv_id,
+            'candidate_name': self.candidate_name,
+            'email': self.email,
+            'phone': self.phone,
+            'location': self.location,
+            'current_role': self.current_role,
+            'current_company': self.current_company,
+            'experience_years': self.experience_years,
+            'graduation_year': self.graduation_year,
+            'skills': self.skills,
+        }
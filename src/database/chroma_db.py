@@ -1,22 +1,60 @@
 import chromadb
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import uuid
 import os
+from config import CV_DATABASE_DIR, SEARCH_CHUNK_ROWS, PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL_S
+from src.database.blob_store import BlobStore
+from src.database.candidate_record import (CandidateRecord, parse_experience_years, parse_year, normalise_email,
+                                           normalise_phone)
+from src.database.range_index import RangeIndex
+from src.database.key_index import KeyIndex
+from src.database.profile_cache import ProfileCache
+from src.database.search_index import SearchIndexCache
+from src.database.corpus_analytics import CorpusAnalytics
+from src.utils.shared_version import SharedVersion
+
+# Bulky fields only the profile page renders; kept out of Chroma metadata
+BLOB_FIELDS = ('raw_text', 'summary', 'education', 'address')
+
+# Numeric fields with range indexes, and how to read them from older string records
+RANGE_FIELDS = {
+    'experience_years': lambda metadata: parse_experience_years(metadata.get('experience_years', metadata.get('experience'))),
+    'graduation_year': lambda metadata: parse_year(metadata.get('graduation_year')),
+}
+
+# Contact fields with exact-match key indexes, and how to normalise them
+KEY_FIELDS = {
+    'email': lambda metadata: normalise_email(metadata.get('email')),
+    'phone': lambda metadata: normalise_phone(metadata.get('phone')),
+}
+KEY_NORMALISERS = {'email': normalise_email, 'phone': normalise_phone}
+
+# TF-IDF cosine below this is not a meaningful match
+SIMILARITY_THRESHOLD = 0.15
+
+
+def score_to_percent(similarity):
+    """Map a 0-1 relevance onto the 65-95% range shown to users"""
+    return max(65, min(95, int(65 + similarity * 30)))
+
 
 class ChromaDB:
-    def __init__(self):
+    def __init__(self, recount_analytics=True):
+        """Open the collection and its derived indexes.
+
+        With `recount_analytics`, stored analytics that are missing or out of
+        step with the collection are recounted on the spot. Pass False to
+        leave them as stored, e.g. to measure their drift first.
+        """
         try:
             # Create data directory if it doesn't exist
-            data_dir = "./cv_database"
+            data_dir = CV_DATABASE_DIR
             if not os.path.exists(data_dir):
                 os.makedirs(data_dir)
             
             # Use PersistentClient for permanent storage
             self.client = chromadb.PersistentClient(path=data_dir)
             self.collection = self.client.get_or_create_collection("employee_cvs")
-            self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
             print("✅ ChromaDB PersistentClient initialized - Data will be saved")
         except Exception as e:
             print(f"❌ ChromaDB init failed: {e}")
@@ -24,24 +62,60 @@ class ChromaDB:
             try:
                 self.client = chromadb.EphemeralClient()
                 self.collection = self.client.create_collection("employee_cvs")
-                self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
                 print("⚠️ Using EphemeralClient (data will be lost on restart)")
             except:
                 raise Exception("Database initialization failed")
+        self.blobs = BlobStore(os.path.join(CV_DATABASE_DIR, "blobs"))
+        self.range_indexes = None
+        self.key_indexes = None
+        # Bumped by every record write in any worker process; the range and key indexes are rebuilt once it moves past them
+        self.records_version = SharedVersion(os.path.join(CV_DATABASE_DIR, "records_version"))
+        self.range_indexes_version = None
+        self.key_indexes_version = None
+        # Whether collection.update deletes keys given None values; chromadb 0.4 rejects them
+        self.update_deletes_keys = True
+        self.profiles = ProfileCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL_S)
+        self.search_index = SearchIndexCache(self._load_corpus, os.path.join(CV_DATABASE_DIR, "search_index"),
+                                             self.get_cv_count, self._iter_corpus)
+        self.analytics = CorpusAnalytics(os.path.join(CV_DATABASE_DIR, "analytics.json"))
+        # Missing or out of step with the collection (e.g. a crash between writes): recount once
+        if recount_analytics and (not self.analytics.loaded or self.analytics.total != self.get_cv_count()):
+            self.rebuild_analytics()
+        self.search_index.warm_start()
         
+    def _prepare_metadata(self, metadata):
+        """Chroma-safe metadata: bulky fields moved to a blob, None dropped, numbers kept"""
+        safe_metadata = {}
+        heavy_fields = {}
+        for key, value in metadata.items():
+            if value is None:
+                continue
+            if key in BLOB_FIELDS:
+                heavy_fields[key] = str(value)
+            elif isinstance(value, (int, float, bool)):
+                # Numbers stay numbers so range filters need no re-parsing
+                safe_metadata[key] = value
+            else:
+                safe_metadata[key] = str(value)
+        if heavy_fields:
+            safe_metadata['blob_id'] = self.blobs.put(heavy_fields)
+        return safe_metadata
+
     def add_cv(self, text, metadata):
         try:
             cv_id = str(uuid.uuid4())
-            
-            safe_metadata = {}
-            for key, value in metadata.items():
-                safe_metadata[key] = str(value)
+            safe_metadata = self._prepare_metadata(metadata)
             
             self.collection.add(
                 documents=[text],
                 metadatas=[safe_metadata],
                 ids=[cv_id]
             )
+            self._index_ranges(cv_id, safe_metadata)
+            self._index_keys(cv_id, safe_metadata)
+            self._record_write()
+            self.analytics.add([safe_metadata])
+            self.search_index.invalidate()
             print(f"✅ CV stored permanently: {metadata['candidate_name']}")
             return cv_id
             
@@ -49,60 +123,78 @@ class ChromaDB:
             print(f"❌ Failed to store CV: {e}")
             raise Exception(f"Database storage failed: {str(e)}")
     
-    def search_similar(self, query, n_results=5):
+    def _load_corpus(self):
+        all_docs = self.collection.get(include=['documents'])
+        return all_docs['ids'], all_docs['documents']
+
+    def _iter_corpus(self):
+        """(ids, documents) pages of SEARCH_CHUNK_ROWS records, for fitting without the whole corpus in memory"""
+        for page in self.iter_pages(batch_size=SEARCH_CHUNK_ROWS or 500, include=('documents',)):
+            yield page['ids'], page['documents']
+
+    def retrieve_batch(self, queries, n_candidates, candidate_ids=None):
+        """First search stage for many queries at once.
+
+        Every query is scored against the cached TF-IDF index in one sparse
+        product. Returns, per query, the best `n_candidates` above the
+        similarity threshold as {'ids', 'documents', 'similarities'}, best first.
+        """
+        empty = {'ids': [], 'documents': [], 'similarities': np.zeros(0)}
+        if candidate_ids is not None and not candidate_ids:
+            return [dict(empty) for _ in queries]
+        index = self.search_index.get()
+        
+        print(f"📊 Database contains: {len(index)} CVs")
+        
+        if not len(index):
+            print("❌ No CVs found in database")
+            return [dict(empty) for _ in queries]
+        
+        rows = None
+        if candidate_ids is not None:
+            rows = [index.row_of[cv_id] for cv_id in candidate_ids if cv_id in index.row_of]
+        ranked = index.top_k(queries, n_candidates, SIMILARITY_THRESHOLD, rows)
+        
+        # Only the shortlisted texts are needed (for the reranker); fetch them in one call
+        shortlisted = sorted({index.ids[row] for row_indices, _ in ranked for row in row_indices})
+        documents = {}
+        if shortlisted:
+            found = self.collection.get(ids=shortlisted, include=['documents'])
+            documents = dict(zip(found['ids'], found['documents']))
+        
+        results = []
+        for row_indices, sims in ranked:
+            # An index still being refitted may list CVs deleted since; skip them
+            keep = [n for n, row in enumerate(row_indices) if index.ids[row] in documents]
+            ids = [index.ids[row_indices[n]] for n in keep]
+            results.append({'ids': ids, 'documents': [documents[cv_id] for cv_id in ids], 'similarities': sims[keep]})
+        return results
+
+    def retrieve(self, query, n_candidates, candidate_ids=None):
+        """First search stage for one query; see retrieve_batch"""
+        print(f"🔍 Searching for: '{query[:50]}...'")
+        retrieved = self.retrieve_batch([query], n_candidates, candidate_ids)[0]
+        if not retrieved['ids']:
+            print("❌ No meaningful matches found")
+        return retrieved
+
+    def search_similar(self, query, n_results=5, candidate_ids=None):
         try:
-            all_docs = self.collection.get()
-            
-            print(f"📊 Database contains: {len(all_docs['documents'])} CVs")
-            
-            if not all_docs['documents']:
-                print("❌ No CVs found in database")
+            retrieved = self.retrieve(query, n_results, candidate_ids)
+            if not retrieved['ids']:
                 return {'documents': [[]], 'metadatas': [[]], 'distances': [[]], 'ids': [[]]}
             
-            documents = all_docs['documents']
-            metadatas = all_docs['metadatas']
-            ids = all_docs['ids']
-            
-            print(f"🔍 Searching for: '{query[:50]}...'")
-            
-            # Use TF-IDF for similarity matching
-            all_texts = documents + [query]
-            tfidf_matrix = self.vectorizer.fit_transform(all_texts)
-            
-            doc_vectors = tfidf_matrix[:-1]
-            query_vector = tfidf_matrix[-1]
-            
-            # Calculate cosine similarities
-            similarities = cosine_similarity(query_vector, doc_vectors).flatten()
-            
-            # Filter out very low similarities (below threshold) - STRICTER FILTERING
-            threshold = 0.15  # Increased threshold to 15% for better matches
-            valid_indices = [i for i, sim in enumerate(similarities) if sim > threshold]
-            
-            if not valid_indices:
-                print("❌ No meaningful matches found")
-                return {'documents': [[]], 'metadatas': [[]], 'distances': [[]], 'ids': [[]]}
-            
-            # Get top N results from valid matches
-            valid_similarities = [similarities[i] for i in valid_indices]
-            top_indices = [valid_indices[i] for i in np.argsort(valid_similarities)[::-1][:n_results]]
-            
-            result_documents = [documents[i] for i in top_indices]
-            result_metadatas = [metadatas[i] for i in top_indices]
-            result_ids = [ids[i] for i in top_indices]
+            result_documents = retrieved['documents']
+            result_ids = retrieved['ids']
+            result_metadatas = self.get_metadatas(result_ids)
             
             # Convert to realistic percentage scores (only for meaningful matches)
-            result_scores = []
-            for sim in [similarities[i] for i in top_indices]:
-                score = 65 + (sim * 30)  # Map to 65-95% (more realistic range)
-                score = max(65, min(95, int(score)))
-                result_scores.append(score)
+            result_scores = [score_to_percent(sim) for sim in retrieved['similarities']]
             
-            print(f"🎯 Found {len(top_indices)} meaningful matches with scores: {result_scores}")
+            print(f"🎯 Found {len(result_ids)} meaningful matches with scores: {result_scores}")
             
             for i, (metadata, score, cv_id) in enumerate(zip(result_metadatas, result_scores, result_ids)):
                 candidate_name = metadata.get('candidate_name', 'Unknown')
-                skills = metadata.get('skills', 'No skills')
                 print(f"   {i+1}. {candidate_name} - {score}% - ID: {cv_id}")
             
             return {
@@ -116,9 +208,115 @@ class ChromaDB:
             print(f"❌ Search failed: {e}")
             return {'documents': [[]], 'metadatas': [[]], 'distances': [[]], 'ids': [[]]}
     
-    def get_all_cvs(self):
+    def _build_range_indexes(self):
+        indexes = {field: RangeIndex(field) for field in RANGE_FIELDS}
+        pairs = {field: [] for field in RANGE_FIELDS}
+        for page in self.iter_pages(include=('metadatas',)):
+            for cv_id, metadata in zip(page['ids'], page['metadatas']):
+                for field, read in RANGE_FIELDS.items():
+                    pairs[field].append((cv_id, read(metadata or {})))
+        for field, index in indexes.items():
+            index.load(pairs[field])
+        print("📐 Range indexes built: " + ", ".join(f"{field}={len(index)}" for field, index in indexes.items()))
+        return indexes
+
+    def get_range_indexes(self):
+        """Range indexes over RANGE_FIELDS, built from stored metadata on first use
+        and rebuilt when another worker process has written records since"""
+        version = self.records_version.current()
+        if self.range_indexes is None or self.range_indexes_version != version:
+            self.range_indexes = self._build_range_indexes()
+            self.range_indexes_version = version
+        return self.range_indexes
+
+    def _index_ranges(self, cv_id, metadata):
+        if self.range_indexes is None:
+            return
+        for field, read in RANGE_FIELDS.items():
+            self.range_indexes[field].add(cv_id, read(metadata))
+
+    def _build_key_indexes(self):
+        indexes = {field: KeyIndex(field) for field in KEY_FIELDS}
+        pairs = {field: [] for field in KEY_FIELDS}
+        for page in self.iter_pages(include=('metadatas',)):
+            for cv_id, metadata in zip(page['ids'], page['metadatas']):
+                for field, read in KEY_FIELDS.items():
+                    pairs[field].append((cv_id, read(metadata or {})))
+        for field, index in indexes.items():
+            index.load(pairs[field])
+        print("🔑 Key indexes built: " + ", ".join(f"{field}={len(index)}" for field, index in indexes.items()))
+        return indexes
+
+    def get_key_indexes(self):
+        """Email and phone indexes over KEY_FIELDS, built from stored metadata on first use
+        and rebuilt when another worker process has written records since"""
+        version = self.records_version.current()
+        if self.key_indexes is None or self.key_indexes_version != version:
+            self.key_indexes = self._build_key_indexes()
+            self.key_indexes_version = version
+        return self.key_indexes
+
+    def _record_write(self):
+        """Bump the shared records version after this process wrote and indexed records.
+
+        The in-memory indexes were updated in place, so they stay current
+        unless another process wrote in between; then they are rebuilt on next use.
+        """
+        seen = self.records_version.value
+        version = self.records_version.bump()
+        if version == seen + 1:
+            if self.range_indexes_version == seen:
+                self.range_indexes_version = version
+            if self.key_indexes_version == seen:
+                self.key_indexes_version = version
+
+    def _index_keys(self, cv_id, metadata):
+        if self.key_indexes is None:
+            return
+        for field, read in KEY_FIELDS.items():
+            self.key_indexes[field].add(cv_id, read(metadata))
+
+    def _unindex(self, cv_id):
+        for indexes in (self.range_indexes, self.key_indexes):
+            if indexes is not None:
+                for index in indexes.values():
+                    index.remove(cv_id)
+
+    def find_by_key(self, field, value):
+        """Sorted IDs of CVs whose `field` ('email' or 'phone') matches `value` once normalised"""
+        key = KEY_NORMALISERS[field](value)
+        if key is None:
+            return []
+        return sorted(self.get_key_indexes()[field].get(key))
+
+    def find_duplicates(self, metadata):
+        """IDs of stored CVs of the same person: same email, or same phone when the email is unknown"""
+        email = KEY_FIELDS['email'](metadata)
+        if email is not None:
+            return self.find_by_key('email', email)
+        return self.find_by_key('phone', metadata.get('phone'))
+
+    def filter_ids(self, min_experience=None, max_experience=None, min_graduation_year=None, max_graduation_year=None):
+        """IDs satisfying every given inclusive bound, or None when no bound is set"""
+        bounds = {
+            'experience_years': (min_experience, max_experience),
+            'graduation_year': (min_graduation_year, max_graduation_year),
+        }
+        bounds = {field: (lo, hi) for field, (lo, hi) in bounds.items() if lo is not None or hi is not None}
+        if not bounds:
+            return None
+        indexes = self.get_range_indexes()
+        matched = None
+        # Intersect smallest-first so later sets only shrink the result
+        for ids in sorted((indexes[field].range(lo, hi) for field, (lo, hi) in bounds.items()), key=len):
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                break
+        return matched
+
+    def get_all_cvs(self, include=('documents', 'metadatas')):
         try:
-            all_docs = self.collection.get()
+            all_docs = self.collection.get(include=list(include))
             return all_docs
         except Exception as e:
             print(f"❌ Failed to get all CVs: {e}")
@@ -126,16 +324,43 @@ class ChromaDB:
     
     def get_cv_count(self):
         try:
-            all_docs = self.collection.get()
-            return len(all_docs['documents'])
+            return self.collection.count()
         except Exception as e:
             print(f"❌ Failed to get CV count: {e}")
             return 0
 
-    def get_cv_by_id(self, cv_id):
-        """Retrieve a single CV's document and metadata by its ID."""
+    def get_metadatas(self, cv_ids):
+        """Lightweight metadata for the given IDs, in the same order"""
+        if not cv_ids:
+            return []
+        found = self.collection.get(ids=list(cv_ids), include=['metadatas'])
+        by_id = dict(zip(found['ids'], found['metadatas']))
+        return [by_id.get(cv_id, {}) for cv_id in cv_ids]
+
+    def get_documents(self, cv_ids):
+        """Stored (cleaned) CV texts for the given IDs, in the same order; '' for unknown IDs"""
+        if not cv_ids:
+            return []
+        found = self.collection.get(ids=list(cv_ids), include=['documents'])
+        by_id = dict(zip(found['ids'], found['documents']))
+        return [by_id.get(cv_id) or '' for cv_id in cv_ids]
+
+    def load_blob_fields(self, metadata):
+        """Bulky profile fields for a CV; older records still carry them inline"""
+        fields = {key: metadata[key] for key in BLOB_FIELDS if key in metadata}
+        blob_id = metadata.get('blob_id')
+        if blob_id:
+            try:
+                fields.update(self.blobs.get(blob_id))
+            except Exception as e:
+                print(f"❌ Failed to load blob {blob_id}: {e}")
+        return fields
+
+    def get_cv_by_id(self, cv_id, include_document=False):
+        """Retrieve a single CV's metadata (and optionally its document) by its ID."""
         try:
-            doc = self.collection.get(ids=[cv_id])
+            include = ['metadatas', 'documents'] if include_document else ['metadatas']
+            doc = self.collection.get(ids=[cv_id], include=include)
             # chroma's get returns lists; ensure we have content
             if doc and doc.get('ids'):
                 return {
@@ -147,22 +372,220 @@ class ChromaDB:
         except Exception as e:
             print(f"❌ Failed to get CV by id {cv_id}: {e}")
             return None
+
+    def get_profile(self, cv_id):
+        """Decoded profile of one CV for the profile page, from the profile cache when possible.
+
+        Returns {'candidate_details', 'skills', 'raw_text'}, or None if the
+        CV is gone. Treat the result as read-only; it is shared between requests.
+        """
+        return self.profiles.get_or_load(cv_id, self._load_profile)
+
+    def _load_profile(self, cv_id):
+        record = self.get_cv_by_id(cv_id)
+        if not record or not record.get('metadata'):
+            return None
+        metadata = record['metadata']
+        # Bulky text lives in the compressed blob store; only decompressed here
+        blob_fields = self.load_blob_fields(metadata)
+        # Decode into a typed record; missing fields render with their placeholders
+        candidate = CandidateRecord.from_metadata(cv_id, metadata)
+        return {
+            'candidate_details': candidate.to_profile_details(blob_fields),
+            'skills': candidate.skills,
+            'raw_text': blob_fields.get('raw_text', 'CV content preview not available'),
+        }
     
     def delete_cv(self, cv_id):
         try:
+            found = self.collection.get(ids=[cv_id], include=['metadatas'])
+            blob_id = found['metadatas'][0].get('blob_id') if found['metadatas'] else None
             self.collection.delete(ids=[cv_id])
+            self.profiles.invalidate([cv_id])
+            self.search_index.invalidate()
+            self.analytics.remove(found['metadatas'])
+            self._unindex(cv_id)
+            self._record_write()
+            # Blobs are content-addressed; keep it if an identical CV still uses it
+            if blob_id and not self.collection.get(where={'blob_id': blob_id}, include=[])['ids']:
+                self.blobs.delete(blob_id)
             print(f"✅ CV deleted: {cv_id}")
             return True
         except Exception as e:
             print(f"❌ Failed to delete CV: {e}")
             return False
     
+    def iter_pages(self, batch_size=500, include=('documents', 'metadatas'), start=0):
+        """Yield the corpus as successive collection.get() pages of at most batch_size records, from offset `start`"""
+        offset = start
+        while True:
+            page = self.collection.get(limit=batch_size, offset=offset, include=list(include))
+            if not page['ids']:
+                break
+            yield page
+            offset += len(page['ids'])
+
+    def restore_cvs(self, ids, documents, metadatas):
+        """Write one batch of exported records, keeping their IDs; existing IDs are overwritten"""
+        safe_metadatas = [self._prepare_metadata(metadata) for metadata in metadatas]
+        replaced = self.collection.get(ids=list(ids), include=['metadatas'])['metadatas']
+        self.collection.upsert(ids=list(ids), documents=list(documents), metadatas=safe_metadatas)
+        self.profiles.invalidate(ids)
+        for cv_id, safe_metadata in zip(ids, safe_metadatas):
+            self._unindex(cv_id)
+            self._index_ranges(cv_id, safe_metadata)
+            self._index_keys(cv_id, safe_metadata)
+        self._record_write()
+        self.analytics.remove(replaced)
+        self.analytics.add(safe_metadatas)
+        return len(safe_metadatas)
+
+    def update_metadatas(self, ids, metadatas):
+        """Replace the metadata of stored CVs in place, keeping their documents and embeddings.
+
+        Range indexes, analytics and cached profiles follow the change. The
+        search index is left alone since the text is unchanged. Returns how many were updated.
+        """
+        found = self.collection.get(ids=list(ids), include=['metadatas'])
+        old_by_id = dict(zip(found['ids'], found['metadatas']))
+        pairs = [(cv_id, metadata) for cv_id, metadata in zip(ids, metadatas) if cv_id in old_by_id]
+        if not pairs:
+            return 0
+        update_ids = [cv_id for cv_id, _ in pairs]
+        safe_metadatas = [self._prepare_metadata(metadata) for _, metadata in pairs]
+        old_metadatas = [old_by_id[cv_id] or {} for cv_id in update_ids]
+        self._overwrite_metadatas(update_ids, safe_metadatas, old_metadatas)
+        self.profiles.invalidate(update_ids)
+        
+        self.analytics.remove(old_metadatas)
+        self.analytics.add(safe_metadatas)
+        for cv_id, safe_metadata in zip(update_ids, safe_metadatas):
+            self._unindex(cv_id)
+            self._index_ranges(cv_id, safe_metadata)
+            self._index_keys(cv_id, safe_metadata)
+        self._record_write()
+        # Blobs are content-addressed; drop replaced ones nothing references any more
+        new_blob_ids = {metadata.get('blob_id') for metadata in safe_metadatas}
+        for blob_id in {metadata.get('blob_id') for metadata in old_metadatas} - new_blob_ids:
+            if blob_id and not self.collection.get(where={'blob_id': blob_id}, include=[])['ids']:
+                self.blobs.delete(blob_id)
+        return len(update_ids)
+
+    def _overwrite_metadatas(self, ids, metadatas, old_metadatas):
+        """Replace whole metadata records; returns how many had to be re-added.
+
+        collection.update merges metadata, so keys the new records lack are
+        deleted with None values. chromadb 0.4 rejects those before writing
+        anything; there, records that lose keys are deleted and re-added
+        with their documents and embeddings. Re-added records move to the
+        end of the collection's paging order.
+        """
+        dropped = [[key for key in old if key not in metadata] for metadata, old in zip(metadatas, old_metadatas)]
+        if self.update_deletes_keys:
+            updates = [dict(metadata, **{key: None for key in keys}) for metadata, keys in zip(metadatas, dropped)]
+            try:
+                self.collection.update(ids=list(ids), metadatas=updates)
+                return 0
+            except ValueError:
+                self.update_deletes_keys = False
+        self.collection.update(ids=list(ids), metadatas=list(metadatas))
+        rewrite = {cv_id: metadata for cv_id, metadata, keys in zip(ids, metadatas, dropped) if keys}
+        if not rewrite:
+            return 0
+        found = self.collection.get(ids=list(rewrite), include=['documents', 'embeddings', 'metadatas'])
+        self.collection.delete(ids=found['ids'])
+        try:
+            self.collection.add(ids=found['ids'], documents=found['documents'], embeddings=found['embeddings'],
+                                metadatas=[rewrite[cv_id] for cv_id in found['ids']])
+        except Exception:
+            # Put the records back as they were rather than lose them
+            self.collection.add(ids=found['ids'], documents=found['documents'], embeddings=found['embeddings'],
+                                metadatas=found['metadatas'])
+            raise
+        return len(found['ids'])
+
+    def rebuild_indexes(self):
+        """Drop derived in-memory indexes after bulk writes; they rebuild on next use"""
+        self.range_indexes = None
+        self.key_indexes = None
+        self.records_version.bump()
+        self.profiles.clear()
+        self.search_index.invalidate()
+
+    def reparse_experience_years(self, batch_size=100):
+        """Re-derive stored experience_years from each record's experience text; returns how many changed.
+
+        Records written by an older parser may hold a wrong value (e.g. 18
+        for '18 months'). Changes are collected first, then applied with
+        update_metadatas, and the derived indexes are rebuilt afterwards.
+        """
+        updates = []
+        for page in self.iter_pages(batch_size=batch_size, include=('metadatas',)):
+            for cv_id, metadata in zip(page['ids'], page['metadatas']):
+                metadata = metadata or {}
+                if 'experience' not in metadata:
+                    continue
+                years = parse_experience_years(metadata['experience'])
+                if metadata.get('experience_years') != years:
+                    updates.append((cv_id, dict(metadata, experience_years=years)))
+        changed = 0
+        for start in range(0, len(updates), batch_size):
+            batch = updates[start:start + batch_size]
+            changed += self.update_metadatas([cv_id for cv_id, _ in batch], [metadata for _, metadata in batch])
+        self.rebuild_indexes()
+        print(f"✅ Re-parsed experience of {changed} CVs")
+        return changed
+
+    def rebuild_analytics(self):
+        """Recount the analytics from every stored record; returns the counts that had drifted"""
+        pages = (page['metadatas'] for page in self.iter_pages(include=('metadatas',)))
+        drift = self.analytics.rebuild(pages)
+        print(f"📈 Analytics rebuilt over {self.analytics.total} CVs" + (f"; corrected {', '.join(drift)}" if drift else ""))
+        return drift
+
+    def migrate_blob_fields(self, batch_size=100):
+        """Move bulky fields of records stored before the blob store into blobs"""
+        moved = 0
+        offset = 0
+        while True:
+            page = self.collection.get(limit=batch_size, offset=offset, include=['metadatas'])
+            if not page['ids']:
+                break
+            ids, metadatas, old_metadatas = [], [], []
+            for cv_id, metadata in zip(page['ids'], page['metadatas']):
+                heavy_fields = {key: metadata[key] for key in BLOB_FIELDS if key in metadata}
+                if not heavy_fields:
+                    continue
+                light = {key: value for key, value in metadata.items() if key not in BLOB_FIELDS}
+                light['blob_id'] = self.blobs.put(heavy_fields)
+                ids.append(cv_id)
+                metadatas.append(light)
+                old_metadatas.append(metadata)
+            readded = 0
+            if ids:
+                readded = self._overwrite_metadatas(ids, metadatas, old_metadatas)
+                self.profiles.invalidate(ids)
+                moved += len(ids)
+            # Re-added records left this page for the end, pulling the rest forward; they have no inline fields now
+            offset += len(page['ids']) - readded
+        print(f"✅ Moved bulky fields of {moved} CVs into the blob store")
+        return moved
+    
     def clear_database(self):
         try:
-            all_docs = self.collection.get()
+            all_docs = self.collection.get(include=[])
             if all_docs['ids']:
                 self.collection.delete(ids=all_docs['ids'])
                 print("✅ Database cleared successfully")
+            self.blobs.clear()
+            self.profiles.clear()
+            self.search_index.invalidate()
+            self.analytics.clear()
+            for indexes in (self.range_indexes, self.key_indexes):
+                if indexes is not None:
+                    for index in indexes.values():
+                        index.clear()
+            self._record_write()
             return True
         except Exception as e:
             print(f"❌ Failed to clear database: {e}")
@@ -0,0 +1,219 @@
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from src.database.candidate_record import SKILLS, SkillVocabulary, clean_value, parse_experience_years
+from src.database.prefix_index import PrefixIndex
+from src.utils.file_lock import file_lock
+
+# Trailing words of an autocomplete query tried as the prefix, longest first
+SUGGEST_MAX_WORDS = 4
+
+# Upper bounds (exclusive) of the experience histogram bands, in years
+EXPERIENCE_BANDS = ((2, '0-2'), (5, '2-5'), (10, '5-10'), (15, '10-15'), (float('inf'), '15+'))
+UNKNOWN = 'Unknown'
+# Job titles, interned case-insensitively like skills
+ROLES = SkillVocabulary()
+
+
+def experience_band(metadata):
+    years = parse_experience_years(metadata.get('experience_years', metadata.get('experience')))
+    if years is None:
+        return UNKNOWN
+    for upper, label in EXPERIENCE_BANDS:
+        if years < upper:
+            return label
+
+
+def role_name(metadata):
+    """Canonical (first-seen casing) name of the CV's current role, or None"""
+    role = clean_value(metadata.get('current_role'))
+    return ROLES.names[ROLES.intern(' '.join(role.split()))] if role else None
+
+
+def skill_names(metadata):
+    """Canonical (first-seen casing) names of the CV's skills, each once"""
+    return [SKILLS.names[skill_id] for skill_id in SKILLS.encode(metadata.get('skills'))]
+
+
+class CorpusAnalytics:
+    """Materialised counts of skills, roles, locations and experience bands.
+
+    ChromaDB applies every add/delete to these counters, so reads never
+    scan the collection. The file at `path` is the shared copy: every
+    write locks it across processes, reloads it if another process (e.g.
+    another gunicorn worker) changed it, applies the change and saves, so
+    no worker overwrites another's counts. Reads reload it when it has
+    changed. `rebuild()` recomputes the counts from scratch.
+    `suggestions` is a prefix index over the skill and role counts, kept
+    in step with them, that backs search autocomplete.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.total = 0
+        self.skills = Counter()
+        self.roles = Counter()
+        self.locations = Counter()
+        self.experience = Counter()
+        self.suggestions = PrefixIndex()
+        self._snapshot = None
+        # Identity of the file version the counters hold; another process's save changes it
+        self._stamp = None
+        self.loaded = False
+        with self.lock:
+            state = self._refresh()
+        # Files from before role counts were kept are recounted once
+        self.loaded = state is not None and 'roles' in state
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self):
+        """Reload the counters if the file changed since this process last read or wrote it; returns the loaded state"""
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"❌ Failed to load analytics from {self.path}: {e}")
+            return None
+        self._set_state(state)
+        self._stamp = stamp
+        return state
+
+    def _set_state(self, state):
+        self.total = state.get('total', 0)
+        self.skills = Counter(state.get('skills', {}))
+        self.roles = Counter(state.get('roles', {}))
+        self.locations = Counter(state.get('locations', {}))
+        self.experience = Counter(state.get('experience', {}))
+        suggestions = PrefixIndex()
+        for kind, counter in (('skill', self.skills), ('role', self.roles)):
+            for name, count in counter.items():
+                suggestions.add(kind, name, count)
+        self.suggestions = suggestions
+        self._snapshot = None
+
+    def state(self):
+        return {
+            'total': self.total,
+            'skills': dict(self.skills),
+            'roles': dict(self.roles),
+            'locations': dict(self.locations),
+            'experience': dict(self.experience),
+        }
+
+    def _apply(self, metadata, sign):
+        metadata = metadata or {}
+        self.total += sign
+        for name in skill_names(metadata):
+            self.skills[name] += sign
+            if self.suggestions is not None:
+                self.suggestions.add('skill', name, sign)
+        role = role_name(metadata)
+        if role:
+            self.roles[role] += sign
+            if self.suggestions is not None:
+                self.suggestions.add('role', role, sign)
+        self.locations[clean_value(metadata.get('location')) or UNKNOWN] += sign
+        self.experience[experience_band(metadata)] += sign
+        self._snapshot = None
+
+    def add(self, metadatas):
+        with self.lock, file_lock(self.path):
+            self._refresh()
+            for metadata in metadatas:
+                self._apply(metadata, 1)
+            self._save()
+
+    def remove(self, metadatas):
+        with self.lock, file_lock(self.path):
+            self._refresh()
+            for metadata in metadatas:
+                self._apply(metadata, -1)
+            # Drop keys that reached zero so the counters don't grow forever
+            for counter in (self.skills, self.roles, self.locations, self.experience):
+                for key in [key for key, count in counter.items() if count <= 0]:
+                    del counter[key]
+            self._save()
+
+    def clear(self):
+        with self.lock, file_lock(self.path):
+            self._set_state({})
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.state(), f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._stamp = self._file_stamp()
+
+    def rebuild(self, pages):
+        """Recompute from `pages` of metadata; returns the keys whose counts differed"""
+        fresh = CorpusAnalytics.__new__(CorpusAnalytics)
+        fresh.total = 0
+        fresh.skills, fresh.roles, fresh.locations, fresh.experience = Counter(), Counter(), Counter(), Counter()
+        # Built once from the final counts by _set_state below
+        fresh.suggestions = None
+        for metadatas in pages:
+            for metadata in metadatas:
+                fresh._apply(metadata, 1)
+        with self.lock, file_lock(self.path):
+            self._refresh()
+            current, rebuilt = self.state(), fresh.state()
+            drift = {'total': (current['total'], rebuilt['total'])} if current['total'] != rebuilt['total'] else {}
+            for group in ('skills', 'roles', 'locations', 'experience'):
+                keys = set(current[group]) | set(rebuilt[group])
+                changed = {key: (current[group].get(key, 0), rebuilt[group].get(key, 0))
+                           for key in keys if current[group].get(key, 0) != rebuilt[group].get(key, 0)}
+                if changed:
+                    drift[group] = changed
+            self._set_state(rebuilt)
+            self._save()
+            self.loaded = True
+        return drift
+
+    def suggest(self, query, limit=8, kind=None):
+        """Autocomplete for the text being typed: (matched words, [(name, kind, CV count)]).
+
+        Tries the last SUGGEST_MAX_WORDS words of `query` as the prefix, then
+        fewer, so "python and machine le" completes "machine le" to
+        "machine learning". The matched words are what a pick replaces.
+        """
+        with self.lock:
+            self._refresh()
+        words = str(query or '').split()[-SUGGEST_MAX_WORDS:]
+        for start in range(len(words)):
+            prefix = ' '.join(words[start:])
+            matches = self.suggestions.top(prefix, limit, kind)
+            if matches:
+                return prefix, matches
+        return '', []
+
+    def snapshot(self):
+        """Sorted, JSON-ready view; cached until the next write by any process"""
+        with self.lock:
+            self._refresh()
+            snapshot = self._snapshot
+            if snapshot is None:
+                snapshot = {
+                    'total_cvs': self.total,
+                    'skills': dict(self.skills.most_common()),
+                    'roles': dict(self.roles.most_common()),
+                    'locations': dict(self.locations.most_common()),
+                    'experience_bands': {label: self.experience.get(label, 0)
+                                         for label in [label for _, label in EXPERIENCE_BANDS] + [UNKNOWN]},
+                }
+                self._snapshot = snapshot
+        return snapshot
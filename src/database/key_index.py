@@ -0,0 +1,57 @@
+import threading
+
+
+class KeyIndex:
+    """Hash index from one normalised metadata value to the CVs carrying it.
+
+    `get()` is a dict lookup, so finding a candidate by email or phone
+    costs O(1) instead of a scan over every record. Several CVs can share
+    a key (duplicates stored without upsert, or shared contact details).
+    """
+
+    def __init__(self, field):
+        self.field = field
+        self.lock = threading.Lock()
+        self.ids = {}
+        self.keys = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, cv_id, key):
+        if key is None:
+            return
+        with self.lock:
+            self._remove(cv_id)
+            self.ids.setdefault(key, set()).add(cv_id)
+            self.keys[cv_id] = key
+
+    def remove(self, cv_id):
+        with self.lock:
+            self._remove(cv_id)
+
+    def _remove(self, cv_id):
+        key = self.keys.pop(cv_id, None)
+        if key is None:
+            return
+        ids = self.ids.get(key)
+        if ids is not None:
+            ids.discard(cv_id)
+            if not ids:
+                del self.ids[key]
+
+    def load(self, pairs):
+        """Replace the contents with (cv_id, key) pairs"""
+        with self.lock:
+            self.keys = {cv_id: key for cv_id, key in pairs if key is not None}
+            self.ids = {}
+            for cv_id, key in self.keys.items():
+                self.ids.setdefault(key, set()).add(cv_id)
+
+    def clear(self):
+        self.load([])
+
+    def get(self, key):
+        """IDs of the CVs with this normalised key"""
+        with self.lock:
+            return set(self.ids.get(key, ()))
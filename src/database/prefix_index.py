@@ -0,0 +1,157 @@
+import heapq
+import itertools
+import threading
+
+
+class _Node:
+    __slots__ = ('label', 'edges', 'terms', 'best')
+
+    def __init__(self, label=''):
+        self.label = label
+        self.edges = {}
+        # (kind, normalised term) -> [display text, weight] for terms whose key ends here
+        self.terms = {}
+        self.best = 0
+
+
+class PrefixIndex:
+    """Compressed prefix (radix) tree of weighted terms, for autocomplete.
+
+    A term is reachable from the start of each of its words, so "lea"
+    finds "machine learning". Matching is case-insensitive; the first-seen
+    casing is displayed. Every node keeps the highest weight below it, so
+    `top()` walks best-first and stops after `limit` terms instead of
+    visiting the whole subtree. `add()` applies a weight change in place
+    (a term whose weight drops to zero is removed), so ingestion keeps the
+    index current without rebuilds.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.root = _Node()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, kind, text, delta):
+        display = ' '.join(str(text or '').split())
+        term = display.lower()
+        if not term or not delta:
+            return
+        with self.lock:
+            starts = [0] + [i + 1 for i, char in enumerate(term) if char == ' ']
+            for start in starts:
+                path = self._insert(term[start:]) if delta > 0 else self._path(term[start:])
+                entry = path[-1].terms.get((kind, term)) if path else None
+                if entry is None:
+                    if delta < 0:
+                        continue
+                    entry = path[-1].terms[(kind, term)] = [display, 0]
+                    self.size += start == 0
+                entry[1] += delta
+                if entry[1] <= 0:
+                    del path[-1].terms[(kind, term)]
+                    self.size -= start == 0
+                    self._prune(path)
+                for node in reversed(path):
+                    self._update_best(node)
+
+    def _insert(self, key):
+        """Nodes from the root to the one that ends `key`, splitting an edge if needed"""
+        node = self.root
+        path = [node]
+        i = 0
+        while i < len(key):
+            child = node.edges.get(key[i])
+            if child is None:
+                child = node.edges[key[i]] = _Node(key[i:])
+                path.append(child)
+                return path
+            label = child.label
+            common = 0
+            while common < len(label) and i + common < len(key) and label[common] == key[i + common]:
+                common += 1
+            if common < len(label):
+                middle = _Node(label[:common])
+                child.label = label[common:]
+                middle.edges[child.label[0]] = child
+                middle.best = child.best
+                node.edges[key[i]] = middle
+                child = middle
+            node = child
+            path.append(node)
+            i += common
+        return path
+
+    def _path(self, key):
+        """Nodes from the root to the one that ends exactly at `key`, or None"""
+        node = self.root
+        path = [node]
+        i = 0
+        while i < len(key):
+            node = node.edges.get(key[i])
+            if node is None or not key.startswith(node.label, i):
+                return None
+            path.append(node)
+            i += len(node.label)
+        return path
+
+    def _prune(self, path):
+        # Drop nodes left empty and merge pass-through nodes into their only child
+        for depth in range(len(path) - 1, 0, -1):
+            node, parent = path[depth], path[depth - 1]
+            if node.terms or parent.edges.get(node.label[0]) is not node:
+                continue
+            if not node.edges:
+                del parent.edges[node.label[0]]
+            elif len(node.edges) == 1:
+                child = next(iter(node.edges.values()))
+                child.label = node.label + child.label
+                parent.edges[node.label[0]] = child
+
+    def _update_best(self, node):
+        node.best = max(itertools.chain((weight for _, weight in node.terms.values()),
+                                        (child.best for child in node.edges.values())), default=0)
+
+    def _find(self, prefix):
+        node = self.root
+        i = 0
+        while i < len(prefix):
+            child = node.edges.get(prefix[i])
+            if child is None:
+                return None
+            rest = prefix[i:]
+            if not (rest.startswith(child.label) or child.label.startswith(rest)):
+                return None
+            node = child
+            i += len(child.label)
+        return node
+
+    def top(self, prefix, limit=8, kind=None):
+        """[(display, kind, weight)] of the heaviest terms with a word starting with `prefix`"""
+        prefix = ' '.join(str(prefix or '').split()).lower()
+        if not prefix or limit <= 0:
+            return []
+        results, seen = [], set()
+        tiebreak = itertools.count()
+        with self.lock:
+            start = self._find(prefix)
+            if start is None:
+                return []
+            # Max-heap over nodes (by best weight below) and terms (by weight); a term popped
+            # before every remaining node is guaranteed heavier than anything still unexplored
+            heap = [(-start.best, 1, next(tiebreak), start)]
+            while heap and len(results) < limit:
+                _, is_node, _, item = heapq.heappop(heap)
+                if not is_node:
+                    if item[0] not in seen:
+                        seen.add(item[0])
+                        results.append(item[1:])
+                    continue
+                for (term_kind, term), (display, weight) in item.terms.items():
+                    if kind is None or term_kind == kind:
+                        heapq.heappush(heap, (-weight, 0, display.lower(), ((term_kind, term), display, term_kind, weight)))
+                for child in item.edges.values():
+                    heapq.heappush(heap, (-child.best, 1, next(tiebreak), child))
+        return results
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ProfileCache:
+    """Bounded LRU cache of decoded candidate profiles, keyed by CV id.
+
+    Holds what the profile page renders once the record is fetched and
+    decoded (details, skills, CV preview), so viewing the same candidate
+    again skips Chroma and the blob store. The least recently viewed
+    profile is evicted beyond `max_entries`. Entries older than `ttl_s`
+    are reloaded, which bounds how stale another worker process's copy can
+    get. ChromaDB invalidates an entry on every write to that record.
+
+    A load that overlaps an invalidation is not cached, so a delete or
+    re-extraction racing a profile view cannot leave the old profile behind.
+    """
+
+    def __init__(self, max_entries, ttl_s=0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_or_load(self, cv_id, load):
+        """Cached profile of `cv_id`, else load(cv_id); None results are not cached"""
+        if self.max_entries <= 0:
+            return load(cv_id)
+        with self.lock:
+            entry = self.entries.get(cv_id)
+            if entry is not None and (not self.ttl_s or self.clock() - entry[0] < self.ttl_s):
+                self.entries.move_to_end(cv_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self.generation
+        profile = load(cv_id)
+        if profile is not None:
+            with self.lock:
+                if generation == self.generation:
+                    self.entries[cv_id] = (self.clock(), profile)
+                    self.entries.move_to_end(cv_id)
+                    while len(self.entries) > self.max_entries:
+                        self.entries.popitem(last=False)
+                        self.evictions += 1
+        return profile
+
+    def invalidate(self, cv_ids):
+        with self.lock:
+            self.generation += 1
+            for cv_id in cv_ids:
+                if self.entries.pop(cv_id, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+
+    def snapshot(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl_s': self.ttl_s,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,56 @@
+import bisect
+import threading
+
+
+class RangeIndex:
+    """Sorted (value, cv_id) pairs over one numeric metadata field.
+
+    `range()` bisects to the bounds and slices, so a filter costs
+    O(log n + k) instead of a scan that re-parses every record.
+    """
+
+    def __init__(self, field):
+        self.field = field
+        self.lock = threading.Lock()
+        self.entries = []
+        self.values = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, cv_id, value):
+        if value is None:
+            return
+        with self.lock:
+            self._remove(cv_id)
+            bisect.insort(self.entries, (value, cv_id))
+            self.values[cv_id] = value
+
+    def remove(self, cv_id):
+        with self.lock:
+            self._remove(cv_id)
+
+    def _remove(self, cv_id):
+        value = self.values.pop(cv_id, None)
+        if value is None:
+            return
+        i = bisect.bisect_left(self.entries, (value, cv_id))
+        if i < len(self.entries) and self.entries[i] == (value, cv_id):
+            del self.entries[i]
+
+    def load(self, pairs):
+        """Replace the contents with (cv_id, value) pairs in one sort"""
+        with self.lock:
+            self.values = {cv_id: value for cv_id, value in pairs if value is not None}
+            self.entries = sorted((value, cv_id) for cv_id, value in self.values.items())
+
+    def clear(self):
+        self.load([])
+
+    def range(self, lo=None, hi=None):
+        """IDs whose value lies in [lo, hi]; either bound may be None"""
+        with self.lock:
+            start = 0 if lo is None else bisect.bisect_left(self.entries, (lo, ''))
+            # chr(0x10ffff) sorts after any cv_id, so ties on hi are included
+            end = len(self.entries) if hi is None else bisect.bisect_right(self.entries, (hi, chr(0x10ffff)))
+            return {cv_id for _, cv_id in self.entries[start:end]}
@@ -0,0 +1,378 @@
+import heapq
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from config import SEARCH_SHARDS, SEARCH_SHARD_WORKERS, SEARCH_CHUNK_ROWS
+from src.utils.file_lock import file_lock
+from src.utils.shared_version import SharedVersion
+
+MAX_FEATURES = 1000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def shard_of(cv_id, shards):
+    """Stable shard number of a CV id"""
+    return zlib.crc32(cv_id.encode('utf-8')) % shards
+
+
+def _shard_executor():
+    # scipy's sparse products release the GIL, so threads score shards in parallel
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=SEARCH_SHARD_WORKERS, thread_name_prefix='search-shard')
+    return _executor
+
+
+def _new_vectorizer(vocabulary=None):
+    return TfidfVectorizer(max_features=MAX_FEATURES, stop_words='english', vocabulary=vocabulary)
+
+
+class SearchIndex:
+    """TF-IDF model fitted once over the stored CVs.
+
+    Rows of `matrix` are L2-normalised, so cosine similarity for any
+    number of queries is a single sparse product `Q @ matrix.T`; top-k is
+    then picked per row from that row's non-zeros only. `version` is the
+    corpus version the index was fitted at.
+
+    Rows are grouped into `shards` by hash of CV id, each a contiguous
+    block of the matrix. With more than one shard, every block is scored
+    on the shard thread pool and the per-shard top-k lists are merged with
+    a heap. IDF is fitted over the whole corpus, so scores are comparable
+    across shards.
+
+    With `chunk_rows` set, each shard is scored a chunk of rows at a time
+    and only a running top-k per query is kept. The memory a search needs
+    is then bounded by the chunk size rather than the corpus size.
+    """
+
+    def __init__(self, ids, vectorizer, matrix, version=0, boundaries=None):
+        self.ids = list(ids)
+        self.row_of = {cv_id: row for row, cv_id in enumerate(self.ids)}
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.version = version
+        # Row offsets: shard i holds rows boundaries[i]:boundaries[i + 1]
+        self.boundaries = list(boundaries) if boundaries else [0, len(self.ids)]
+        self.blocks = [self._block(start, end) for start, end in zip(self.boundaries, self.boundaries[1:])]
+
+    @classmethod
+    def fit(cls, ids, documents, version=0, shards=SEARCH_SHARDS):
+        shards = max(1, shards)
+        # Group rows by shard so each shard is one contiguous block
+        order = sorted(range(len(ids)), key=lambda i: shard_of(ids[i], shards))
+        ids = [ids[i] for i in order]
+        documents = [documents[i] for i in order]
+        counts = np.bincount([shard_of(cv_id, shards) for cv_id in ids], minlength=shards)
+        boundaries = [0] + np.cumsum(counts).tolist()
+        vectorizer = _new_vectorizer()
+        matrix = vectorizer.fit_transform(documents).tocsr() if documents else None
+        return cls(ids, vectorizer, matrix, version, boundaries)
+
+    @classmethod
+    def fit_pages(cls, pages, version=0, shards=SEARCH_SHARDS):
+        """Same index as fit(), from `pages()`, a fresh iterator of (ids, documents) pages per call.
+
+        Only one page of text is held at a time. A first pass counts terms to
+        pick the vocabulary and IDF as TfidfVectorizer would; a second pass
+        vectorises each page.
+        """
+        shards = max(1, shards)
+        analyzer = _new_vectorizer().build_analyzer()
+        term_counts, document_counts, n_documents = Counter(), Counter(), 0
+        for _, documents in pages():
+            for document in documents:
+                counts = Counter(analyzer(document))
+                term_counts.update(counts)
+                document_counts.update(counts.keys())
+                n_documents += 1
+        if not n_documents:
+            return cls([], _new_vectorizer(), None, version)
+
+        # Keep the MAX_FEATURES most frequent terms, ties broken the way TfidfVectorizer breaks them
+        terms = sorted(term_counts)
+        if len(terms) > MAX_FEATURES:
+            frequencies = np.array([term_counts[term] for term in terms], dtype=np.int64)
+            kept = np.sort((-frequencies).argsort()[:MAX_FEATURES])
+            terms = [terms[i] for i in kept]
+        vectorizer = _new_vectorizer({term: column for column, term in enumerate(terms)})
+        df = np.array([document_counts[term] for term in terms], dtype=np.float64) + 1.0
+        idf = np.full_like(df, fill_value=n_documents + 1, dtype=np.float64)
+        idf /= df
+        np.log(idf, out=idf)
+        vectorizer.idf_ = idf + 1.0
+
+        # Split every page by shard as it is vectorised, so each shard ends up one contiguous block
+        shard_ids = [[] for _ in range(shards)]
+        shard_blocks = [[] for _ in range(shards)]
+        for page_ids, documents in pages():
+            page_matrix = vectorizer.transform(documents).tocsr()
+            page_shards = np.array([shard_of(cv_id, shards) for cv_id in page_ids])
+            for shard in range(shards):
+                rows = np.flatnonzero(page_shards == shard)
+                if len(rows):
+                    shard_ids[shard].extend(page_ids[row] for row in rows)
+                    shard_blocks[shard].append(page_matrix[rows])
+        ids = [cv_id for part in shard_ids for cv_id in part]
+        boundaries = [0] + np.cumsum([len(part) for part in shard_ids]).tolist()
+        matrix = sparse.vstack([block for part in shard_blocks for block in part]).tocsr()
+        return cls(ids, vectorizer, matrix, version, boundaries)
+
+    @property
+    def shards(self):
+        return len(self.boundaries) - 1
+
+    def _block(self, start, end):
+        """Rows start:end as a CSR view sharing (not copying) the possibly memory-mapped arrays"""
+        if self.matrix is None:
+            return None
+        if start == 0 and end == self.matrix.shape[0]:
+            return self.matrix
+        offset, stop = self.matrix.indptr[start], self.matrix.indptr[end]
+        return sparse.csr_matrix(
+            (self.matrix.data[offset:stop], self.matrix.indices[offset:stop], self.matrix.indptr[start:end + 1] - offset),
+            shape=(end - start, self.matrix.shape[1]), copy=False)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def save(self, directory):
+        """Write vocabulary, IDF, CSR parts and IDs to `directory`, replacing it atomically"""
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=parent, prefix='.search_index-')
+        with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'count': len(self.ids), 'boundaries': self.boundaries,
+                       'shape': list(self.matrix.shape) if self.matrix is not None else None}, f)
+        with open(os.path.join(staging, 'ids.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.ids, f)
+        if self.matrix is not None:
+            vocabulary = {term: int(column) for term, column in self.vectorizer.vocabulary_.items()}
+            with open(os.path.join(staging, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+                json.dump(vocabulary, f, ensure_ascii=False)
+            np.save(os.path.join(staging, 'idf.npy'), self.vectorizer.idf_)
+            for part in ('data', 'indices', 'indptr'):
+                np.save(os.path.join(staging, f'{part}.npy'), getattr(self.matrix, part))
+        # Swap directories so a reader never sees a half-written index
+        retired = None
+        if os.path.exists(directory):
+            retired = tempfile.mkdtemp(dir=parent, prefix='.search_index-old-')
+            os.rmdir(retired)
+            os.replace(directory, retired)
+        os.replace(staging, directory)
+        if retired:
+            shutil.rmtree(retired, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory):
+        """Load a saved index; the CSR arrays are memory-mapped rather than read into memory"""
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, 'ids.json'), 'r', encoding='utf-8') as f:
+            ids = json.load(f)
+        if meta['shape'] is None:
+            return cls(ids, _new_vectorizer(), None, meta['version'], meta.get('boundaries'))
+        with open(os.path.join(directory, 'vocabulary.json'), 'r', encoding='utf-8') as f:
+            vectorizer = _new_vectorizer(json.load(f))
+        vectorizer.idf_ = np.load(os.path.join(directory, 'idf.npy'))
+        parts = [np.load(os.path.join(directory, f'{part}.npy'), mmap_mode='r') for part in ('data', 'indices', 'indptr')]
+        matrix = sparse.csr_matrix(tuple(parts), shape=tuple(meta['shape']), copy=False)
+        return cls(ids, vectorizer, matrix, meta['version'], meta.get('boundaries'))
+
+    def similarities(self, queries):
+        """Sparse (len(queries) x len(self)) matrix of cosine similarities"""
+        query_matrix = self.vectorizer.transform(queries)
+        return (query_matrix @ self.matrix.T).tocsr()
+
+    def _score_block(self, query_matrix, shard, k, threshold, allowed, chunk_rows=0):
+        """Per query, (global rows, similarities) of one shard's best k, best first.
+
+        `allowed` is a sorted array of permitted rows (or None). With
+        `chunk_rows` the shard is scored that many rows at a time, each
+        chunk's winners merged into a running top-k per query.
+        """
+        start, end = self.boundaries[shard], self.boundaries[shard + 1]
+        step = chunk_rows or (end - start)
+        best = [(np.zeros(0, dtype=int), np.zeros(0)) for _ in range(query_matrix.shape[0])]
+        for chunk_start in range(start, end, step):
+            chunk_end = min(end, chunk_start + step)
+            block = self.blocks[shard] if step == end - start else self._block(chunk_start, chunk_end)
+            scores = (query_matrix @ block.T).tocsr()
+            mask = None
+            if allowed is not None:
+                lo, hi = np.searchsorted(allowed, [chunk_start, chunk_end])
+                mask = np.zeros(chunk_end - chunk_start, dtype=bool)
+                mask[allowed[lo:hi] - chunk_start] = True
+            for i in range(scores.shape[0]):
+                row_start, row_end = scores.indptr[i], scores.indptr[i + 1]
+                cols, sims = scores.indices[row_start:row_end], scores.data[row_start:row_end]
+                keep = sims > threshold
+                if mask is not None:
+                    keep &= mask[cols]
+                cols, sims = cols[keep] + chunk_start, sims[keep]
+                if len(best[i][1]):
+                    cols, sims = np.concatenate([best[i][0], cols]), np.concatenate([best[i][1], sims])
+                if len(sims) > k:
+                    # argpartition is O(n); only the k winners get sorted
+                    part = np.argpartition(-sims, k - 1)[:k]
+                    cols, sims = cols[part], sims[part]
+                best[i] = (cols, sims)
+        results = []
+        for cols, sims in best:
+            order = np.argsort(-sims, kind='stable')
+            results.append((cols[order], sims[order]))
+        return results
+
+    def top_k(self, queries, k, threshold=0.0, rows=None, chunk_rows=SEARCH_CHUNK_ROWS):
+        """Per query, (row indices, similarities) of the best k above the threshold, best first.
+
+        `rows` optionally restricts every query to those row indices.
+        `chunk_rows` bounds the rows scored at once across all the queries;
+        0 scores each shard in one product.
+        """
+        if self.matrix is None or not queries:
+            return [(np.zeros(0, dtype=int), np.zeros(0)) for _ in queries]
+        query_matrix = self.vectorizer.transform(queries)
+        allowed = None
+        if rows is not None:
+            allowed = np.unique(np.asarray(list(rows), dtype=int))
+        if chunk_rows:
+            # A batch of q queries scores q cells per row, so it takes chunks of chunk_rows / q rows
+            chunk_rows = max(1, chunk_rows // len(queries))
+
+        shards = [shard for shard in range(self.shards) if self.boundaries[shard + 1] > self.boundaries[shard]]
+        if len(shards) == 1:
+            return self._score_block(query_matrix, shards[0], k, threshold, allowed, chunk_rows)
+
+        # Scatter: one task per shard; gather: k-way heap merge of the sorted per-shard lists
+        per_shard = list(_shard_executor().map(
+            lambda shard: self._score_block(query_matrix, shard, k, threshold, allowed, chunk_rows), shards))
+        results = []
+        for i in range(len(queries)):
+            streams = [zip((-sims).tolist(), cols.tolist()) for cols, sims in (shard_results[i] for shard_results in per_shard)]
+            best = list(itertools.islice(heapq.merge(*streams), k))
+            results.append((np.array([col for _, col in best], dtype=int), np.array([-neg for neg, _ in best])))
+        return results
+
+
+class SearchIndexCache:
+    """Holds the fitted SearchIndex, persists it, and refits after the corpus changes.
+
+    Every write bumps the corpus version, a SharedVersion kept in
+    `<directory>/../corpus_version`, so versions stay unique across worker
+    processes. Each process re-checks it before serving and treats its
+    index as stale once another process has moved the version past it.
+    A saved index whose version (and size) still matches is memory-mapped at
+    startup and used straight away. A stale one is served while a
+    background thread refits, so the first query never pays for a full fit
+    unless there is no saved index at all.
+    """
+
+    def __init__(self, load_corpus, directory=None, count_corpus=None, iter_corpus=None):
+        self.load_corpus = load_corpus
+        # With SEARCH_CHUNK_ROWS set, fits read the corpus as (ids, documents) pages from this instead
+        self.iter_corpus = iter_corpus
+        self.count_corpus = count_corpus
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.index = None
+        self.stale = True
+        self.rebuilding = False
+        self.version = SharedVersion(os.path.join(os.path.dirname(directory), 'corpus_version') if directory else None)
+        self.generation = self.version.value
+
+    def _sync_version(self):
+        """Adopt a newer corpus version written by another process, which makes the index stale"""
+        version = self.version.current()
+        if version > self.generation:
+            self.generation = version
+            self.stale = True
+
+    def invalidate(self):
+        self.stale = True
+        self.generation = self.version.bump()
+
+    def warm_start(self):
+        """Load the saved index; refit in the background if it is out of date"""
+        if not self.directory or not os.path.exists(os.path.join(self.directory, 'meta.json')):
+            self._rebuild_in_background()
+            return
+        try:
+            index = SearchIndex.load(self.directory)
+        except Exception as e:
+            print(f"❌ Failed to load search index: {e}")
+            self._rebuild_in_background()
+            return
+        self._sync_version()
+        current = index.version == self.generation and index.shards == max(1, SEARCH_SHARDS)
+        if current and self.count_corpus is not None:
+            current = len(index) == self.count_corpus()
+        with self.lock:
+            self.index = index
+            self.stale = not current
+        if current:
+            print(f"🧮 Search index loaded from disk ({len(index)} CVs)")
+        else:
+            print(f"🧮 Saved search index is out of date (version {index.version}, corpus {self.generation}); refitting in background")
+            self._rebuild_in_background()
+
+    def _rebuild_in_background(self):
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+        threading.Thread(target=self._rebuild, name='search-index-rebuild', daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            with self.lock:
+                self._fit()
+        except Exception as e:
+            print(f"❌ Background search index rebuild failed: {e}")
+        finally:
+            self.rebuilding = False
+
+    def _fit(self):
+        """Fit, publish and persist a fresh index; caller holds the lock"""
+        generation = self.generation
+        if SEARCH_CHUNK_ROWS and self.iter_corpus is not None:
+            index = SearchIndex.fit_pages(self.iter_corpus, generation)
+        else:
+            ids, documents = self.load_corpus()
+            index = SearchIndex.fit(ids, documents, generation)
+        self.index = index
+        # A write during the fit, here or in another worker, leaves this index stale; it is used once and refitted next time
+        self._sync_version()
+        self.stale = generation != self.generation
+        print(f"🧮 Search index fitted over {len(index)} CVs")
+        if self.directory and not self.stale:
+            try:
+                with file_lock(self.directory):
+                    index.save(self.directory)
+            except Exception as e:
+                print(f"❌ Failed to save search index: {e}")
+        return index
+
+    def get(self):
+        self._sync_version()
+        index = self.index
+        if index is not None and (not self.stale or self.rebuilding):
+            # While a background refit runs, the previous index keeps serving
+            return index
+        with self.lock:
+            if self.index is not None and not self.stale:
+                return self.index
+            return self._fit()
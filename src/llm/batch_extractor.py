@@ -0,0 +1,191 @@
+import json
+import re
+from config import LLM_BATCH_CVS_PER_REQUEST, LLM_BATCH_MAX_RETRIES
+from src.llm.cv_schema import validate_cv_details, validate_skills
+from src.llm.token_budget import PRIORITY_BULK
+
+
+class BatchExtractor:
+    """Offline extraction that packs several CVs into one LLM request.
+
+    Meant for backfills where cost and throughput matter more than latency.
+    Each CV is compacted, tagged with a key and sent together with others;
+    the single JSON response is split back per CV and every item validated
+    against the schema `store_analysis` expects. Only the items that are
+    missing or invalid are re-packed and retried; whatever still fails
+    after `max_retries` goes through the client's normal per-CV path,
+    whose result is held to the same schema. A CV that fails that too is
+    left out of the results.
+
+    Packs can also be written as provider batch files (OpenAI Batch API
+    JSONL) and the downloaded results demultiplexed with `read_batch_results`.
+    """
+
+    PACKED_SYSTEM_PROMPT = """You are an expert CV analyst. You will receive several CVs, each starting with a line "### CV <key>".
+For EVERY CV return its skills and details. Respond with ONE JSON object keyed by the CV key:
+{
+    "<key>": {
+        "skills": ["every technical skill, programming language, framework, tool and technology"],
+        "details": {
+            "personal_info": {"full_name": "", "email": "", "phone": "", "address": "", "location": "", "linkedin": ""},
+            "professional_info": {"current_role": "", "total_experience": "X years", "current_company": "", "summary": "2-3 line summary"},
+            "education": {"highest_degree": "", "university": "", "graduation_year": "", "qualifications": ""},
+            "technical_skills": {"programming_languages": [], "frameworks": [], "tools": [], "databases": [], "cloud_platforms": []}
+        }
+    }
+}
+Return ONLY the JSON object, with one entry per CV key."""
+
+    # Completion tokens allowed per CV in a pack
+    COMPLETION_TOKENS_PER_CV = 700
+    MAX_COMPLETION_TOKENS = 4096
+
+    def __init__(self, client, cvs_per_request=LLM_BATCH_CVS_PER_REQUEST, max_retries=LLM_BATCH_MAX_RETRIES):
+        self.client = client
+        self.scheduler = client.scheduler
+        self.compactor = client.compactor
+        self.cvs_per_request = max(1, cvs_per_request)
+        self.max_retries = max_retries
+
+    def build_pack(self, items):
+        """User prompt for a list of (key, text) items"""
+        parts = [f"### CV {key}\n{self.compactor.compact_for_details(text)}" for key, text in items]
+        return "\n\n".join(parts)
+
+    def completion_budget(self, count):
+        return min(self.MAX_COMPLETION_TOKENS, self.COMPLETION_TOKENS_PER_CV * count)
+
+    def demultiplex(self, response_text, keys):
+        """Split a packed response into ({key: (skills, details)}, [failed keys])"""
+        results = {}
+        try:
+            json_match = re.search(r'\{.*\}', response_text or '', re.DOTALL)
+            payload = json.loads(json_match.group()) if json_match else {}
+        except json.JSONDecodeError as e:
+            print(f"❌ Packed response is not valid JSON: {e}")
+            payload = {}
+
+        for key in keys:
+            item = payload.get(key) if isinstance(payload, dict) else None
+            if not isinstance(item, dict):
+                continue
+            skills = item.get('skills', [])
+            details = item.get('details')
+            problems = validate_skills(skills) + validate_cv_details(details)
+            if problems:
+                print(f"⚠️ CV {key} failed validation: {'; '.join(problems)}")
+                continue
+            results[key] = (skills, details)
+        return results, [key for key in keys if key not in results]
+
+    def _run_pack(self, pack_id, items):
+        with self.scheduler.track(pack_id, PRIORITY_BULK) as usage:
+            try:
+                response_text = self.client.complete(
+                    self.PACKED_SYSTEM_PROMPT, self.build_pack(items),
+                    max_tokens=self.completion_budget(len(items)), temperature=0.1
+                )
+            except Exception as e:
+                print(f"⚠️ Packed request {pack_id} failed: {e}")
+                response_text = ''
+        results, failed = self.demultiplex(response_text, [key for key, _ in items])
+        return results, failed, usage
+
+    def extract(self, cvs):
+        """Extract skills and details for a list of (key, cleaned_text).
+
+        Returns {key: {'skills', 'comprehensive_details', 'token_usage'}}; keys
+        with no schema-valid extraction are missing. Tokens of a packed
+        request are shared equally by its CVs, while `requests` counts
+        every request a CV took part in.
+        """
+        texts = dict(cvs)
+        pending = list(texts)
+        results = {}
+        spend = {key: {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0} for key in texts}
+
+        for attempt in range(self.max_retries + 1):
+            if not pending:
+                break
+            if attempt:
+                print(f"🔁 Retrying {len(pending)} failed CVs (attempt {attempt + 1})")
+            failed = []
+            for start in range(0, len(pending), self.cvs_per_request):
+                keys = pending[start:start + self.cvs_per_request]
+                pack_results, pack_failed, usage = self._run_pack(
+                    f"pack-{attempt}-{start // self.cvs_per_request}", [(key, texts[key]) for key in keys])
+                # A packed request's tokens are shared equally by its CVs; each counts the request itself
+                for key in keys:
+                    for field in spend[key]:
+                        spend[key][field] += usage[field] / len(keys) if field != 'requests' else usage[field]
+                results.update(pack_results)
+                failed.extend(pack_failed)
+            pending = failed
+
+        for key in pending:
+            print(f"⚠️ CV {key} still failing after packed retries; extracting it on its own")
+            with self.scheduler.track(f"single-{key}", PRIORITY_BULK) as usage:
+                skills = self.client.extract_skills(texts[key])
+                details = self.client.extract_comprehensive_details(texts[key])
+            for field in spend[key]:
+                spend[key][field] += usage[field]
+            problems = validate_skills(skills) + validate_cv_details(details)
+            if problems:
+                print(f"❌ CV {key} failed validation after every attempt, not storing it: {'; '.join(problems)}")
+                continue
+            results[key] = (skills, details)
+
+        return {
+            key: {
+                'skills': skills,
+                'comprehensive_details': details,
+                'token_usage': {field: round(value) for field, value in spend[key].items()}
+            }
+            for key, (skills, details) in results.items()
+        }
+
+    def write_batch_file(self, cvs, path, model="gpt-3.5-turbo"):
+        """Write packed requests as OpenAI Batch API JSONL; returns {custom_id: [keys]}"""
+        manifest = {}
+        with open(path, 'w', encoding='utf-8') as f:
+            for start in range(0, len(cvs), self.cvs_per_request):
+                items = cvs[start:start + self.cvs_per_request]
+                custom_id = f"pack-{start // self.cvs_per_request}"
+                manifest[custom_id] = [key for key, _ in items]
+                f.write(json.dumps({
+                    'custom_id': custom_id,
+                    'method': 'POST',
+                    'url': '/v1/chat/completions',
+                    'body': {
+                        'model': model,
+                        'messages': [
+                            {'role': 'system', 'content': self.PACKED_SYSTEM_PROMPT},
+                            {'role': 'user', 'content': self.build_pack(items)}
+                        ],
+                        'max_tokens': self.completion_budget(len(items)),
+                        'temperature': 0.1
+                    }
+                }) + "\n")
+        print(f"✅ Wrote {len(manifest)} packed requests for {len(cvs)} CVs to {path}")
+        return manifest
+
+    def read_batch_results(self, path, manifest):
+        """Demultiplex a provider batch output file; returns ({key: (skills, details)}, [failed keys])"""
+        results = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                custom_id = row.get('custom_id')
+                keys = manifest.get(custom_id, [])
+                try:
+                    content = row['response']['body']['choices'][0]['message']['content']
+                except (KeyError, IndexError, TypeError):
+                    print(f"⚠️ Batch item {custom_id} has no completion: {row.get('error')}")
+                    content = ''
+                pack_results, _ = self.demultiplex(content, keys)
+                results.update(pack_results)
+
+        all_keys = [key for keys in manifest.values() for key in keys]
+        return results, [key for key in all_keys if key not in results]
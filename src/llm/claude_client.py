@@ -1,15 +1,18 @@
+import asyncio
+import hashlib
 import requests
 import re
 import json
-from config import ANTHROPIC_API_KEY
+from config import ANTHROPIC_API_KEY, LLM_REQUEST_TIMEOUT_S
 from src.llm.openai_client import OpenAIClient
+from src.llm.token_budget import get_scheduler
 
 class ClaudeClient:
     """Lightweight Claude (Anthropic) client wrapper.
 
     Behavior:
     - Mirrors the `OpenAIClient` interface: `extract_skills(text)` and
-      `extract_comprehensive_details(text)`.
+      `extract_comprehensive_details(text)`, plus their `*_async` variants.
     - On failure or parsing errors, falls back to `OpenAIClient`'s
       enhanced fallback extractors (instantiates an internal `OpenAIClient`).
     Note: Install `requests` (already in `requirements.txt`) and set
@@ -18,9 +21,23 @@ class ClaudeClient:
 
     API_URL = "https://api.anthropic.com/v1/complete"
 
+    SKILLS_SYSTEM_PROMPT = (
+        "You are an expert HR technical analyst. Extract ALL technical skills, programming languages, "
+        "frameworks, tools, and technologies from the CV text. Return ONLY a comma-separated list of skills."
+    )
+
+    DETAILS_SYSTEM_PROMPT = (
+        "You are an expert CV analyst. Extract COMPLETE details from the CV in JSON format. "
+        "Return exactly the JSON structure requested: personal_info, professional_info, education, technical_skills."
+    )
+
+    EXTRACTION_MODEL = "claude-haiku-4.5"
+
     def __init__(self):
         self.api_key = ANTHROPIC_API_KEY
         self.fallback = OpenAIClient()
+        self.scheduler = get_scheduler()
+        self.compactor = self.fallback.compactor
 
     def call_anthropic(self, prompt, model="claude-haiku-4.5", max_tokens=1500, temperature=0.1):
         if not self.api_key:
@@ -38,10 +55,23 @@ class ClaudeClient:
             'temperature': temperature
         }
 
-        resp = requests.post(self.API_URL, headers=headers, json=payload, timeout=30)
+        resp = requests.post(self.API_URL, headers=headers, json=payload, timeout=LLM_REQUEST_TIMEOUT_S)
         resp.raise_for_status()
         return resp.json()
 
+    def complete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model="claude-haiku-4.5"):
+        """Run one completion inside the shared token budget and return its text"""
+        prompt = f"{system_prompt}\n\n{user_prompt}"
+        prompt_tokens = self.scheduler.count_tokens(prompt)
+        reservation = self.scheduler.acquire(prompt_tokens + max_tokens)
+        completion = ""
+        try:
+            resp_json = self.call_anthropic(prompt, model=model, max_tokens=max_tokens, temperature=temperature)
+            completion = str(self._parse_completion_text(resp_json)).strip()
+            return completion
+        finally:
+            self.scheduler.release(reservation, prompt_tokens, self.scheduler.count_tokens(completion))
+
     def _parse_completion_text(self, resp_json):
         # Anthropic may return text under different keys; try common ones
         for key in ('completion', 'text', 'response', 'output'):
@@ -55,53 +85,79 @@ class ClaudeClient:
         # Fallback to stringifying response
         return json.dumps(resp_json)
 
+    async def acomplete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model="claude-haiku-4.5"):
+        """Async variant of complete(); the blocking HTTP call runs in a worker thread"""
+        return await asyncio.to_thread(self.complete, system_prompt, user_prompt,
+                                       max_tokens=max_tokens, temperature=temperature, model=model)
+
+    def parse_skills_response(self, skills_text):
+        return [s.strip() for s in re.split(r',|\n', skills_text) if s.strip()]
+
+    def extraction_version(self):
+        """Model plus a digest of the extraction prompts, as OpenAIClient.extraction_version"""
+        prompts = [self.SKILLS_SYSTEM_PROMPT, self.DETAILS_SYSTEM_PROMPT,
+                   self.compactor.compact_for_skills(''), self.compactor.compact_for_details('')]
+        digest = hashlib.sha256('\0'.join(prompts).encode('utf-8')).hexdigest()[:12]
+        return f"{self.EXTRACTION_MODEL}:{digest}"
+
+    def parse_details_response(self, result_text, text, strict=False):
+        """Turn a details completion into the CV schema, falling back to local extraction.
+
+        With `strict`, an unparseable completion raises ValueError instead.
+        """
+        try:
+            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
+            if json_match:
+                json_str = json_match.group()
+                details = json.loads(json_str)
+                # Validate email with fallback
+                email = details.get('personal_info', {}).get('email', '')
+                if not self.fallback.is_valid_email(email):
+                    details['personal_info']['email'] = self.fallback.enhanced_email_extraction(text)
+                return details
+            else:
+                print("❌ No JSON found in Claude response; using fallback analysis")
+                if strict:
+                    raise ValueError("No JSON found in details response")
+                return self.fallback.enhanced_fallback_analysis(text)
+        except json.JSONDecodeError as e:
+            print(f"❌ JSON parsing failed for Claude response: {e}")
+            if strict:
+                raise ValueError(f"Invalid JSON in details response: {e}")
+            return self.fallback.enhanced_fallback_analysis(text)
+
     def extract_skills(self, text):
         try:
-            system_prompt = (
-                "You are an expert HR technical analyst. Extract ALL technical skills, programming languages, "
-                "frameworks, tools, and technologies from the CV text. Return ONLY a comma-separated list of skills."
-            )
-
-            user_prompt = f"{system_prompt}\n\n{text[:3500]}"
-            resp_json = self.call_anthropic(user_prompt, max_tokens=800, temperature=0.3)
-            completion = self._parse_completion_text(resp_json)
-            # Extract first JSON-like/content block
-            skills_text = str(completion).strip()
-            skills = [s.strip() for s in re.split(r',|\n', skills_text) if s.strip()]
-            return skills
+            skills_text = self.complete(self.SKILLS_SYSTEM_PROMPT, self.compactor.compact_for_skills(text), max_tokens=800, temperature=0.3)
+            return self.parse_skills_response(skills_text)
+        except Exception as e:
+            print(f"⚠️ Claude client failed, falling back to OpenAIClient extractors: {e}")
+            return self.fallback.advanced_fallback_skills(text)
+
+    async def extract_skills_async(self, text, strict=False):
+        try:
+            skills_text = await self.acomplete(self.SKILLS_SYSTEM_PROMPT, self.compactor.compact_for_skills(text), max_tokens=800, temperature=0.3)
+            return self.parse_skills_response(skills_text)
         except Exception as e:
+            if strict:
+                raise
             print(f"⚠️ Claude client failed, falling back to OpenAIClient extractors: {e}")
             return self.fallback.advanced_fallback_skills(text)
 
     def extract_comprehensive_details(self, text):
         try:
-            system_prompt = (
-                "You are an expert CV analyst. Extract COMPLETE details from the CV in JSON format. "
-                "Return exactly the JSON structure requested: personal_info, professional_info, education, technical_skills."
-            )
-
-            user_prompt = f"{system_prompt}\n\n{text[:4000]}"
-            resp_json = self.call_anthropic(user_prompt, max_tokens=1500, temperature=0.1)
-            completion = self._parse_completion_text(resp_json)
-            result_text = str(completion).strip()
-
-            try:
-                json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group()
-                    details = json.loads(json_str)
-                    # Validate email with fallback
-                    email = details.get('personal_info', {}).get('email', '')
-                    if not self.fallback.is_valid_email(email):
-                        details['personal_info']['email'] = self.fallback.enhanced_email_extraction(text)
-                    return details
-                else:
-                    print("❌ No JSON found in Claude response; using fallback analysis")
-                    return self.fallback.enhanced_fallback_analysis(text)
-            except json.JSONDecodeError as e:
-                print(f"❌ JSON parsing failed for Claude response: {e}")
-                return self.fallback.enhanced_fallback_analysis(text)
+            result_text = self.complete(self.DETAILS_SYSTEM_PROMPT, self.compactor.compact_for_details(text), max_tokens=1500, temperature=0.1)
+            return self.parse_details_response(result_text, text)
+        except Exception as e:
+            print(f"⚠️ Claude analysis failed, using fallback: {e}")
+            return self.fallback.enhanced_fallback_analysis(text)
 
+    async def extract_comprehensive_details_async(self, text, strict=False):
+        try:
+            result_text = await self.acomplete(self.DETAILS_SYSTEM_PROMPT, self.compactor.compact_for_details(text), max_tokens=1500, temperature=0.1)
+            return self.parse_details_response(result_text, text, strict)
         except Exception as e:
+            if strict:
+                raise
             print(f"⚠️ Claude analysis failed, using fallback: {e}")
             return self.fallback.enhanced_fallback_analysis(text)
@@ -0,0 +1,47 @@
+"""Shape of the comprehensive-details JSON that AIMatcher.store_analysis consumes."""
+
+CV_DETAILS_SCHEMA = {
+    'personal_info': ['full_name', 'email', 'phone', 'address', 'location', 'linkedin'],
+    'professional_info': ['current_role', 'total_experience', 'current_company', 'summary'],
+    'education': ['highest_degree', 'university', 'graduation_year', 'qualifications'],
+    'technical_skills': ['programming_languages', 'frameworks', 'tools', 'databases', 'cloud_platforms'],
+}
+
+LIST_GROUPS = {'technical_skills'}
+
+# Fields without which a record is not worth storing
+REQUIRED_FIELDS = [('personal_info', 'full_name')]
+
+
+def validate_cv_details(details):
+    """Return a list of schema problems; an empty list means the details are usable"""
+    if not isinstance(details, dict):
+        return ['details is not a JSON object']
+
+    problems = []
+    for group, fields in CV_DETAILS_SCHEMA.items():
+        section = details.get(group)
+        if not isinstance(section, dict):
+            problems.append(f'{group} missing or not an object')
+            continue
+        for field in fields:
+            value = section.get(field)
+            if value is None:
+                continue
+            if group in LIST_GROUPS:
+                if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                    problems.append(f'{group}.{field} is not a list of strings')
+            elif not isinstance(value, (str, int, float)):
+                problems.append(f'{group}.{field} is not a scalar')
+
+    for group, field in REQUIRED_FIELDS:
+        section = details.get(group)
+        if isinstance(section, dict) and not str(section.get(field) or '').strip():
+            problems.append(f'{group}.{field} is empty')
+    return problems
+
+
+def validate_skills(skills):
+    if not isinstance(skills, list) or not all(isinstance(skill, str) for skill in skills):
+        return ['skills is not a list of strings']
+    return []
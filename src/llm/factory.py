@@ -0,0 +1,46 @@
+from config import LLM_PROVIDER, LLM_RECORD_PROVIDER, LLM_ROUTER_PROVIDERS
+
+
+def create_llm_client(provider=LLM_PROVIDER):
+    """Build the LLM client for a provider name; unknown or broken providers fall back to OpenAI.
+
+    openai | claude   live providers
+    stub              regex-backed local responses
+    synthetic         stub responses with a configurable latency distribution
+    record            a live provider (LLM_RECORD_PROVIDER) whose responses are recorded
+    replay            recorded responses only, no network
+    router            LLM_ROUTER_PROVIDERS in order, with circuit breakers, failover and hedging
+    """
+    from src.llm.openai_client import OpenAIClient
+
+    try:
+        if provider == 'claude':
+            from src.llm.claude_client import ClaudeClient
+            client = ClaudeClient()
+            print("✅ AI Matcher initialized - Using Claude client for LLM calls")
+            return client
+        if provider == 'stub':
+            from src.llm.stub_client import StubClient
+            print("✅ AI Matcher initialized - Using local stub LLM (no network)")
+            return StubClient()
+        if provider == 'synthetic':
+            from src.llm.replay_client import SyntheticClient
+            print("✅ AI Matcher initialized - Using synthetic LLM responses (no network)")
+            return SyntheticClient()
+        if provider == 'record':
+            from src.llm.replay_client import RecordingClient
+            print(f"✅ AI Matcher initialized - Recording {LLM_RECORD_PROVIDER} responses")
+            return RecordingClient(create_llm_client(LLM_RECORD_PROVIDER))
+        if provider == 'replay':
+            from src.llm.replay_client import ReplayClient
+            print("✅ AI Matcher initialized - Replaying recorded LLM responses (no network)")
+            return ReplayClient()
+        if provider == 'router':
+            from src.llm.provider_router import ProviderRouter
+            providers = [(name, create_llm_client(name)) for name in LLM_ROUTER_PROVIDERS if name != 'router']
+            print(f"✅ AI Matcher initialized - Routing LLM calls across {', '.join(LLM_ROUTER_PROVIDERS)}")
+            return ProviderRouter(providers)
+    except Exception as e:
+        print(f"⚠️ Failed to initialize {provider} client, falling back to OpenAIClient: {e}")
+
+    return OpenAIClient()
@@ -1,45 +1,191 @@
+import asyncio
+import hashlib
 import openai
-from config import OPENAI_API_KEY
+from config import OPENAI_API_KEY, LLM_REQUEST_TIMEOUT_S
+from src.llm.token_budget import get_scheduler
+from src.llm.prompt_compactor import PromptCompactor
+from src.utils.text_analysis import as_analyzed, as_text
 import re
 import json
 
 class OpenAIClient:
+    SKILLS_SYSTEM_PROMPT = """You are an expert HR technical analyst. Extract ALL technical skills, programming languages, frameworks, tools, and technologies from the CV text. 
+                        Be VERY comprehensive and thorough. Look for ANY mention of technical skills.
+                        Return ONLY a comma-separated list of specific skills.
+                        IMPORTANT: If you find ANY technical terms, include them.
+                        Example: Python, JavaScript, React.js, Node.js, MySQL, MongoDB, AWS, Docker, Git, Machine Learning, TensorFlow"""
+
+    DETAILS_SYSTEM_PROMPT = """You are an expert CV analyst. Extract COMPLETE details from the CV in JSON format. Be very thorough and accurate.
+
+                        Return EXACTLY this JSON structure:
+                        {
+                            "personal_info": {
+                                "full_name": "complete name",
+                                "email": "email address - EXTRACT THIS CAREFULLY",
+                                "phone": "phone number with country code",
+                                "address": "complete address if available",
+                                "location": "city, country",
+                                "linkedin": "linkedin profile if mentioned"
+                            },
+                            "professional_info": {
+                                "current_role": "current job title",
+                                "total_experience": "X years",
+                                "current_company": "current company name",
+                                "summary": "2-3 line professional summary"
+                            },
+                            "education": {
+                                "highest_degree": "highest qualification",
+                                "university": "university name", 
+                                "graduation_year": "year of graduation",
+                                "qualifications": "list all degrees and certifications"
+                            },
+                            "technical_skills": {
+                                "programming_languages": ["list of languages"],
+                                "frameworks": ["list of frameworks"],
+                                "tools": ["list of tools"],
+                                "databases": ["list of databases"],
+                                "cloud_platforms": ["list of cloud platforms"]
+                            }
+                        }
+
+                        IMPORTANT: Find the email address carefully, it's usually in contact section"""
+
+    # Model behind the extraction prompts; part of extraction_version()
+    EXTRACTION_MODEL = "gpt-3.5-turbo"
+
     def __init__(self):
         openai.api_key = OPENAI_API_KEY
+        self.scheduler = get_scheduler()
+        self.compactor = PromptCompactor(self.scheduler.counter)
     
-    def extract_skills(self, text):
+    def complete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model="gpt-3.5-turbo"):
+        """Run one chat completion inside the shared token budget and return its text"""
+        prompt_tokens = self.scheduler.count_tokens(system_prompt) + self.scheduler.count_tokens(user_prompt)
+        reservation = self.scheduler.acquire(prompt_tokens + max_tokens)
+        response = None
         try:
             response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": """You are an expert HR technical analyst. Extract ALL technical skills, programming languages, frameworks, tools, and technologies from the CV text. 
-                        Be VERY comprehensive and thorough. Look for ANY mention of technical skills.
-                        Return ONLY a comma-separated list of specific skills.
-                        IMPORTANT: If you find ANY technical terms, include them.
-                        Example: Python, JavaScript, React.js, Node.js, MySQL, MongoDB, AWS, Docker, Git, Machine Learning, TensorFlow"""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Extract ALL technical skills from this CV. Be very thorough:\n\n{text[:3500]}"
-                    }
-                ],
-                max_tokens=800,
-                temperature=0.3
+                model=model,
+                messages=self._messages(system_prompt, user_prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                request_timeout=LLM_REQUEST_TIMEOUT_S
             )
-            skills_text = response.choices[0].message.content.strip()
-            skills = [skill.strip() for skill in skills_text.split(',') if skill.strip()]
-            print(f"🤖 OpenAI detected {len(skills)} skills: {skills}")
-            return skills
+            return response.choices[0].message.content.strip()
+        finally:
+            self._settle(reservation, prompt_tokens, response)
+    
+    async def acomplete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model="gpt-3.5-turbo"):
+        """Async variant of complete(); waiting for budget happens off the event loop"""
+        prompt_tokens = self.scheduler.count_tokens(system_prompt) + self.scheduler.count_tokens(user_prompt)
+        reservation = await asyncio.to_thread(self.scheduler.acquire, prompt_tokens + max_tokens)
+        response = None
+        try:
+            response = await openai.ChatCompletion.acreate(
+                model=model,
+                messages=self._messages(system_prompt, user_prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                request_timeout=LLM_REQUEST_TIMEOUT_S
+            )
+            return response.choices[0].message.content.strip()
+        finally:
+            self._settle(reservation, prompt_tokens, response)
+    
+    def _messages(self, system_prompt, user_prompt):
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _settle(self, reservation, prompt_tokens, response):
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            self.scheduler.release(reservation, usage.prompt_tokens, usage.completion_tokens)
+        elif response is not None:
+            completion = response.choices[0].message.content or ""
+            self.scheduler.release(reservation, prompt_tokens, self.scheduler.count_tokens(completion))
+        else:
+            self.scheduler.release(reservation, prompt_tokens, 0)
+    
+    def extraction_version(self):
+        """Identifies what produced a CV's extracted fields: the model plus a digest of the prompts.
+
+        Stored with every CV; changing the model or any prompt makes existing
+        records stale for the re-extraction job.
+        """
+        prompts = [self.SKILLS_SYSTEM_PROMPT, self.DETAILS_SYSTEM_PROMPT, self._skills_prompt(''), self._details_prompt('')]
+        digest = hashlib.sha256('\0'.join(prompts).encode('utf-8')).hexdigest()[:12]
+        return f"{self.EXTRACTION_MODEL}:{digest}"
+    
+    def _skills_prompt(self, text):
+        return f"Extract ALL technical skills from this CV. Be very thorough:\n\n{self.compactor.compact_for_skills(text)}"
+    
+    def _details_prompt(self, text):
+        return f"Extract COMPLETE details from this CV. Pay special attention to email and education:\n\n{self.compactor.compact_for_details(text)}"
+    
+    def parse_skills_response(self, skills_text):
+        skills = [skill.strip() for skill in skills_text.split(',') if skill.strip()]
+        print(f"🤖 OpenAI detected {len(skills)} skills: {skills}")
+        return skills
+    
+    def parse_details_response(self, result_text, text, strict=False):
+        """Turn a details completion into the CV schema, falling back to local extraction.
+
+        With `strict`, an unparseable completion raises ValueError instead.
+        """
+        print(f"🤖 OpenAI raw response: {result_text[:200]}...")
+        
+        try:
+            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
+            if json_match:
+                json_str = json_match.group()
+                cv_details = json.loads(json_str)
+                print("✅ Successfully parsed OpenAI JSON response")
+                
+                # Validate and enhance email extraction
+                email = cv_details.get('personal_info', {}).get('email', '')
+                if not self.is_valid_email(email):
+                    enhanced_email = self.enhanced_email_extraction(text)
+                    cv_details['personal_info']['email'] = enhanced_email
+                
+                return cv_details
+            else:
+                print("❌ No JSON found in OpenAI response")
+                if strict:
+                    raise ValueError("No JSON found in details response")
+                return self.enhanced_fallback_analysis(text)
+                
+        except json.JSONDecodeError as e:
+            print(f"❌ JSON parsing failed: {e}")
+            if strict:
+                raise ValueError(f"Invalid JSON in details response: {e}")
+            return self.enhanced_fallback_analysis(text)
+    
+    def extract_skills(self, text):
+        try:
+            skills_text = self.complete(self.SKILLS_SYSTEM_PROMPT, self._skills_prompt(text), max_tokens=800, temperature=0.3)
+            return self.parse_skills_response(skills_text)
+            
+        except Exception as e:
+            print(f"⚠️ OpenAI failed, using advanced fallback: {e}")
+            return self.advanced_fallback_skills(text)
+    
+    async def extract_skills_async(self, text, strict=False):
+        """`strict` re-raises LLM failures instead of using the regex fallback"""
+        try:
+            skills_text = await self.acomplete(self.SKILLS_SYSTEM_PROMPT, self._skills_prompt(text), max_tokens=800, temperature=0.3)
+            return self.parse_skills_response(skills_text)
             
         except Exception as e:
+            if strict:
+                raise
             print(f"⚠️ OpenAI failed, using advanced fallback: {e}")
             return self.advanced_fallback_skills(text)
     
     def advanced_fallback_skills(self, text):
         """Advanced skill extraction with better patterns"""
-        text_lower = text.lower()
+        document = as_analyzed(text)
         skills_found = set()
         
         # Comprehensive skill patterns
@@ -59,7 +205,7 @@ class OpenAIClient:
         
         for skill, keywords in skill_patterns.items():
             for keyword in keywords:
-                if re.search(r'\b' + re.escape(keyword) + r'\b', text_lower):
+                if document.contains(keyword):
                     skills_found.add(skill)
                     break
         
@@ -69,87 +215,30 @@ class OpenAIClient:
     
     def extract_comprehensive_details(self, text):
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert CV analyst. Extract COMPLETE details from the CV in JSON format. Be very thorough and accurate.
-
-                        Return EXACTLY this JSON structure:
-                        {
-                            "personal_info": {
-                                "full_name": "complete name",
-                                "email": "email address - EXTRACT THIS CAREFULLY",
-                                "phone": "phone number with country code",
-                                "address": "complete address if available",
-                                "location": "city, country",
-                                "linkedin": "linkedin profile if mentioned"
-                            },
-                            "professional_info": {
-                                "current_role": "current job title",
-                                "total_experience": "X years",
-                                "current_company": "current company name",
-                                "summary": "2-3 line professional summary"
-                            },
-                            "education": {
-                                "highest_degree": "highest qualification",
-                                "university": "university name", 
-                                "graduation_year": "year of graduation",
-                                "qualifications": "list all degrees and certifications"
-                            },
-                            "technical_skills": {
-                                "programming_languages": ["list of languages"],
-                                "frameworks": ["list of frameworks"],
-                                "tools": ["list of tools"],
-                                "databases": ["list of databases"],
-                                "cloud_platforms": ["list of cloud platforms"]
-                            }
-                        }
-
-                        IMPORTANT: Find the email address carefully, it's usually in contact section"""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Extract COMPLETE details from this CV. Pay special attention to email and education:\n\n{text[:4000]}"
-                    }
-                ],
-                max_tokens=1500,
-                temperature=0.1
-            )
-            
-            result_text = response.choices[0].message.content.strip()
-            print(f"🤖 OpenAI raw response: {result_text[:200]}...")
-            
-            try:
-                json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group()
-                    cv_details = json.loads(json_str)
-                    print("✅ Successfully parsed OpenAI JSON response")
-                    
-                    # Validate and enhance email extraction
-                    email = cv_details.get('personal_info', {}).get('email', '')
-                    if not self.is_valid_email(email):
-                        enhanced_email = self.enhanced_email_extraction(text)
-                        cv_details['personal_info']['email'] = enhanced_email
-                    
-                    return cv_details
-                else:
-                    print("❌ No JSON found in OpenAI response")
-                    return self.enhanced_fallback_analysis(text)
-                    
-            except json.JSONDecodeError as e:
-                print(f"❌ JSON parsing failed: {e}")
-                return self.enhanced_fallback_analysis(text)
+            result_text = self.complete(self.DETAILS_SYSTEM_PROMPT, self._details_prompt(text), max_tokens=1500, temperature=0.1)
+            return self.parse_details_response(result_text, text)
+                
+        except Exception as e:
+            print(f"⚠️ OpenAI analysis failed, using enhanced fallback: {e}")
+            return self.enhanced_fallback_analysis(text)
+    
+    async def extract_comprehensive_details_async(self, text, strict=False):
+        """`strict` re-raises LLM and parsing failures instead of using the regex fallback"""
+        try:
+            result_text = await self.acomplete(self.DETAILS_SYSTEM_PROMPT, self._details_prompt(text), max_tokens=1500, temperature=0.1)
+            return self.parse_details_response(result_text, text, strict)
                 
         except Exception as e:
+            if strict:
+                raise
             print(f"⚠️ OpenAI analysis failed, using enhanced fallback: {e}")
             return self.enhanced_fallback_analysis(text)
     
     def enhanced_fallback_analysis(self, text):
         """Enhanced fallback analysis with better extraction"""
         print("🔧 Using enhanced fallback analysis")
+        # Analyse once; every extractor below reads the same document
+        text = as_analyzed(text)
         
         # Enhanced email extraction
         print("🔍 Searching for email in text...")
@@ -201,6 +290,7 @@ class OpenAIClient:
     
     def enhanced_email_extraction(self, text):
         """Enhanced email extraction with multiple methods"""
+        text = as_text(text)
         # Method 1: Direct regex pattern
         email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
         email_matches = re.findall(email_pattern, text)
@@ -236,6 +326,7 @@ class OpenAIClient:
     
     def enhanced_phone_extraction(self, text):
         """Enhanced phone extraction with better patterns"""
+        text = as_text(text)
         # Multiple phone patterns
         phone_patterns = [
             r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',  # Standard US
@@ -272,8 +363,7 @@ class OpenAIClient:
     
     def enhanced_name_extraction(self, text):
         """Enhanced name extraction"""
-        lines = text.split('\n')
-        for line in lines[:10]:
+        for line in as_analyzed(text).lines[:10]:
             line_clean = line.strip()
             # Look for lines that might be names (not too long, no special keywords)
             if (len(line_clean) > 2 and len(line_clean) < 50 and
@@ -285,8 +375,10 @@ class OpenAIClient:
     
     def enhanced_location_extraction(self, text):
         """Enhanced location extraction"""
+        text = as_text(text)
         location_patterns = [
-            r'(\w+[\s\w]*),\s*(\w+[\s\w]*)',  # City, Country
+            # City, Country; anchored at the start of a word run so it is linear, not quadratic, in the text length
+            r'(?<![\s\w])\s*(\w[\s\w]*),\s*(\w[\s\w]*)',
             r'Location[:\s]*([^\n]+)',  # With Location label
             r'location[:\s]*([^\n]+)',  # With location label
             r'Address[:\s]*([^\n]+)',  # With Address label
@@ -316,9 +408,8 @@ class OpenAIClient:
             'consultant', 'lead', 'architect', 'designer', 'programmer'
         ]
         
-        lines = text.split('\n')
-        for line in lines:
-            line_lower = line.lower()
+        document = as_analyzed(text)
+        for line, line_lower in zip(document.lines, document.lower_lines):
             if any(keyword in line_lower for keyword in role_keywords) and len(line.strip()) < 50:
                 return line.strip()
         
@@ -326,6 +417,7 @@ class OpenAIClient:
     
     def enhanced_experience_extraction(self, text):
         """Enhanced experience extraction"""
+        text = as_text(text)
         exp_patterns = [
             r'(\d+)\s*(?:years?|yrs?)',
             r'Experience[:\s]*(\d+\s*(?:years?|yrs?))',
@@ -344,9 +436,8 @@ class OpenAIClient:
     def enhanced_company_extraction(self, text):
         """Enhanced company extraction"""
         company_indicators = ['at', 'company', 'corporation', 'technologies', 'solutions', 'ltd', 'inc', 'gmbh']
-        lines = text.split('\n')
-        for line in lines:
-            line_lower = line.lower()
+        document = as_analyzed(text)
+        for line, line_lower in zip(document.lines, document.lower_lines):
             if any(indicator in line_lower for indicator in company_indicators):
                 return line.strip()
         return "Company in CV"
@@ -354,9 +445,8 @@ class OpenAIClient:
     def enhanced_education_extraction(self, text):
         """Enhanced education extraction"""
         education_keywords = ['bachelor', 'master', 'phd', 'degree', 'university', 'college', 'institute', 'bs', 'ms', 'mtech', 'btech']
-        lines = text.split('\n')
-        for line in lines:
-            line_lower = line.lower()
+        document = as_analyzed(text)
+        for line, line_lower in zip(document.lines, document.lower_lines):
             if any(keyword in line_lower for keyword in education_keywords):
                 return {
                     "highest_degree": line.strip(),
@@ -373,7 +463,7 @@ class OpenAIClient:
     
     def enhanced_skills_categorization(self, text):
         """Enhanced skills categorization"""
-        text_lower = text.lower()
+        document = as_analyzed(text)
         
         programming_languages = []
         frameworks = []
@@ -384,31 +474,31 @@ class OpenAIClient:
         # Programming Languages
         languages = ['python', 'java', 'javascript', 'c++', 'c#', 'php', 'ruby', 'go', 'swift', 'kotlin', 'typescript']
         for lang in languages:
-            if re.search(r'\b' + re.escape(lang) + r'\b', text_lower):
+            if document.contains(lang):
                 programming_languages.append(lang.title())
         
         # Frameworks
         framework_list = ['react', 'angular', 'vue', 'django', 'flask', 'spring', 'express', 'laravel', 'node.js']
         for framework in framework_list:
-            if re.search(r'\b' + re.escape(framework) + r'\b', text_lower):
+            if document.contains(framework):
                 frameworks.append(framework.title())
         
         # Databases
         database_list = ['mysql', 'mongodb', 'postgresql', 'oracle', 'sql server', 'redis', 'sqlite']
         for db in database_list:
-            if re.search(r'\b' + re.escape(db) + r'\b', text_lower):
+            if document.contains(db):
                 databases.append(db.title())
         
         # Cloud Platforms
         cloud_list = ['aws', 'azure', 'google cloud', 'docker', 'kubernetes']
         for cloud in cloud_list:
-            if re.search(r'\b' + re.escape(cloud) + r'\b', text_lower):
+            if document.contains(cloud):
                 cloud_platforms.append(cloud.title())
         
         # Tools
         tool_list = ['git', 'jenkins', 'jira', 'linux', 'windows', 'visual studio', 'eclipse']
         for tool in tool_list:
-            if re.search(r'\b' + re.escape(tool) + r'\b', text_lower):
+            if document.contains(tool):
                 tools.append(tool.title())
         
         return {
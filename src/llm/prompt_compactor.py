@@ -0,0 +1,65 @@
+from config import LLM_SKILLS_PROMPT_TOKENS, LLM_DETAILS_PROMPT_TOKENS
+from src.llm.token_budget import get_scheduler
+from src.utils.cv_sections import split_sections, section_kind, section_text
+from src.utils.text_analysis import AnalyzedDocument, as_text
+
+
+class PromptCompactor:
+    """Packs the most relevant CV sections into a token budget.
+
+    Replaces blind `text[:N]` truncation: sections are detected with the
+    same heuristics as the CV preview, ranked by how useful they are for
+    the prompt, and added whole while they fit. The first section that
+    does not fit is cut on a token boundary. Chosen sections are emitted
+    in their original order. CVs already under budget are sent unchanged.
+    """
+
+    SKILLS_PRIORITY = ['skills', 'projects', 'experience', 'certifications', 'summary', 'other', 'header',
+                       'education', 'contact']
+    DETAILS_PRIORITY = ['header', 'contact', 'summary', 'education', 'skills', 'experience', 'certifications',
+                        'projects', 'other']
+
+    # Don't bother with a section tail shorter than this
+    MIN_PARTIAL_TOKENS = 40
+
+    def __init__(self, counter=None):
+        self.counter = counter or get_scheduler().counter
+
+    def compact(self, text, budget_tokens, priority):
+        """`text` may be an AnalyzedDocument, whose sections are reused"""
+        sections = text.sections if isinstance(text, AnalyzedDocument) else None
+        text = as_text(text)
+        if not text or self.counter.count(text) <= budget_tokens:
+            return text
+
+        if sections is None:
+            sections = split_sections(text)
+        if len(sections) <= 1:
+            return self.counter.truncate(text, budget_tokens)
+
+        rank = {kind: i for i, kind in enumerate(priority)}
+        order = sorted(range(len(sections)),
+                       key=lambda i: (rank.get(section_kind(sections[i]['heading']), len(rank)), i))
+
+        remaining = budget_tokens
+        chosen = {}
+        for i in order:
+            if remaining < self.MIN_PARTIAL_TOKENS:
+                break
+            body = section_text(sections[i])
+            # +1 for the newline joining it to its neighbour
+            tokens = self.counter.count(body) + 1
+            if tokens <= remaining:
+                chosen[i] = body
+                remaining -= tokens
+            else:
+                chosen[i] = self.counter.truncate(body, remaining - 1)
+                remaining = 0
+
+        return '\n'.join(chosen[i] for i in sorted(chosen))
+
+    def compact_for_skills(self, text):
+        return self.compact(text, LLM_SKILLS_PROMPT_TOKENS, self.SKILLS_PRIORITY)
+
+    def compact_for_details(self, text):
+        return self.compact(text, LLM_DETAILS_PROMPT_TOKENS, self.DETAILS_PRIORITY)
@@ -0,0 +1,285 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from config import (LLM_BREAKER_WINDOW, LLM_BREAKER_MIN_CALLS, LLM_BREAKER_FAILURE_RATE, LLM_BREAKER_SLOW_MS,
+                    LLM_BREAKER_COOLDOWN_S, LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_DELAY_MS)
+from src.llm.openai_client import OpenAIClient
+
+# Successful-call latencies kept per provider for the hedging percentile
+LATENCY_SAMPLES = 200
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _call_executor():
+    # Blocking complete() calls, so a hedge can start while the primary is still waiting
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='llm-router')
+    return _executor
+
+
+class CircuitBreaker:
+    """Error-rate and latency circuit breaker for one provider.
+
+    A call is bad if it raised or took longer than `slow_ms`. When at least
+    `min_calls` of the last `window` calls are recorded and the bad share
+    reaches `failure_rate`, the breaker opens and refuses calls for
+    `cooldown_s`. It then lets a single probe through (half-open): a good
+    probe closes it, a bad one opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name, window=LLM_BREAKER_WINDOW, min_calls=LLM_BREAKER_MIN_CALLS,
+                 failure_rate=LLM_BREAKER_FAILURE_RATE, slow_ms=LLM_BREAKER_SLOW_MS,
+                 cooldown_s=LLM_BREAKER_COOLDOWN_S, clock=time.monotonic):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_s = slow_ms / 1000
+        self.cooldown_s = cooldown_s
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.outcomes = deque(maxlen=window)
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.probing = False
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self):
+        """True if a call may go to this provider now; a half-open breaker admits one probe"""
+        with self.lock:
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.cooldown_s:
+                self.state = self.HALF_OPEN
+                self.probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok, elapsed_s):
+        """Outcome of a call that finished, successfully or not"""
+        slow = elapsed_s > self.slow_s
+        bad = not ok or slow
+        with self.lock:
+            self.calls += 1
+            self.failures += not ok
+            self.slow_calls += ok and slow
+            if ok:
+                self.latencies.append(elapsed_s)
+            if self.state == self.HALF_OPEN:
+                self.probing = False
+                if bad:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self.outcomes.clear()
+                return
+            self.outcomes.append(bad)
+            if (self.state == self.CLOSED and len(self.outcomes) >= self.min_calls
+                    and sum(self.outcomes) / len(self.outcomes) >= self.failure_rate):
+                self._open()
+
+    def abandon(self, elapsed_s):
+        """A call cancelled because a hedge answered first; counts as bad only if it was already slow"""
+        if elapsed_s > self.slow_s:
+            self.record(True, elapsed_s)
+            return
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.probing = False
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = self.clock()
+        self.opened += 1
+        print(f"🔌 Circuit open for {self.name}; failing over for {self.cooldown_s:g}s")
+
+    def latency_percentile(self, percentile):
+        """Nearest-rank percentile of recent successful latencies in seconds; None until min_calls samples"""
+        with self.lock:
+            samples = sorted(self.latencies)
+        if len(samples) < self.min_calls:
+            return None
+        return samples[max(0, math.ceil(percentile / 100 * len(samples)) - 1)]
+
+    def snapshot(self):
+        with self.lock:
+            recent = list(self.outcomes)
+            state = {
+                'state': self.state,
+                'calls': self.calls,
+                'failures': self.failures,
+                'slow_calls': self.slow_calls,
+                'rejected': self.rejected,
+                'opened': self.opened,
+                'recent_bad_rate': round(sum(recent) / len(recent), 3) if recent else 0.0,
+            }
+        for percentile in (50, 95):
+            latency = self.latency_percentile(percentile)
+            state[f'p{percentile}_ms'] = round(latency * 1000, 1) if latency is not None else None
+        return state
+
+
+class Provider:
+    def __init__(self, name, client, breaker=None):
+        self.name = name
+        self.client = client
+        self.breaker = breaker or CircuitBreaker(name)
+
+
+class ProviderRouter(OpenAIClient):
+    """`LLM_PROVIDER=router`: one prompt, several providers, tried in order of preference.
+
+    Each provider has a CircuitBreaker. An open breaker is skipped without
+    a call, so during an outage requests go straight to the next provider
+    instead of waiting for a timeout. A failed call fails over to the next
+    provider at once. With `hedge_percentile` set, a request still running
+    after that percentile of its provider's recent latencies is also sent
+    to the next provider, and the first answer wins. This caps tail
+    latency at roughly that percentile plus the second provider's latency.
+    Only if every provider fails or is open does the call raise, and the
+    extract_* methods then use their regex fallback as before.
+
+    The prompts are OpenAIClient's; every provider answers them through
+    its own complete()/acomplete(), inside the shared token budget.
+    """
+
+    def __init__(self, providers, hedge_percentile=LLM_HEDGE_PERCENTILE, hedge_min_delay_ms=LLM_HEDGE_MIN_DELAY_MS):
+        super().__init__()
+        self.providers = [provider if isinstance(provider, Provider) else Provider(*provider) for provider in providers]
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay_s = hedge_min_delay_ms / 1000
+        self.EXTRACTION_MODEL = '|'.join(
+            getattr(provider.client, 'EXTRACTION_MODEL', provider.name) for provider in self.providers)
+        self.lock = threading.Lock()
+        self.failovers = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def _count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _next_provider(self, remaining, errors):
+        for provider in remaining:
+            if provider.breaker.allow():
+                return provider
+            errors.append(f"{provider.name}: circuit open")
+        return None
+
+    def hedge_delay(self, provider):
+        """Seconds to wait on `provider` before hedging; None when hedging is off"""
+        if not self.hedge_percentile:
+            return None
+        latency = provider.breaker.latency_percentile(self.hedge_percentile)
+        if latency is None:
+            latency = provider.breaker.slow_s
+        return max(self.hedge_min_delay_s, latency)
+
+    def _timed(self, provider, call):
+        started = time.perf_counter()
+        try:
+            result = call(provider.client)
+        except Exception:
+            provider.breaker.record(False, time.perf_counter() - started)
+            raise
+        provider.breaker.record(True, time.perf_counter() - started)
+        return result
+
+    async def _atimed(self, provider, call):
+        started = time.perf_counter()
+        try:
+            result = await call(provider.client)
+        except asyncio.CancelledError:
+            provider.breaker.abandon(time.perf_counter() - started)
+            raise
+        except Exception:
+            provider.breaker.record(False, time.perf_counter() - started)
+            raise
+        provider.breaker.record(True, time.perf_counter() - started)
+        return result
+
+    def complete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model=None):
+        def call(client):
+            return client.complete(system_prompt, user_prompt, max_tokens=max_tokens, temperature=temperature)
+
+        remaining = iter(self.providers)
+        errors = []
+        primary = self._next_provider(remaining, errors)
+        while primary is not None:
+            pending = {_call_executor().submit(self._timed, primary, call): primary}
+            done, _ = wait(pending, timeout=self.hedge_delay(primary))
+            if not done:
+                hedge = self._next_provider(remaining, errors)
+                if hedge is not None:
+                    self._count('hedges')
+                    pending[_call_executor().submit(self._timed, hedge, call)] = hedge
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    provider = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors.append(f"{provider.name}: {e}")
+                        continue
+                    # A losing call keeps running on its thread; its outcome still feeds the breaker
+                    if provider is not primary:
+                        self._count('hedge_wins')
+                    return result
+            self._count('failovers')
+            primary = self._next_provider(remaining, errors)
+        raise RuntimeError("All LLM providers failed: " + "; ".join(errors))
+
+    async def acomplete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model=None):
+        def call(client):
+            return client.acomplete(system_prompt, user_prompt, max_tokens=max_tokens, temperature=temperature)
+
+        remaining = iter(self.providers)
+        errors = []
+        primary = self._next_provider(remaining, errors)
+        while primary is not None:
+            pending = {asyncio.ensure_future(self._atimed(primary, call)): primary}
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_delay(primary))
+            if not done:
+                hedge = self._next_provider(remaining, errors)
+                if hedge is not None:
+                    self._count('hedges')
+                    pending[asyncio.ensure_future(self._atimed(hedge, call))] = hedge
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is not None:
+                        errors.append(f"{provider.name}: {task.exception()}")
+                        continue
+                    for loser in pending:
+                        loser.cancel()
+                    if provider is not primary:
+                        self._count('hedge_wins')
+                    return task.result()
+            self._count('failovers')
+            primary = self._next_provider(remaining, errors)
+        raise RuntimeError("All LLM providers failed: " + "; ".join(errors))
+
+    def snapshot(self):
+        """Breaker state and latency per provider, plus failover and hedging counts"""
+        with self.lock:
+            counts = {'failovers': self.failovers, 'hedges': self.hedges, 'hedge_wins': self.hedge_wins}
+        return dict(counts, providers={provider.name: provider.breaker.snapshot() for provider in self.providers})
@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from config import LLM_RECORDINGS_PATH, LLM_REPLAY_LATENCY, LLM_SYNTHETIC_LATENCY, LLM_SYNTHETIC_SEED
+from src.llm.openai_client import OpenAIClient
+from src.llm.stub_client import StubClient
+
+
+def prompt_key(system_prompt, user_prompt, max_tokens, temperature):
+    """Stable hash identifying one prompt, independent of the provider that answered it"""
+    payload = json.dumps([system_prompt, user_prompt, max_tokens, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RecordingStore:
+    """Append-only JSONL file of recorded completions keyed by prompt hash"""
+
+    def __init__(self, path=LLM_RECORDINGS_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.records = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.records[record['key']] = record
+        print(f"📼 Loaded {len(self.records)} recorded LLM responses from {path}")
+
+    def get(self, key):
+        return self.records.get(key)
+
+    def add(self, record):
+        with self.lock:
+            self.records[record['key']] = record
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class RecordingClient(OpenAIClient):
+    """`LLM_PROVIDER=record`: forwards prompts to a live client and records every response"""
+
+    def __init__(self, live_client, store=None):
+        super().__init__()
+        self.live_client = live_client
+        self.store = store or RecordingStore()
+
+    def extraction_version(self):
+        return self.live_client.extraction_version()
+
+    def complete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model=None):
+        started = time.perf_counter()
+        result_text = self.live_client.complete(system_prompt, user_prompt, max_tokens=max_tokens, temperature=temperature)
+        self.store.add({
+            'key': prompt_key(system_prompt, user_prompt, max_tokens, temperature),
+            'response': result_text,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+            'prompt_tokens': self.scheduler.count_tokens(system_prompt) + self.scheduler.count_tokens(user_prompt),
+            'completion_tokens': self.scheduler.count_tokens(result_text),
+        })
+        return result_text
+
+    async def acomplete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model=None):
+        return await asyncio.to_thread(self.complete, system_prompt, user_prompt, max_tokens, temperature)
+
+
+class ReplayClient(OpenAIClient):
+    """`LLM_PROVIDER=replay`: serves recorded responses keyed by prompt hash.
+
+    Deterministic and network-free. With `LLM_REPLAY_LATENCY=recorded` each
+    response is delayed by its recorded latency so timings stay realistic.
+    A prompt without a recording raises, which the extract_* methods turn
+    into the usual regex fallback; `misses` counts how often that happened.
+    """
+
+    EXTRACTION_MODEL = "replay"
+
+    def __init__(self, store=None, latency_mode=LLM_REPLAY_LATENCY):
+        super().__init__()
+        self.store = store or RecordingStore()
+        self.latency_mode = latency_mode
+        self.misses = 0
+
+    def _lookup(self, system_prompt, user_prompt, max_tokens, temperature):
+        key = prompt_key(system_prompt, user_prompt, max_tokens, temperature)
+        record = self.store.get(key)
+        if record is None:
+            self.misses += 1
+            raise LookupError(f"No recorded response for prompt {key[:12]}")
+        return record
+
+    def _delay(self, record):
+        return record.get('latency_ms', 0) / 1000 if self.latency_mode == 'recorded' else 0
+
+    def complete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model=None):
+        record = self._lookup(system_prompt, user_prompt, max_tokens, temperature)
+        reservation = self.scheduler.acquire(record['prompt_tokens'] + max_tokens)
+        try:
+            time.sleep(self._delay(record))
+            return record['response']
+        finally:
+            self.scheduler.release(reservation, record['prompt_tokens'], record['completion_tokens'])
+
+    async def acomplete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model=None):
+        record = self._lookup(system_prompt, user_prompt, max_tokens, temperature)
+        reservation = await asyncio.to_thread(self.scheduler.acquire, record['prompt_tokens'] + max_tokens)
+        try:
+            await asyncio.sleep(self._delay(record))
+            return record['response']
+        finally:
+            self.scheduler.release(reservation, record['prompt_tokens'], record['completion_tokens'])
+
+
+class LatencyDistribution:
+    """Parses specs like `fixed:200`, `uniform:100:900`, `normal:500:100` or
+    `lognormal:800:0.5` (median ms, sigma) and samples delays in seconds."""
+
+    def __init__(self, spec, seed=None):
+        parts = spec.split(':')
+        self.kind = parts[0]
+        self.params = [float(p) for p in parts[1:]]
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        if self.kind not in ('fixed', 'uniform', 'normal', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self):
+        with self.lock:
+            if self.kind == 'fixed':
+                ms = self.params[0]
+            elif self.kind == 'uniform':
+                ms = self.random.uniform(self.params[0], self.params[1])
+            elif self.kind == 'normal':
+                ms = self.random.gauss(self.params[0], self.params[1])
+            else:
+                ms = self.params[0] * self.random.lognormvariate(0, self.params[1])
+        return max(0.0, ms) / 1000
+
+
+class SyntheticClient(StubClient):
+    """`LLM_PROVIDER=synthetic`: schema-valid stub responses with a configurable latency distribution"""
+
+    def __init__(self, latency=LLM_SYNTHETIC_LATENCY, seed=LLM_SYNTHETIC_SEED):
+        super().__init__()
+        self.latency = LatencyDistribution(latency, seed)
+
+    def _delay(self):
+        return self.latency.sample()
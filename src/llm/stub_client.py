@@ -0,0 +1,80 @@
+import asyncio
+import contextlib
+import io
+import json
+import re
+import time
+import zlib
+from config import LLM_STUB_FAIL_RATE
+from src.llm.openai_client import OpenAIClient
+from src.llm.batch_extractor import BatchExtractor
+
+
+class StubClient(OpenAIClient):
+    """Local stand-in for an LLM provider, selected with `LLM_PROVIDER=stub`.
+
+    Answers the skills, details and packed prompts from the regex
+    extractors, so the whole pipeline (including batch packing and
+    demultiplexing) runs end to end without network access. Requests still
+    go through the token budget. `fail_rate` drops that share of packed
+    items, chosen deterministically, to exercise the retry path.
+    """
+
+    EXTRACTION_MODEL = "stub"
+
+    def __init__(self, fail_rate=LLM_STUB_FAIL_RATE):
+        super().__init__()
+        self.fail_rate = fail_rate
+        self.calls = 0
+
+    def _delay(self):
+        """Simulated response time in seconds, spent while holding the budget reservation"""
+        return 0
+
+    def complete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model="stub"):
+        prompt_tokens = self.scheduler.count_tokens(system_prompt) + self.scheduler.count_tokens(user_prompt)
+        reservation = self.scheduler.acquire(prompt_tokens + max_tokens)
+        result_text = ""
+        try:
+            time.sleep(self._delay())
+            self.calls += 1
+            result_text = self.respond(system_prompt, user_prompt)
+            return result_text
+        finally:
+            self.scheduler.release(reservation, prompt_tokens, self.scheduler.count_tokens(result_text))
+
+    async def acomplete(self, system_prompt, user_prompt, max_tokens=800, temperature=0.3, model="stub"):
+        """Async variant of complete(); waiting for budget happens off the event loop"""
+        prompt_tokens = self.scheduler.count_tokens(system_prompt) + self.scheduler.count_tokens(user_prompt)
+        reservation = await asyncio.to_thread(self.scheduler.acquire, prompt_tokens + max_tokens)
+        result_text = ""
+        try:
+            await asyncio.sleep(self._delay())
+            self.calls += 1
+            result_text = self.respond(system_prompt, user_prompt)
+            return result_text
+        finally:
+            self.scheduler.release(reservation, prompt_tokens, self.scheduler.count_tokens(result_text))
+
+    def respond(self, system_prompt, user_prompt):
+        if system_prompt == BatchExtractor.PACKED_SYSTEM_PROMPT:
+            return json.dumps(self.respond_packed(user_prompt))
+
+        cv_text = user_prompt.split('\n\n', 1)[-1]
+        with contextlib.redirect_stdout(io.StringIO()):
+            if system_prompt == self.SKILLS_SYSTEM_PROMPT:
+                return ', '.join(sorted(self.advanced_fallback_skills(cv_text)))
+            return json.dumps(self.enhanced_fallback_analysis(cv_text))
+
+    def respond_packed(self, user_prompt):
+        parts = re.split(r'^### CV (\S+)\n', user_prompt, flags=re.MULTILINE)
+        response = {}
+        for key, cv_text in zip(parts[1::2], parts[2::2]):
+            if self.fail_rate and zlib.crc32(f"{key}:{self.calls}".encode()) % 1000 < self.fail_rate * 1000:
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                response[key] = {
+                    'skills': sorted(self.advanced_fallback_skills(cv_text)),
+                    'details': self.enhanced_fallback_analysis(cv_text)
+                }
+        return response
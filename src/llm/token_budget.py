@@ -0,0 +1,192 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from config import LLM_TOKENS_PER_MINUTE, LLM_REQUESTS_PER_MINUTE
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+_current_cv = contextvars.ContextVar('llm_current_cv', default=None)
+_current_priority = contextvars.ContextVar('llm_current_priority', default=PRIORITY_INTERACTIVE)
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken, estimating from characters if it is unavailable."""
+
+    def __init__(self, encoding_name="cl100k_base"):
+        try:
+            import tiktoken
+            self.encoding = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            print(f"⚠️ tiktoken unavailable, estimating tokens from text length: {e}")
+            self.encoding = None
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return max(1, len(text) // 4)
+
+    def truncate(self, text, max_tokens):
+        """Cut text down to at most max_tokens tokens"""
+        if max_tokens <= 0 or not text:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            if len(tokens) <= max_tokens:
+                return text
+            return self.encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * 4]
+
+
+class TokenBudgetScheduler:
+    """Sliding-window tokens/requests-per-minute limiter with a priority queue.
+
+    Callers reserve `prompt + max completion` tokens before a request and
+    settle the reservation with the real usage afterwards. Waiting callers
+    are admitted in priority order (interactive uploads before bulk
+    backfills), FIFO within the same priority. A limit of 0 disables it.
+    Usage is also accumulated per CV for whatever `track()` block is active.
+    """
+
+    def __init__(self, tokens_per_minute=LLM_TOKENS_PER_MINUTE, requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                 window_seconds=60.0, counter=None, max_tracked_cvs=500):
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self.window_seconds = window_seconds
+        self.counter = counter or TokenCounter()
+        self.max_tracked_cvs = max_tracked_cvs
+
+        self._cond = threading.Condition()
+        self._window = deque()  # [timestamp, tokens] per admitted request
+        self._window_tokens = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._spend = OrderedDict()
+        self.totals = {'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'queued_seconds': 0.0}
+
+    def count_tokens(self, text):
+        return self.counter.count(text)
+
+    def _expire(self, now):
+        while self._window and now - self._window[0][0] >= self.window_seconds:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    def _has_capacity(self, tokens):
+        if self.requests_per_minute and len(self._window) >= self.requests_per_minute:
+            return False
+        if self.tokens_per_minute and self._window:
+            # An oversized request is still admitted once the window is empty
+            return self._window_tokens + tokens <= self.tokens_per_minute
+        return True
+
+    def acquire(self, estimated_tokens, priority=None):
+        """Block until the budget admits a request; returns a reservation for release()"""
+        if priority is None:
+            priority = _current_priority.get()
+        ticket = (priority, next(self._sequence))
+        started = time.monotonic()
+
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._expire(now)
+                    if self._waiting[0] == ticket and self._has_capacity(estimated_tokens):
+                        heapq.heappop(self._waiting)
+                        entry = [now, estimated_tokens]
+                        self._window.append(entry)
+                        self._window_tokens += estimated_tokens
+                        self.totals['queued_seconds'] += now - started
+                        self._cond.notify_all()
+                        return {'entry': entry, 'cv': _current_cv.get()}
+
+                    timeout = 1.0
+                    if self._waiting[0] == ticket and self._window:
+                        timeout = max(0.01, self._window[0][0] + self.window_seconds - now)
+                    self._cond.wait(timeout=timeout)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    def release(self, reservation, prompt_tokens, completion_tokens):
+        """Replace a reservation's estimate with the real usage and record the spend"""
+        actual = prompt_tokens + completion_tokens
+        with self._cond:
+            entry = reservation['entry']
+            if any(e is entry for e in self._window):
+                self._window_tokens += actual - entry[1]
+                entry[1] = actual
+
+            self.totals['requests'] += 1
+            self.totals['prompt_tokens'] += prompt_tokens
+            self.totals['completion_tokens'] += completion_tokens
+
+            spend = reservation.get('cv')
+            if spend is not None:
+                spend['requests'] += 1
+                spend['prompt_tokens'] += prompt_tokens
+                spend['completion_tokens'] += completion_tokens
+                spend['total_tokens'] += actual
+            self._cond.notify_all()
+
+    @contextmanager
+    def track(self, cv_label, priority=PRIORITY_INTERACTIVE):
+        """Attribute every LLM request made inside the block to one CV"""
+        spend = {'cv': cv_label, 'priority': priority, 'requests': 0,
+                 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+        with self._cond:
+            self._spend[cv_label] = spend
+            self._spend.move_to_end(cv_label)
+            while len(self._spend) > self.max_tracked_cvs:
+                self._spend.popitem(last=False)
+
+        cv_token = _current_cv.set(spend)
+        priority_token = _current_priority.set(priority)
+        try:
+            yield spend
+        finally:
+            _current_cv.reset(cv_token)
+            _current_priority.reset(priority_token)
+
+    def get_spend(self, cv_label):
+        with self._cond:
+            spend = self._spend.get(cv_label)
+            return dict(spend) if spend else None
+
+    def snapshot(self):
+        with self._cond:
+            self._expire(time.monotonic())
+            return {
+                'tokens_per_minute': self.tokens_per_minute,
+                'requests_per_minute': self.requests_per_minute,
+                'window_tokens': self._window_tokens,
+                'window_requests': len(self._window),
+                'queued': len(self._waiting),
+                'totals': dict(self.totals),
+                'recent_cvs': [dict(s) for s in list(self._spend.values())[-20:]]
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide scheduler shared by every LLM client"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TokenBudgetScheduler()
+        return _scheduler
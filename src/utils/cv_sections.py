@@ -0,0 +1,93 @@
+import re
+
+SECTION_KEYWORDS = ['experience', 'education', 'skills', 'projects', 'summary']
+
+# Heading words mapped to the section kind they introduce
+SECTION_KINDS = {
+    'summary': 'summary', 'profile': 'summary', 'objective': 'summary', 'about me': 'summary',
+    'experience': 'experience', 'employment': 'experience', 'work history': 'experience',
+    'education': 'education', 'academic': 'education', 'qualifications': 'education',
+    'skills': 'skills', 'technologies': 'skills', 'technical': 'skills', 'tools': 'skills',
+    'projects': 'projects',
+    'certifications': 'certifications', 'certificates': 'certifications', 'courses': 'certifications',
+    'contact': 'contact', 'personal': 'contact',
+}
+
+INLINE_HEADINGS = [
+    'PROFESSIONAL SUMMARY', 'SUMMARY', 'PROFILE', 'OBJECTIVE', 'ABOUT ME',
+    'WORK EXPERIENCE', 'PROFESSIONAL EXPERIENCE', 'EXPERIENCE', 'EMPLOYMENT HISTORY', 'WORK HISTORY',
+    'EDUCATION', 'ACADEMIC BACKGROUND', 'QUALIFICATIONS',
+    'TECHNICAL SKILLS', 'KEY SKILLS', 'SKILLS', 'TECHNOLOGIES',
+    'PROJECTS', 'CERTIFICATIONS', 'CERTIFICATES', 'COURSES',
+    'CONTACT', 'PERSONAL DETAILS', 'LANGUAGES', 'AWARDS', 'INTERESTS', 'REFERENCES',
+]
+
+# Upper-case or Title Case heading words; cleaned text has no line breaks to go by
+_INLINE_PATTERN = re.compile(
+    r'\b(' + '|'.join(
+        re.escape(h) for h in sorted(INLINE_HEADINGS + [h.title() for h in INLINE_HEADINGS], key=len, reverse=True)
+    ) + r')\b:?'
+)
+
+
+def is_section_heading(line):
+    """Short upper-case lines or short lines naming a common CV section"""
+    return len(line) < 50 and (line.isupper() or any(keyword in line.lower() for keyword in SECTION_KEYWORDS))
+
+
+def section_kind(heading):
+    if not heading:
+        return 'header'
+    heading_lower = heading.lower()
+    for word, kind in SECTION_KINDS.items():
+        if word in heading_lower:
+            return kind
+    return 'other'
+
+
+def split_line_sections(text):
+    """Group non-empty lines under the closest preceding heading line"""
+    sections = []
+    current = None
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if is_section_heading(line):
+            current = {'heading': line, 'lines': []}
+            sections.append(current)
+        else:
+            if current is None:
+                current = {'heading': None, 'lines': []}
+                sections.append(current)
+            current['lines'].append(line)
+    return sections
+
+
+def split_inline_sections(text):
+    """Split single-line (cleaned) text on recognised heading words"""
+    sections = []
+    position = 0
+    heading = None
+    for match in _INLINE_PATTERN.finditer(text):
+        body = text[position:match.start()].strip()
+        if body or heading:
+            sections.append({'heading': heading, 'lines': [body] if body else []})
+        heading = match.group(1)
+        position = match.end()
+    body = text[position:].strip()
+    if body or heading:
+        sections.append({'heading': heading, 'lines': [body] if body else []})
+    return sections
+
+
+def split_sections(text):
+    """Detect CV sections, by line when the text still has line breaks"""
+    if text.count('\n') >= 3:
+        return split_line_sections(text)
+    return split_inline_sections(text)
+
+
+def section_text(section):
+    lines = ([section['heading']] if section['heading'] else []) + section['lines']
+    return '\n'.join(lines)
@@ -0,0 +1,41 @@
+import contextlib
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextlib.contextmanager
+def file_lock(path, blocking=True):
+    """Exclusive lock shared by every process on this machine, held for the `with` block.
+
+    Locks `<path>.lock`, never `path` itself, so the guarded file can still
+    be replaced with os.replace while the lock is held. With
+    `blocking=False`, raises BlockingIOError instead of waiting when the
+    lock is already held, also by another `with` block in this process.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            except OSError as e:
+                if blocking:
+                    raise
+                raise BlockingIOError(str(e))
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
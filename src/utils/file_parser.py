@@ -1,18 +1,42 @@
 import PyPDF2
+import contextlib
 import docx2txt
+import io
 import os
 import pdfplumber
 import re
 
+
+@contextlib.contextmanager
+def open_binary(source):
+    """`source` (a path or a binary stream) as a stream positioned at the start"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            yield file
+    else:
+        source.seek(0)
+        yield source
+
+
+def describe_source(source):
+    return source if isinstance(source, (str, os.PathLike)) else "upload stream"
+
+
 class CVParser:
+    """Text extraction for PDF, DOCX and TXT CVs.
+
+    Every `extract_text_from_*` method takes either a file path or a
+    seekable binary stream, so uploads can be parsed from memory.
+    """
+
     def extract_text_from_pdf(self, file_path):
         text = ""
-        print(f"📄 Reading PDF: {file_path}")
+        print(f"📄 Reading PDF: {describe_source(file_path)}")
         
         try:
             # Method 1: Try pdfplumber first (better for complex PDFs)
             print("🔧 Trying pdfplumber...")
-            with pdfplumber.open(file_path) as pdf:
+            with open_binary(file_path) as file, pdfplumber.open(file) as pdf:
                 for i, page in enumerate(pdf.pages):
                     try:
                         page_text = page.extract_text()
@@ -33,7 +57,7 @@ class CVParser:
         try:
             # Method 2: Try PyPDF2
             print("🔧 Trying PyPDF2...")
-            with open(file_path, 'rb') as file:
+            with open_binary(file_path) as file:
                 reader = PyPDF2.PdfReader(file)
                 for i, page in enumerate(reader.pages):
                     try:
@@ -55,7 +79,7 @@ class CVParser:
         # Method 3: If both fail, try to extract any readable text
         print("🔧 Trying raw text extraction...")
         try:
-            with open(file_path, 'rb') as file:
+            with open_binary(file_path) as file:
                 raw_content = file.read()
                 # Try to extract text between parentheses and other patterns
                 text_matches = re.findall(b'[\\x20-\\x7E]{10,}', raw_content)
@@ -70,7 +94,8 @@ class CVParser:
     
     def extract_text_from_docx(self, file_path):
         try:
-            text = docx2txt.process(file_path)
+            with open_binary(file_path) as file:
+                text = docx2txt.process(file)
             if text.strip():
                 print(f"✅ DOCX extracted {len(text)} characters")
                 return text
@@ -81,9 +106,12 @@ class CVParser:
     def extract_text_from_txt(self, file_path):
         try:
             encodings = ['utf-8', 'latin-1', 'windows-1252', 'cp1252']
+            with open_binary(file_path) as file:
+                raw_content = file.read()
             for encoding in encodings:
                 try:
-                    with open(file_path, 'r', encoding=encoding) as file:
+                    # TextIOWrapper keeps the universal-newline handling of text-mode open()
+                    with io.TextIOWrapper(io.BytesIO(raw_content), encoding=encoding) as file:
                         text = file.read()
                         if text.strip():
                             print(f"✅ TXT extracted {len(text)} characters with {encoding}")
@@ -95,14 +123,18 @@ class CVParser:
             return f"TXT extraction error: {str(e)}"
     
     def parse_cv(self, file_path):
-        ext = os.path.splitext(file_path)[1].lower()
-        print(f"📁 Processing {ext.upper()} file: {os.path.basename(file_path)}")
+        return self.parse_stream(file_path, file_path)
+    
+    def parse_stream(self, stream, filename):
+        """Extract text from a binary stream (or path); the format comes from `filename`"""
+        ext = os.path.splitext(filename)[1].lower()
+        print(f"📁 Processing {ext.upper()} file: {os.path.basename(filename)}")
         
         if ext == '.pdf':
-            return self.extract_text_from_pdf(file_path)
+            return self.extract_text_from_pdf(stream)
         elif ext in ['.docx', '.doc']:
-            return self.extract_text_from_docx(file_path)
+            return self.extract_text_from_docx(stream)
         elif ext == '.txt':
-            return self.extract_text_from_txt(file_path)
+            return self.extract_text_from_txt(stream)
         else:
             raise ValueError(f"Unsupported file format: {ext}")
\ No newline at end of file
@@ -0,0 +1,64 @@
+import os
+import tempfile
+from src.utils.file_lock import file_lock
+
+
+class SharedVersion:
+    """Write counter kept in a file shared by every process on this machine.
+
+    `bump()` re-reads the file and writes the next value under a file lock
+    (read, increment, write), so two worker processes never record the
+    same version. `current()` re-reads the file only when its stat has
+    changed, so polling it before every read is cheap. Without a path the
+    counter lives in this process only.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Identity of the file version `value` was read from or written to
+        self.stamp = None
+        self.value = self._read()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _read(self):
+        if not self.path:
+            return 0
+        self.stamp = self._file_stamp()
+        if self.stamp is None:
+            return 0
+        try:
+            with open(self.path, 'r') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def current(self):
+        """Latest version, including bumps made by other processes"""
+        if self.path and self._file_stamp() != self.stamp:
+            self.value = max(self._read(), self.value)
+        return self.value
+
+    def bump(self):
+        """Record a write; returns the new version"""
+        if not self.path:
+            self.value += 1
+            return self.value
+        try:
+            with file_lock(self.path):
+                value = max(self._read(), self.value) + 1
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path))
+                with os.fdopen(fd, 'w') as f:
+                    f.write(str(value))
+                os.replace(tmp_path, self.path)
+                self.stamp = self._file_stamp()
+                self.value = value
+        except OSError as e:
+            self.value += 1
+            print(f"❌ Failed to record version in {self.path}: {e}")
+        return self.value
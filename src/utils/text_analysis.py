@@ -0,0 +1,96 @@
+import re
+from collections import Counter
+from functools import lru_cache
+from types import MappingProxyType
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+from src.utils.cv_sections import split_sections, split_line_sections
+from src.utils.text_cleaner import TextCleaner
+
+_WORD_PATTERN = re.compile(r'\w+')
+# Same tokens as the TF-IDF / hashing vectorizers: lower-cased, 2+ word characters, no stop words
+_TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+_cleaner = TextCleaner()
+
+
+@lru_cache(maxsize=512)
+def _keyword_pattern(keyword):
+    return re.compile(r'\b' + re.escape(keyword) + r'\b')
+
+
+@lru_cache(maxsize=512)
+def _keyword_words(keyword):
+    return tuple(_WORD_PATTERN.findall(keyword))
+
+
+class AnalyzedDocument:
+    """One CV's text, analysed once and shared by every consumer.
+
+    Holds the cleaned text plus everything the extractors, formatters,
+    prompt compactor and vectorizers used to recompute for themselves:
+    the lower-cased text, lines, both section splits, the set of words and
+    the vectorizer tokens with their counts. Instances are immutable.
+    """
+
+    __slots__ = ('text', 'lower', 'lines', 'lower_lines', 'sections', 'line_sections',
+                 'words', 'tokens', 'term_counts')
+
+    def __init__(self, text):
+        lower = text.lower()
+        lines = tuple(text.split('\n'))
+        tokens = tuple(token for token in _TOKEN_PATTERN.findall(lower) if token not in ENGLISH_STOP_WORDS)
+        fields = {
+            'text': text,
+            'lower': lower,
+            'lines': lines,
+            'lower_lines': tuple(line.lower() for line in lines),
+            'sections': tuple(split_sections(text)),
+            'line_sections': tuple(split_line_sections(text)),
+            'words': frozenset(_WORD_PATTERN.findall(lower)),
+            'tokens': tokens,
+            'term_counts': MappingProxyType(Counter(tokens)),
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("AnalyzedDocument is immutable")
+
+    def __reduce__(self):
+        return (AnalyzedDocument, (self.text,))
+
+    def __len__(self):
+        return len(self.text)
+
+    def __str__(self):
+        return self.text
+
+    def contains(self, keyword):
+        """Same answer as re.search(r'\\b' + re.escape(keyword) + r'\\b', lower text), mostly without a scan.
+
+        Every word run of a matching keyword is a whole word of the text, so
+        a missing word rules it out; single-word keywords are a set lookup.
+        """
+        keyword_words = _keyword_words(keyword)
+        if not all(word in self.words for word in keyword_words):
+            return False
+        if len(keyword_words) == 1 and keyword_words[0] == keyword:
+            return True
+        return _keyword_pattern(keyword).search(self.lower) is not None
+
+
+def analyze_text(raw_text):
+    """Clean raw extracted CV text and analyse it in one go"""
+    return AnalyzedDocument(_cleaner.clean_text(raw_text))
+
+
+def as_analyzed(text):
+    """The AnalyzedDocument for already-cleaned text (or the document itself)"""
+    if isinstance(text, AnalyzedDocument):
+        return text
+    return AnalyzedDocument(text)
+
+
+def as_text(text):
+    """Plain text of a string or AnalyzedDocument"""
+    return text.text if isinstance(text, AnalyzedDocument) else text
@@ -1,12 +1,19 @@
 import re
 
+# Whitespace runs (collapsed to one space) or characters outside basic punctuation (dropped).
+# '@' and '+' are kept so email addresses and international phone numbers survive cleaning.
+# The two classes are disjoint, so one pass gives the same result as two.
+_CLEAN_PATTERN = re.compile(r'(\s+)|[^\w\s.,!?;:@+-]+')
+
+
+def _clean_match(match):
+    return ' ' if match.group(1) else ''
+
+
 class TextCleaner:
     def clean_text(self, text):
-        # Remove extra whitespace and newlines
-        text = re.sub(r'\s+', ' ', text)
-        # Remove special characters but keep basic punctuation
-        text = re.sub(r'[^\w\s.,!?;:-]', '', text)
-        return text.strip()
+        # Collapse whitespace and strip special characters in a single scan
+        return _CLEAN_PATTERN.sub(_clean_match, text).strip()
     
     def preprocess_for_ai(self, text):
         # Clean text for AI processing
@@ -0,0 +1,78 @@
+import hashlib
+import io
+import os
+import tempfile
+from config import UPLOAD_FOLDER, UPLOAD_SPOOL_MAX_BYTES, UPLOAD_CHUNK_BYTES
+
+
+class SpooledUpload:
+    """An uploaded CV read once, in chunks, and hashed on the way in.
+
+    Uploads up to `max_memory` bytes stay in memory and are parsed from
+    there, so they never touch the disk. Larger ones spill to
+    `<spool_dir>/<sha256><ext>`. Because that name comes from the
+    content, concurrent uploads that share a filename can't overwrite
+    each other, and re-uploading the same file reuses the spilled copy.
+    """
+
+    def __init__(self, filename, sha256, size, data=None, path=None):
+        self.filename = filename
+        self.sha256 = sha256
+        self.size = size
+        self.data = data
+        self.path = path
+
+    @property
+    def extension(self):
+        return os.path.splitext(self.filename)[1].lower()
+
+    @property
+    def in_memory(self):
+        return self.data is not None
+
+    @classmethod
+    def receive(cls, stream, filename, spool_dir=UPLOAD_FOLDER, max_memory=UPLOAD_SPOOL_MAX_BYTES,
+                chunk_size=UPLOAD_CHUNK_BYTES):
+        """Read `stream` to the end, hashing every chunk; spill to disk only past `max_memory`"""
+        digest = hashlib.sha256()
+        buffer = io.BytesIO()
+        spill = None
+        size = 0
+        try:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+                if spill is None and size > max_memory:
+                    os.makedirs(spool_dir, exist_ok=True)
+                    spill = tempfile.NamedTemporaryFile(dir=spool_dir, prefix='.upload-', delete=False)
+                    spill.write(buffer.getvalue())
+                    buffer = None
+                (spill or buffer).write(chunk)
+        except BaseException:
+            if spill is not None:
+                spill.close()
+                os.remove(spill.name)
+            raise
+
+        sha256 = digest.hexdigest()
+        if spill is None:
+            return cls(filename, sha256, size, data=buffer.getvalue())
+
+        spill.close()
+        path = os.path.join(spool_dir, sha256 + os.path.splitext(filename)[1].lower())
+        if os.path.exists(path):
+            # Same content already spilled by an earlier upload
+            os.remove(spill.name)
+        else:
+            os.replace(spill.name, path)
+        print(f"💾 Spilled {size} byte upload to {path}")
+        return cls(filename, sha256, size, path=path)
+
+    def open(self):
+        """A fresh binary stream over the upload"""
+        if self.in_memory:
+            return io.BytesIO(self.data)
+        return open(self.path, 'rb')